@@ -33,7 +33,10 @@ from UI_lib.uihost import TestApplication
 from UI_lib.test_controller import TestControllerUI
 from UI_lib.agent_runner import AgentRunner
 from Backend_lib.Linux.daemons import BluezServices
-from Backend_lib.Linux.bluez_test import  BluetoothDeviceManager
+from Backend_lib.Linux.adapter_manager import MultiAdapterManager
+from Backend_lib.Linux.bluez import dbus_call_stats
+from Backend_lib.Linux.dbus_recorder import DBusRecorder
+from Backend_lib.Linux.dbus_loop import start_glib_loop, stop_glib_loop
 
 
 def kill_previous_processes():
@@ -123,6 +126,10 @@ class BluetoothUIApp(QMainWindow):
         self.previous_cmd_list = []
         self.controllers_list_layout = None
         self.test_application_widget = None
+        # Created on first controller selection, once bluetoothd is reachable
+        self.adapter_manager = None
+        # Set BT_DBUS_RECORDING=<file> to record the D-Bus session for offline replay
+        self.dbus_recorder = None
         self.list_controllers()
 
 
@@ -284,9 +291,16 @@ class BluetoothUIApp(QMainWindow):
 
         if controller in self.controller.controllers_list:
             self.controller.interface=self.controller.controllers_list[controller]
-        bluetooth_device_manager=BluetoothDeviceManager(interface=self.controller.interface)
+        if not self.adapter_manager:
+            self.adapter_manager = MultiAdapterManager()
+            if os.environ.get("BT_DBUS_RECORDING"):
+                self.dbus_recorder = DBusRecorder(os.environ["BT_DBUS_RECORDING"])
+                self.dbus_recorder.start(self.adapter_manager.bus, object_mirror=self.adapter_manager.object_mirror)
         #run(self.log, f"hciconfig -a {self.controller.interface} up")
-        bluetooth_device_manager.power_on_adapter()
+        try:
+            self.adapter_manager.power_on_adapter(self.controller.interface)
+        except KeyError as e:
+            self.log.error(f"Cannot power on controller: {e}")
 
 
         if self.previous_row_selected:
@@ -360,7 +374,8 @@ class BluetoothUIApp(QMainWindow):
         run(self.log, f"hciconfig -a {self.controller.interface} up")
         self.setWindowTitle('Test Host')
         self.setCentralWidget(TestApplication(interface=self.controller.interface, log_path=self.log_path,
-                                                       back_callback=self.show_main))
+                                                       back_callback=self.show_main,
+                                                       adapter_manager=self.adapter_manager))
 
     def show_main(self):
         """
@@ -376,6 +391,8 @@ class BluetoothUIApp(QMainWindow):
 if __name__ == "__main__":
     kill_previous_processes()
     app = QApplication(sys.argv)
+    # Iterate GLib in its own thread so D-Bus signals and async replies are delivered
+    start_glib_loop()
     app_window = BluetoothUIApp()
     app_window.setWindowIcon(QIcon('/root/Desktop/BT_BLE_Automation/test_automation/images/app_icon.jpg'))
     app_window.showMaximized()
@@ -390,6 +407,13 @@ if __name__ == "__main__":
         app_window.bluez_logger.stop_pulseaudio_logs()
         app_window.bluez_logger.stop_bluetoothd_logs()
         app_window.bluez_logger.stop_dump_logs()
+        app_window.log.info("D-Bus call statistics:\n" + dbus_call_stats.format_report())
+        if app_window.dbus_recorder:
+            app_window.dbus_recorder.stop()
+        app_window.controller.stop_connection_tracking()
+        if app_window.adapter_manager:
+            app_window.adapter_manager.shutdown()
+        stop_glib_loop()
 
     app.aboutToQuit.connect(stop_logs)
     sys.exit(app.exec())
@@ -0,0 +1,308 @@
+import logging
+import threading
+from concurrent.futures import Future
+from concurrent.futures import InvalidStateError
+from concurrent.futures import ThreadPoolExecutor
+
+import dbus
+
+from Backend_lib.Linux.bluez import BluetoothDeviceManager
+from Backend_lib.Linux.bluez import BluezObjectMirror
+from Backend_lib.Linux.bluez import DBusProxyCache
+from Backend_lib.Linux.dbus_loop import start_glib_loop
+
+# BluetoothDeviceManager methods that only read the object mirror or the connection
+# tracker; they are thread-safe and never wait on the worker
+MIRROR_READ_METHODS = frozenset((
+    "build_discovery_filter",
+    "find_device_path",
+    "get_adapter_device_snapshot",
+    "get_connected_devices",
+    "get_connection_state",
+    "get_connection_states",
+    "get_device_snapshot",
+    "get_managed_objects",
+    "get_paired_devices",
+    "is_device_connected",
+    "is_device_paired",
+))
+
+
+class MultiAdapterManager:
+    """
+    Owns one BluetoothDeviceManager per adapter found on the bus.
+
+    Every adapter gets its own single-thread worker. Work submitted for one controller
+    runs in order on that worker, so a manager's mutable state (device_address,
+    stream_process, ...) is only ever touched by one thread, while discovery, pairing and
+    streaming on different controllers run in parallel. All managers share one system
+    bus connection, one BluezObjectMirror and one DBusProxyCache.
+
+    Adapters plugged in or removed while running are picked up from the mirror.
+    """
+
+    def __init__(self):
+        """
+        Connect to the system bus and create a manager for every adapter present.
+        """
+        self.lock = threading.RLock()
+        # Notified whenever an adapter is added
+        self.adapters_changed = threading.Condition(self.lock)
+        self.managers = {}
+        self.workers = {}
+        start_glib_loop()
+        self.bus = dbus.SystemBus()
+        self.proxy_cache = DBusProxyCache(self.bus)
+        self.object_mirror = BluezObjectMirror(self.bus)
+        self.object_mirror.add_listener(self.proxy_cache.on_object_mirror_change)
+        self.object_mirror.add_listener(self.on_object_mirror_change)
+        self.object_mirror.start()
+        for path, interfaces in self.object_mirror.snapshot().items():
+            if "org.bluez.Adapter1" in interfaces:
+                self._add_adapter(path)
+
+    def adapters(self):
+        """
+        Returns:
+            list: Interface names of the known adapters, e.g. ['hci0', 'hci1'].
+        """
+        with self.lock:
+            return sorted(self.managers)
+
+    def get_manager(self, interface):
+        """
+        Return the manager of an adapter.
+
+        Call its methods through submit() when other threads may use the same adapter.
+
+        Args:
+            interface (str): Controller interface like 'hci0'.
+        Returns:
+            BluetoothDeviceManager: The manager, or None if the adapter is unknown.
+        """
+        with self.lock:
+            return self.managers.get(interface)
+
+    def wait_for_adapter(self, interface, timeout=5):
+        """
+        Wait until an adapter is known, e.g. after bluetoothd was restarted.
+
+        Args:
+            interface (str): Controller interface like 'hci0'.
+            timeout (float): Seconds to wait.
+        Returns:
+            bool: True if the adapter is known.
+        """
+        with self.adapters_changed:
+            return self.adapters_changed.wait_for(lambda: interface in self.managers, timeout)
+
+    def get_worker_proxy(self, interface):
+        """
+        Return a stand-in for an adapter's manager that runs every call on its worker.
+
+        Args:
+            interface (str): Controller interface like 'hci0'.
+        Returns:
+            AdapterWorkerProxy: Proxy resolving the adapter's current manager on each use.
+        """
+        return AdapterWorkerProxy(self, interface)
+
+    def submit(self, interface, method, *args, **kwargs):
+        """
+        Queue a call on the worker of an adapter.
+
+        Args:
+            interface (str): Controller interface like 'hci0'.
+            method (str or callable): Name of a BluetoothDeviceManager method, or a callable
+                                      taking the manager as its first argument.
+            *args, **kwargs: Arguments for the call.
+        Returns:
+            concurrent.futures.Future: Resolves to the call's return value. For the *_async
+            methods that is itself a Future.
+        Raises:
+            KeyError: If the adapter is unknown.
+        """
+        with self.lock:
+            if interface not in self.managers:
+                raise KeyError(f"Unknown adapter {interface}")
+            manager = self.managers[interface]
+            worker = self.workers[interface]
+        func = getattr(manager, method) if isinstance(method, str) else (lambda *a, **kw: method(manager, *a, **kw))
+        return worker.submit(func, *args, **kwargs)
+
+    def submit_all(self, method, *args, **kwargs):
+        """
+        Queue the same call on every adapter.
+
+        Returns:
+            dict: Interface name -> Future.
+        """
+        return {interface: self.submit(interface, method, *args, **kwargs) for interface in self.adapters()}
+
+    def power_on_adapter(self, interface):
+        """
+        Power on an adapter through its worker and wait for the result.
+
+        Args:
+            interface (str): Controller interface like 'hci0'.
+        returns:
+            None
+        """
+        self.submit(interface, "power_on_adapter").result()
+
+    def shutdown(self):
+        """
+        Stop all workers after their queued work, shut the managers down and release the
+        D-Bus subscriptions.
+
+        args: None
+        returns: None
+        """
+        with self.lock:
+            retired = [(self.managers[interface], self.workers[interface]) for interface in self.managers]
+            self.workers.clear()
+            self.managers.clear()
+        for manager, worker in retired:
+            self._retire(manager, worker)
+        self.object_mirror.stop()
+        self.proxy_cache.clear()
+
+    def on_object_mirror_change(self, signal_name, path, *args):
+        """
+        BluezObjectMirror listener adding and removing adapters as they come and go.
+        """
+        if signal_name == "InterfacesAdded" and "org.bluez.Adapter1" in args[0]:
+            self._add_adapter(path)
+        elif signal_name == "InterfacesRemoved" and "org.bluez.Adapter1" in args[0]:
+            self._remove_adapter(path)
+
+    def _add_adapter(self, path):
+        interface = path.rsplit("/", 1)[-1]
+        with self.lock:
+            if interface in self.managers:
+                return
+            self.managers[interface] = BluetoothDeviceManager(
+                interface=interface, bus=self.bus, object_mirror=self.object_mirror, proxy_cache=self.proxy_cache)
+            self.workers[interface] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"bluez-{interface}")
+            self.adapters_changed.notify_all()
+        logging.info(f"Adapter {interface} added")
+
+    def _remove_adapter(self, path):
+        interface = path.rsplit("/", 1)[-1]
+        with self.lock:
+            manager = self.managers.pop(interface, None)
+            worker = self.workers.pop(interface, None)
+        if worker:
+            # Called on the GLib loop thread, which queued calls may be waiting on; drain
+            # the worker and shut the manager down from another thread
+            threading.Thread(target=self._retire, args=(manager, worker),
+                             name=f"bluez-{interface}-retire", daemon=True).start()
+            logging.info(f"Adapter {interface} removed")
+
+    @staticmethod
+    def _retire(manager, worker):
+        worker.shutdown(wait=True)
+        try:
+            manager.shutdown()
+        except Exception as e:
+            logging.error(f"Shutting down the manager of {manager.interface} failed: {e}")
+
+
+def chain_future(worker_future):
+    """
+    Flatten the worker Future of a *_async call into the Future that call returns.
+
+    Args:
+        worker_future (concurrent.futures.Future): Worker Future resolving to a Future.
+    Returns:
+        concurrent.futures.Future: Resolves like the inner Future. Cancelling it cancels
+        the inner Future (e.g. CancelPairing) or the queued call.
+    """
+    outer = Future()
+
+    def settle(apply):
+        try:
+            apply()
+        except InvalidStateError:
+            pass  # cancelled by the caller meanwhile
+
+    def on_inner_done(inner):
+        if inner.cancelled():
+            outer.cancel()
+        elif inner.exception() is not None:
+            settle(lambda: outer.set_exception(inner.exception()))
+        else:
+            settle(lambda: outer.set_result(inner.result()))
+
+    def on_started(done):
+        if done.cancelled():
+            outer.cancel()
+        elif done.exception() is not None:
+            settle(lambda: outer.set_exception(done.exception()))
+        else:
+            inner = done.result()
+            outer.add_done_callback(lambda _: outer.cancelled() and inner.cancel())
+            inner.add_done_callback(on_inner_done)
+
+    outer.add_done_callback(lambda _: outer.cancelled() and worker_future.cancel())
+    worker_future.add_done_callback(on_started)
+    return outer
+
+
+class AdapterWorkerProxy:
+    """
+    Stand-in for one adapter's BluetoothDeviceManager that never makes the caller wait
+    for other work queued on the adapter.
+
+    - MIRROR_READ_METHODS run on the calling thread; they only read in-memory state.
+    - *_async methods are queued on the worker and return a Future at once (see
+      chain_future()), so they stay ordered with the adapter's other work.
+    - submit() queues any other method and returns the worker Future; the UI uses it for
+      slow calls (discovery, OBEX, subprocesses) and finishes on the GUI thread.
+    - Calling any other method directly queues it and waits for the result, for scripts
+      and worker-side code that want plain blocking calls.
+
+    Other attributes are read from the manager directly. The manager is looked up on
+    every use, so the proxy keeps working when the adapter is re-added after bluetoothd
+    restarts.
+    """
+
+    def __init__(self, adapter_manager, interface):
+        """
+        Args:
+            adapter_manager (MultiAdapterManager): Owner of the adapter's manager and worker.
+            interface (str): Controller interface like 'hci0'.
+        """
+        self._adapter_manager = adapter_manager
+        self._interface = interface
+
+    def submit(self, method, *args, **kwargs):
+        """
+        Queue a manager method on the adapter's worker without waiting for it.
+
+        Args:
+            method (str): Name of a BluetoothDeviceManager method.
+            *args, **kwargs: Arguments for the call.
+        Returns:
+            concurrent.futures.Future: Resolves to the call's return value.
+        Raises:
+            KeyError: If the adapter is unknown.
+        """
+        return self._adapter_manager.submit(self._interface, method, *args, **kwargs)
+
+    def __getattr__(self, name):
+        manager = self._adapter_manager.get_manager(self._interface)
+        if manager is None:
+            raise KeyError(f"Unknown adapter {self._interface}")
+        value = getattr(manager, name)
+        if not callable(value) or name in MIRROR_READ_METHODS:
+            return value
+        if threading.current_thread().name.startswith(f"bluez-{self._interface}_"):
+            # Already on the worker; queueing would wait on ourselves
+            return value
+        if name.endswith("_async"):
+            return lambda *args, **kwargs: chain_future(self.submit(name, *args, **kwargs))
+
+        def call(*args, **kwargs):
+            return self.submit(name, *args, **kwargs).result()
+        return call
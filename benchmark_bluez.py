@@ -0,0 +1,260 @@
+"""
+Benchmarks of the BluetoothDeviceManager lookup and classification paths.
+
+Each tree size runs in its own process against a fake BlueZ service on a private bus
+(see fake_bluez.py), because dbus-python keeps one shared system bus connection per
+process. For every operation the suite reports p50/p99/mean latency and, from a separate
+tracemalloc pass, the allocated bytes and blocks per call. Results are written as JSON so
+runs of different releases can be compared:
+
+    python3 -m Backend_lib.Linux.benchmark_bluez --sizes 100 1000 10000 --output results.json
+    python3 -m Backend_lib.Linux.benchmark_bluez --compare old.json results.json
+
+--smoke runs one small tree with few iterations and exits non-zero unless every
+operation produced statistics, as a quick check that the suite still works:
+
+    python3 -m Backend_lib.Linux.benchmark_bluez --smoke
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCHMARK_OPERATIONS = (
+    "find_device_path",
+    "get_paired_devices",
+    "get_connected_devices",
+    "get_connected_a2dp_sink_devices",
+    "get_connected_a2dp_source_devices",
+    "_get_media_control_interface",
+    "remove_device",
+)
+
+# Operations walking the whole tree get fewer iterations at large sizes
+TREE_WALK_OPERATIONS = ("get_paired_devices", "get_connected_devices",
+                        "get_connected_a2dp_sink_devices", "get_connected_a2dp_source_devices")
+
+# Tree size and iteration counts used by --smoke
+SMOKE_SIZE = 50
+SMOKE_ITERATIONS = 10
+SMOKE_MEMORY_ITERATIONS = 2
+
+
+def percentile(samples, fraction):
+    """
+    Args:
+        samples (list): Sorted samples.
+        fraction (float): Percentile as a fraction, e.g. 0.99.
+    Returns:
+        float: Nearest-rank percentile, or 0.0 for no samples.
+    """
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, max(0, int(round(fraction * len(samples))) - 1))]
+
+
+def measure(call, arguments, memory_arguments):
+    """
+    Time call over every argument tuple, then measure allocations in a separate pass.
+
+    Args:
+        call (callable): Function under test.
+        arguments (list): Argument tuples, one per timed call.
+        memory_arguments (list): Argument tuples for the calls traced with tracemalloc.
+    Returns:
+        dict: Latency (microseconds) and allocation statistics.
+    """
+    samples = []
+    for args in arguments:
+        started = time.perf_counter()
+        call(*args)
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+
+    traced = memory_arguments
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for args in traced:
+        call(*args)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = [stat for stat in after.compare_to(before, "lineno") if stat.size_diff > 0]
+    return {
+        "iterations": len(samples),
+        "p50_us": percentile(samples, 0.50),
+        "p99_us": percentile(samples, 0.99),
+        "mean_us": sum(samples) / len(samples) if samples else 0.0,
+        "max_us": samples[-1] if samples else 0.0,
+        "alloc_bytes_per_call": sum(stat.size_diff for stat in allocated) / max(1, len(traced)),
+        "alloc_blocks_per_call": sum(stat.count_diff for stat in allocated) / max(1, len(traced)),
+    }
+
+
+def run_size(devices, iterations, memory_iterations):
+    """
+    Benchmark every operation against a fake tree of the given size.
+
+    Must run in a fresh process: it points the system bus at a private bus.
+
+    Args:
+        devices (int): Number of simulated devices.
+        iterations (int): Timed calls per operation.
+        memory_iterations (int): Calls per operation traced for allocations.
+    Returns:
+        dict: Operation name -> statistics, plus setup timings.
+    """
+    from Backend_lib.Linux.fake_bluez import FakeBluezEnvironment
+
+    with FakeBluezEnvironment(devices=devices, paired_ratio=0.3, connected_ratio=0.2, seed=devices):
+        from Backend_lib.Linux.bluez import BluetoothDeviceManager
+
+        started = time.perf_counter()
+        manager = BluetoothDeviceManager(interface="hci0")
+        setup_ms = (time.perf_counter() - started) * 1000
+
+        objects = manager.get_managed_objects()
+        devices_props = [interfaces["org.bluez.Device1"] for interfaces in objects.values()
+                         if "org.bluez.Device1" in interfaces]
+        addresses = [str(props["Address"]) for props in devices_props]
+        media_addresses = [str(objects[path]["org.bluez.Device1"]["Address"]) for path, interfaces in objects.items()
+                           if "org.bluez.MediaControl1" in interfaces] or addresses
+        removable = [str(props["Address"]) for props in devices_props
+                     if not props.get("Paired") and not props.get("Connected")]
+
+        def spread(values, count):
+            return [(values[i * len(values) // count],) for i in range(count)] if values else []
+
+        walk_iterations = max(10, min(iterations, iterations * 1000 // max(devices, 1)))
+        calls = {
+            "find_device_path": (lambda address: manager.find_device_path(address, "hci0"),
+                                 spread(addresses, iterations)),
+            "_get_media_control_interface": (lambda address: manager._get_media_control_interface(address, "hci0"),
+                                             spread(media_addresses, iterations)),
+        }
+        for operation in TREE_WALK_OPERATIONS:
+            calls[operation] = (lambda method=getattr(manager, operation): method("hci0"),
+                                [()] * walk_iterations)
+
+        results = {"devices": devices, "setup_ms": setup_ms, "operations": {}}
+        for operation in BENCHMARK_OPERATIONS:
+            if operation == "remove_device":
+                continue
+            call, arguments = calls[operation]
+            results["operations"][operation] = measure(call, arguments, arguments[:memory_iterations])
+
+        # Destructive: every call removes a distinct unpaired, disconnected device
+        removable = [(address, "hci0") for address in removable]
+        traced = removable[:min(memory_iterations, len(removable) // 2)]
+        timed = removable[len(traced):len(traced) + iterations]
+        results["operations"]["remove_device"] = measure(manager.remove_device, timed, traced) if timed else {}
+        manager.shutdown()
+        return results
+
+
+def compare(baseline_path, current_path, threshold):
+    """
+    Print operations whose p50 or p99 got slower than threshold (a ratio) between two runs.
+
+    Returns:
+        int: Number of regressions found.
+    """
+    with open(baseline_path) as baseline_file, open(current_path) as current_file:
+        baseline, current = json.load(baseline_file), json.load(current_file)
+    regressions = 0
+    for size, result in current["results"].items():
+        for operation, stats in result["operations"].items():
+            old = baseline["results"].get(size, {}).get("operations", {}).get(operation)
+            if not old or not stats:
+                continue
+            for key in ("p50_us", "p99_us"):
+                if old[key] and stats[key] / old[key] > threshold:
+                    regressions += 1
+                    print(f"REGRESSION {operation} @ {size} devices: {key} {old[key]:.1f} -> {stats[key]:.1f} us")
+    print(f"{regressions} regression(s) above {threshold:.2f}x")
+    return regressions
+
+
+def check_report(report):
+    """
+    Print every benchmarked operation that produced no statistics.
+
+    Args:
+        report (dict): Report as written by main().
+    Returns:
+        int: Number of missing or empty operations.
+    """
+    missing = 0
+    for size, result in report["results"].items():
+        for operation in BENCHMARK_OPERATIONS:
+            stats = result["operations"].get(operation)
+            if not stats or not stats["iterations"]:
+                missing += 1
+                print(f"MISSING {operation} @ {size} devices", file=sys.stderr)
+    return missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BluetoothDeviceManager lookup paths on a fake BlueZ tree")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--memory-iterations", type=int, default=50)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="Compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio reported by --compare")
+    parser.add_argument("--smoke", action="store_true",
+                        help=f"Run {SMOKE_SIZE} devices with a few iterations and check every operation ran")
+    parser.add_argument("--run-size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    if args.run_size is not None:
+        json.dump(run_size(args.run_size, args.iterations, args.memory_iterations), sys.stdout)
+        return
+
+    if args.smoke:
+        args.sizes = [SMOKE_SIZE]
+        args.iterations = SMOKE_ITERATIONS
+        args.memory_iterations = SMOKE_MEMORY_ITERATIONS
+        args.output = os.path.join(tempfile.mkdtemp(prefix="benchmark-bluez-"), "smoke.json")
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "host": platform.node(),
+        "iterations": args.iterations,
+        "results": {},
+    }
+    for size in args.sizes:
+        print(f"Running {size} devices...", file=sys.stderr)
+        # Re-run this module the way it was started so the Backend_lib imports resolve
+        command = [sys.executable, "-m", __spec__.name] if __spec__ else [sys.executable, os.path.abspath(__file__)]
+        output = subprocess.run(command + ["--run-size", str(size),
+                                 "--iterations", str(args.iterations),
+                                 "--memory-iterations", str(args.memory_iterations)],
+                                stdout=subprocess.PIPE, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        report["results"][str(size)] = result
+        for operation, stats in result["operations"].items():
+            if stats:
+                print(f"{size:>6} {operation:<36} p50 {stats['p50_us']:>10.1f} us  p99 {stats['p99_us']:>10.1f} us  "
+                      f"{stats['alloc_bytes_per_call']:>10.0f} B/call", file=sys.stderr)
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.smoke:
+        missing = check_report(report)
+        print("SMOKE OK" if not missing else f"SMOKE FAILED: {missing} operation(s) without results", file=sys.stderr)
+        sys.exit(1 if missing else 0)
+
+
+if __name__ == "__main__":
+    main()
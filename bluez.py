@@ -4,20 +4,1216 @@ import dbus.mainloop.glib
 import os
 import re
 import subprocess
+import sys
 import time
 import logging
+import queue
+import threading
+from collections import OrderedDict
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import InvalidStateError
 
 from logger import Logger
-from Backend_lib.Linux import hci_commands as hci
+from Backend_lib.Linux.dbus_loop import start_glib_loop, get_glib_loop
+from Backend_lib.Linux.hci_encoder import encode_command
+from Backend_lib.Linux.hci_transport import open_hci_transport
 from utils import run
 
 from gi.repository import GObject
+from gi.repository import GLib
 
 # Set the D-Bus main loop
 dbus.mainloop.glib.DBusGMainLoop(set_as_default=True)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
+# Seconds; matches the libdbus default reply timeout
+DEFAULT_DBUS_TIMEOUT = 25
+# Seconds to wait for the Connected signal once Connect() has returned
+CONNECTED_SIGNAL_TIMEOUT = 5
+A2DP_SINK_UUID = "0000110e-0000-1000-8000-00805f9b34fb"
+
+# /org/bluez/<adapter>/dev_<AA_BB_CC_DD_EE_FF>[/<child object>]
+DEVICE_PATH_PATTERN = re.compile(r"^/org/bluez/([^/]+)/dev_((?:[0-9A-Fa-f]{2}_){5}[0-9A-Fa-f]{2})(/.*)?$")
+
+# 16-bit service class UUIDs, expanded on the Bluetooth base UUID
+BLUETOOTH_BASE_UUID_SUFFIX = "-0000-1000-8000-00805f9b34fb"
+OPP_SHORT_UUID = 0x1105
+A2DP_SOURCE_SHORT_UUID = 0x110A
+A2DP_SINK_SHORT_UUID = 0x110B
+AVRCP_SHORT_UUIDS = frozenset((0x110C, 0x110E, 0x110F))
+
+# Views returned per adapter by BluetoothDeviceManager.get_device_snapshot()
+DEVICE_SNAPSHOT_VIEWS = ("paired", "connected", "a2dp_sink", "a2dp_source", "avrcp", "opp")
+
+
+def short_uuid(uuid):
+    """
+    Convert a 128-bit UUID string built on the Bluetooth base UUID to its short form.
+
+    Args:
+        uuid (str): UUID like '0000110b-0000-1000-8000-00805f9b34fb'.
+    Returns:
+        int: The 16/32-bit UUID, or None for a vendor UUID outside the base range.
+    """
+    uuid = str(uuid).lower()
+    if len(uuid) != 36 or not uuid.endswith(BLUETOOTH_BASE_UUID_SUFFIX):
+        return None
+    try:
+        return int(uuid[:8], 16)
+    except ValueError:
+        return None
+
+
+# Interned UUID sets shared by DeviceRecord instances
+_uuid_sets = {}
+
+
+class DeviceRecord:
+    """
+    Compact description of one BlueZ device.
+
+    Holds the address as a 48-bit int, the adapter index (0 for hci0), Device1 boolean
+    properties as a bit field and the service UUIDs as a frozenset of short UUIDs, so
+    role checks are set lookups instead of string scans. UUIDs outside the Bluetooth
+    base range are kept as their lower-case 128-bit string.
+    """
+
+    __slots__ = ("address", "adapter", "flags", "uuids", "name")
+
+    PAIRED = 0x01
+    CONNECTED = 0x02
+    TRUSTED = 0x04
+    BLOCKED = 0x08
+    BONDED = 0x10
+    SERVICES_RESOLVED = 0x20
+
+    # Device1 property name -> flag bit
+    PROPERTY_FLAGS = (("Paired", PAIRED), ("Connected", CONNECTED), ("Trusted", TRUSTED),
+                      ("Blocked", BLOCKED), ("Bonded", BONDED), ("ServicesResolved", SERVICES_RESOLVED))
+
+    def __init__(self, address, adapter, flags=0, uuids=frozenset(), name=None):
+        """
+        Args:
+            address (int): 48-bit device address.
+            adapter (int): Controller index.
+            flags (int): Combination of the flag constants above.
+            uuids (frozenset): Short UUIDs (int) and vendor UUIDs (str).
+            name (str): Device name, if known.
+        """
+        self.address = address
+        self.adapter = adapter
+        self.flags = flags
+        self.uuids = uuids
+        self.name = name
+
+    @classmethod
+    def from_properties(cls, props, path=None):
+        """
+        Build a record from Device1 properties.
+
+        Args:
+            props (dict): org.bluez.Device1 properties; must contain Address.
+            path (str): Device object path, used for the adapter if Adapter is missing.
+        Returns:
+            DeviceRecord: The new record.
+        """
+        adapter_path = str(props.get("Adapter") or (path or "").rsplit("/", 1)[0])
+        flags = 0
+        for property_name, flag in cls.PROPERTY_FLAGS:
+            if props.get(property_name, False):
+                flags |= flag
+        uuids = []
+        for uuid in props.get("UUIDs", ()):
+            short = short_uuid(uuid)
+            uuids.append(sys.intern(str(uuid).lower()) if short is None else short)
+        uuids = frozenset(uuids)
+        # Devices of the same kind share one set object
+        uuids = _uuid_sets.setdefault(uuids, uuids)
+        name = props.get("Name")
+        return cls(address_to_int(props["Address"]), adapter_index(adapter_path), flags,
+                   uuids, str(name) if name is not None else None)
+
+    @property
+    def key(self):
+        """
+        Returns:
+            int: Adapter index and address packed into one int, unique across adapters.
+        """
+        return (self.adapter << 48) | self.address
+
+    @property
+    def address_str(self):
+        """
+        Returns:
+            str: Address in 'AA:BB:CC:DD:EE:FF' form.
+        """
+        return int_to_address(self.address)
+
+    @property
+    def interface(self):
+        """
+        Returns:
+            str: Controller interface name like 'hci0'.
+        """
+        return f"hci{self.adapter}"
+
+    @property
+    def paired(self):
+        return bool(self.flags & self.PAIRED)
+
+    @property
+    def connected(self):
+        return bool(self.flags & self.CONNECTED)
+
+    @property
+    def is_a2dp_sink(self):
+        return A2DP_SINK_SHORT_UUID in self.uuids
+
+    @property
+    def is_a2dp_source(self):
+        return A2DP_SOURCE_SHORT_UUID in self.uuids
+
+    @property
+    def is_avrcp(self):
+        return not AVRCP_SHORT_UUIDS.isdisjoint(self.uuids)
+
+    @property
+    def is_opp(self):
+        return OPP_SHORT_UUID in self.uuids
+
+    def __repr__(self):
+        return (f"DeviceRecord({self.address_str}, {self.interface}, flags=0x{self.flags:02x}, "
+                f"uuids={sorted(map(str, self.uuids))}, name={self.name!r})")
+
+
+def address_to_int(address):
+    """
+    Args:
+        address (str): Address like 'AA:BB:CC:DD:EE:FF'.
+    Returns:
+        int: The 48-bit address.
+    """
+    return int(str(address).replace(":", ""), 16)
+
+
+def int_to_address(value):
+    """
+    Args:
+        value (int): 48-bit address.
+    Returns:
+        str: Address like 'AA:BB:CC:DD:EE:FF'.
+    """
+    digits = f"{value:012X}"
+    return ":".join(digits[i:i + 2] for i in range(0, 12, 2))
+
+
+def adapter_index(adapter):
+    """
+    Args:
+        adapter (str): Adapter name or path like 'hci0' or '/org/bluez/hci0'.
+    Returns:
+        int: Controller index, or -1 if the name is not of the hciN form.
+    """
+    name = adapter.rsplit("/", 1)[-1]
+    return int(name[3:]) if name.startswith("hci") and name[3:].isdigit() else -1
+
+
+class BluezObjectMirror:
+    """
+    In-memory copy of the BlueZ ObjectManager tree.
+
+    The tree is seeded once with GetManagedObjects() and then kept current from the
+    InterfacesAdded, InterfacesRemoved and PropertiesChanged signals, so device queries
+    read from memory instead of walking the whole tree over D-Bus on every call. When
+    the service exits or restarts (NameOwnerChanged), the tree is dropped and re-seeded
+    from the new owner, and listeners see the removals and additions.
+
+    Signal handlers run on the GLib loop thread. They never change an interface or
+    property dict in place: every change builds new dicts and swaps them into
+    self.objects under the lock (copy-on-write). A snapshot() or any dict read from it
+    therefore stays consistent while signals keep arriving; callers must not modify it.
+    """
+
+    def __init__(self, bus, service="org.bluez"):
+        """
+        Initialize the mirror.
+
+        Args:
+            bus: D-Bus connection the BlueZ service lives on.
+            service (str): Well-known bus name of the service to mirror.
+        """
+        self.bus = bus
+        self.service = service
+        self.objects = {}
+        # address -> {adapter: Device1 path}
+        self.device_index = {}
+        # Device1 path -> {interface: [object paths under the device exporting it]}
+        self.device_interfaces = {}
+        # Device1 path -> time.monotonic() of the last signal about the device
+        self.device_last_seen = {}
+        self.listeners = []
+        self.lock = threading.RLock()
+        self._signal_matches = []
+
+    def start(self):
+        """
+        Subscribe to the ObjectManager and Properties signals and seed the mirror.
+
+        Signals are subscribed before seeding so no change is lost in between.
+
+        args: None
+        returns: None
+        """
+        if self._signal_matches:
+            return
+        self._signal_matches = [
+            self.bus.add_signal_receiver(self._on_interfaces_added,
+                                         signal_name="InterfacesAdded",
+                                         dbus_interface="org.freedesktop.DBus.ObjectManager",
+                                         bus_name=self.service),
+            self.bus.add_signal_receiver(self._on_interfaces_removed,
+                                         signal_name="InterfacesRemoved",
+                                         dbus_interface="org.freedesktop.DBus.ObjectManager",
+                                         bus_name=self.service),
+            self.bus.add_signal_receiver(self._on_properties_changed,
+                                         signal_name="PropertiesChanged",
+                                         dbus_interface="org.freedesktop.DBus.Properties",
+                                         bus_name=self.service,
+                                         path_keyword="path"),
+            self.bus.add_signal_receiver(self._on_name_owner_changed,
+                                         signal_name="NameOwnerChanged",
+                                         dbus_interface="org.freedesktop.DBus",
+                                         bus_name="org.freedesktop.DBus",
+                                         arg0=self.service),
+        ]
+        self.refresh()
+
+    def stop(self):
+        """
+        Remove the signal subscriptions. The last known tree is kept.
+
+        args: None
+        returns: None
+        """
+        for match in self._signal_matches:
+            match.remove()
+        self._signal_matches = []
+
+    def refresh(self):
+        """
+        Re-seed the mirror from a single GetManagedObjects() call.
+
+        args: None
+        returns: None
+        """
+        om = InstrumentedInterface(dbus.Interface(self.bus.get_object(self.service, "/", introspect=False),
+                                                  "org.freedesktop.DBus.ObjectManager"))
+        self.seed(om.GetManagedObjects())
+
+    def seed(self, objects):
+        """
+        Replace the mirrored tree with the given GetManagedObjects()-style dict.
+
+        Args:
+            objects (dict): Object path -> {interface: {property: value}}.
+        returns:
+            None
+        """
+        with self.lock:
+            last_seen = self.device_last_seen
+            self.objects = {}
+            self.device_index = {}
+            self.device_interfaces = {}
+            self.device_last_seen = {}
+            for path, interfaces in objects.items():
+                self._apply_interfaces_added(str(path), interfaces)
+            # A re-seed is not a sighting; keep what was known before
+            for path in self.device_last_seen:
+                if path in last_seen:
+                    self.device_last_seen[path] = last_seen[path]
+
+    def reload(self, seed=True):
+        """
+        Drop the mirrored tree and, if seed is set, re-seed it from the service.
+
+        Listeners get an InterfacesRemoved for every object dropped and an
+        InterfacesAdded for every object found afterwards.
+
+        Args:
+            seed (bool): False when the service has left the bus and nothing can be fetched.
+        returns:
+            None
+        """
+        with self.lock:
+            removed = self.objects
+            self.seed({})
+        for path, interfaces in removed.items():
+            self._notify("InterfacesRemoved", path, list(interfaces))
+        if not seed:
+            return
+        try:
+            self.refresh()
+        except dbus.exceptions.DBusException as e:
+            logging.error(f"Re-seeding the {self.service} object mirror failed: {e}")
+            return
+        for path, interfaces in self.snapshot().items():
+            self._notify("InterfacesAdded", path, interfaces)
+
+    def snapshot(self):
+        """
+        Return the mirrored tree as it is now, safe to iterate from any thread.
+
+        Only the top level is copied; the interface and property dicts are never
+        changed once published, so they are shared and must be treated as read-only.
+
+        args: None
+        Returns:
+            dict: Object path -> {interface: {property: value}}.
+        """
+        with self.lock:
+            return dict(self.objects)
+
+    def get_properties(self, path, interface):
+        """
+        Return a copy of the mirrored properties of one interface on one object.
+
+        Args:
+            path (str): D-Bus object path.
+            interface (str): D-Bus interface name.
+        Returns:
+            dict: Property name -> value; empty if the object or interface is unknown.
+        """
+        with self.lock:
+            return dict(self.objects.get(str(path), {}).get(interface, {}))
+
+    def add_listener(self, callback):
+        """
+        Register a callback invoked after every change applied to the mirror.
+
+        The callback is called as callback(signal_name, path, *signal_args), e.g.
+        callback("PropertiesChanged", path, interface, changed, invalidated).
+
+        Args:
+            callback (callable): Function to notify.
+        returns:
+            None
+        """
+        if callback not in self.listeners:
+            self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """
+        Unregister a callback added with add_listener().
+
+        Args:
+            callback (callable): Function to remove.
+        returns:
+            None
+        """
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def _notify(self, signal_name, path, *args):
+        for callback in list(self.listeners):
+            try:
+                callback(signal_name, path, *args)
+            except Exception as e:
+                logging.error(f"Object mirror listener failed on {signal_name} {path}: {e}")
+
+    def lookup_device(self, address, adapter=None):
+        """
+        Return the Device1 object path for an address without scanning the tree.
+
+        Args:
+            address (str): Bluetooth MAC address, any case.
+            adapter (str, optional): Controller interface like 'hci0'. If None, any adapter matches.
+
+        Returns:
+            str | None: Device1 object path, or None if the device is not known.
+        """
+        with self.lock:
+            paths = self.device_index.get(address.upper())
+            if not paths:
+                return None
+            if adapter:
+                return paths.get(adapter)
+            return next(iter(paths.values()))
+
+    def lookup_interface(self, address, interface, adapter=None):
+        """
+        Return an object path under the device that exports the given interface.
+
+        Args:
+            address (str): Bluetooth MAC address, any case.
+            interface (str): D-Bus interface name, e.g. 'org.bluez.MediaControl1'.
+            adapter (str, optional): Controller interface like 'hci0'. If None, any adapter matches.
+
+        Returns:
+            str | None: Object path, or None if no object under the device exports it.
+        """
+        with self.lock:
+            paths = self.device_index.get(address.upper())
+            if not paths:
+                return None
+            adapters = [adapter] if adapter else list(paths)
+            for name in adapters:
+                exported = self.device_interfaces.get(paths.get(name), {}).get(interface)
+                if exported:
+                    return exported[0]
+            return None
+
+    def get_device_interfaces(self, address, adapter=None):
+        """
+        Return the interfaces exported by a device and its child objects.
+
+        Args:
+            address (str): Bluetooth MAC address, any case.
+            adapter (str, optional): Controller interface like 'hci0'.
+
+        Returns:
+            dict: Interface name -> list of object paths exporting it.
+        """
+        with self.lock:
+            device_path = self.lookup_device(address, adapter)
+            return {interface: list(paths) for interface, paths in self.device_interfaces.get(device_path, {}).items()}
+
+    def _index_add(self, path, interfaces):
+        match = DEVICE_PATH_PATTERN.match(path)
+        if not match:
+            return
+        adapter, address, child = match[1], match[2].replace("_", ":").upper(), match[3]
+        device_path = path[:len(path) - len(child)] if child else path
+        exported = self.device_interfaces.setdefault(device_path, {})
+        for interface in interfaces:
+            paths = exported.setdefault(str(interface), [])
+            if path not in paths:
+                paths.append(path)
+        if not child and "org.bluez.Device1" in interfaces:
+            self.device_index.setdefault(address, {})[adapter] = path
+            self.device_last_seen[path] = time.monotonic()
+
+    def _index_remove(self, path, interfaces):
+        match = DEVICE_PATH_PATTERN.match(path)
+        if not match:
+            return
+        adapter, address, child = match[1], match[2].replace("_", ":").upper(), match[3]
+        device_path = path[:len(path) - len(child)] if child else path
+        exported = self.device_interfaces.get(device_path, {})
+        for interface in interfaces:
+            paths = exported.get(str(interface))
+            if paths and path in paths:
+                paths.remove(path)
+                if not paths:
+                    del exported[str(interface)]
+        if not exported:
+            self.device_interfaces.pop(device_path, None)
+        if not child and "org.bluez.Device1" in interfaces:
+            self.device_last_seen.pop(path, None)
+            adapters = self.device_index.get(address, {})
+            adapters.pop(adapter, None)
+            if not adapters:
+                self.device_index.pop(address, None)
+
+    def _apply_interfaces_added(self, path, interfaces):
+        entry = dict(self.objects.get(path, {}))
+        for interface, props in interfaces.items():
+            entry[str(interface)] = {**entry.get(str(interface), {}), **props}
+        self.objects[path] = entry
+        self._index_add(path, interfaces)
+
+    def _on_interfaces_added(self, path, interfaces):
+        path = str(path)
+        with self.lock:
+            self._apply_interfaces_added(path, interfaces)
+        self._notify("InterfacesAdded", path, interfaces)
+
+    def _on_interfaces_removed(self, path, interfaces):
+        path = str(path)
+        with self.lock:
+            entry = self.objects.get(path)
+            if entry is None:
+                return
+            removed = {str(interface) for interface in interfaces}
+            entry = {name: props for name, props in entry.items() if name not in removed}
+            self._index_remove(path, interfaces)
+            if entry:
+                self.objects[path] = entry
+            else:
+                del self.objects[path]
+        self._notify("InterfacesRemoved", path, interfaces)
+
+    def _on_name_owner_changed(self, name, old_owner, new_owner):
+        if str(name) != self.service:
+            return
+        logging.info(f"{self.service} owner changed from '{old_owner}' to '{new_owner}'; reloading the object mirror")
+        self.reload(seed=bool(new_owner))
+
+    def _on_properties_changed(self, interface, changed, invalidated, path=None):
+        with self.lock:
+            entry = self.objects.get(str(path))
+            if entry is None:
+                return
+            props = entry.get(str(interface))
+            if props is None:
+                return
+            props = {**props, **changed}
+            for name in invalidated:
+                props.pop(str(name), None)
+            self.objects[str(path)] = {**entry, str(interface): props}
+            if interface == "org.bluez.Device1":
+                self.device_last_seen[str(path)] = time.monotonic()
+        self._notify("PropertiesChanged", str(path), str(interface), changed, invalidated)
+
+# Connection states; an attempt normally walks them in this order
+CONNECTION_DISCONNECTED = "disconnected"
+CONNECTION_CONNECTING = "connecting"
+CONNECTION_CONNECTED = "connected"
+CONNECTION_SERVICES_RESOLVED = "services-resolved"
+CONNECTION_PROFILE_CONNECTED = "profile-connected"
+CONNECTION_DISCONNECTING = "disconnecting"
+CONNECTED_STATES = frozenset((CONNECTION_CONNECTED, CONNECTION_SERVICES_RESOLVED, CONNECTION_PROFILE_CONNECTED))
+
+# Phase name -> (state it starts in, state it ends in), see DeviceConnection.phase_latencies()
+CONNECTION_PHASES = (("connect", CONNECTION_CONNECTING, CONNECTION_CONNECTED),
+                     ("services", CONNECTION_CONNECTED, CONNECTION_SERVICES_RESOLVED),
+                     ("profile", CONNECTION_SERVICES_RESOLVED, CONNECTION_PROFILE_CONNECTED))
+
+# Transitions kept per device
+CONNECTION_HISTORY_LENGTH = 32
+
+
+class DeviceConnection:
+    """
+    Connection state of one device and the time each state of the current attempt began.
+
+    Timestamps are time.monotonic() values. Maintained by DeviceConnectionTracker; read
+    its fields while holding the tracker lock or take a copy with as_dict().
+    """
+
+    __slots__ = ("path", "address", "adapter", "state", "since", "phases", "history", "has_transport")
+
+    def __init__(self, path, address, adapter):
+        """
+        Args:
+            path (str): Device1 object path.
+            address (str): Bluetooth MAC address.
+            adapter (str): Controller interface like 'hci0'.
+        """
+        self.path = path
+        self.address = address
+        self.adapter = adapter
+        self.state = CONNECTION_DISCONNECTED
+        self.since = time.monotonic()
+        # state -> time it was entered during the current (or last) attempt
+        self.phases = {}
+        self.history = deque(maxlen=CONNECTION_HISTORY_LENGTH)
+        self.has_transport = False
+
+    @property
+    def connected(self):
+        return self.state in CONNECTED_STATES
+
+    def phase_latencies(self):
+        """
+        Break the current (or last) connection attempt down by phase.
+
+        Returns:
+            dict: Milliseconds for each phase reached: 'connect' (Connect issued ->
+            Connected), 'services' (-> ServicesResolved), 'profile' (-> media transport
+            up), and 'total' from the first to the last of them.
+        """
+        latencies = {}
+        for name, start, end in CONNECTION_PHASES:
+            if start in self.phases and end in self.phases:
+                latencies[name] = (self.phases[end] - self.phases[start]) * 1000
+        if len(self.phases) > 1:
+            latencies["total"] = (max(self.phases.values()) - min(self.phases.values())) * 1000
+        return latencies
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: address, adapter, path, state, seconds in the state, phase latencies
+            and the recent (state, timestamp) transitions.
+        """
+        return {
+            "address": self.address,
+            "adapter": self.adapter,
+            "path": self.path,
+            "state": self.state,
+            "in_state": time.monotonic() - self.since,
+            "phases": self.phase_latencies(),
+            "history": list(self.history),
+        }
+
+    def __repr__(self):
+        return f"DeviceConnection({self.address}, {self.adapter}, {self.state})"
+
+
+class DeviceConnectionTracker:
+    """
+    Per-device connection state machine driven by BluezObjectMirror events.
+
+        disconnected -> connecting -> connected -> services-resolved -> profile-connected
+                                                                   -> disconnecting -> disconnected
+
+    Device1 Connected and ServicesResolved changes and MediaTransport1 objects appearing
+    or going away under a device drive the transitions. BlueZ has no property for an
+    outgoing attempt in progress, so the connecting and disconnecting states are entered
+    through mark_connecting() and mark_disconnecting() when the call is issued. State is
+    read from memory; no query costs a D-Bus round trip.
+    """
+
+    def __init__(self, object_mirror, adapter=None):
+        """
+        Args:
+            object_mirror (BluezObjectMirror): Mirror to follow.
+            adapter (str): Only track devices of this controller, e.g. 'hci0'; all if None.
+        """
+        self.object_mirror = object_mirror
+        self.adapter = adapter
+        self.condition = threading.Condition(threading.RLock())
+        # Device1 path -> DeviceConnection
+        self.connections = {}
+        self.listeners = []
+
+    def start(self):
+        """
+        Follow the mirror and take the current state of every device from it.
+
+        args: None
+        returns: None
+        """
+        self.object_mirror.add_listener(self.on_object_mirror_change)
+        objects = self.object_mirror.snapshot()
+        with self.condition:
+            for path, interfaces in objects.items():
+                if "org.bluez.Device1" in interfaces:
+                    self._add_device(path, interfaces["org.bluez.Device1"])
+            for path, interfaces in objects.items():
+                if "org.bluez.MediaTransport1" in interfaces:
+                    self._transport_added(path)
+
+    def stop(self):
+        """
+        Stop following the mirror. The last known states are kept.
+
+        args: None
+        returns: None
+        """
+        self.object_mirror.remove_listener(self.on_object_mirror_change)
+
+    def add_listener(self, callback):
+        """
+        Register callback(connection, old_state, new_state), called after every transition
+        on the thread that delivered the triggering event.
+
+        Args:
+            callback (callable): Function to notify.
+        returns:
+            None
+        """
+        if callback not in self.listeners:
+            self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """
+        Unregister a callback added with add_listener().
+        """
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def get(self, path):
+        """
+        Args:
+            path (str): Device1 object path.
+        Returns:
+            DeviceConnection: The device's connection, or None if the device is unknown.
+        """
+        with self.condition:
+            return self.connections.get(str(path))
+
+    def get_state(self, path):
+        """
+        Args:
+            path (str): Device1 object path.
+        Returns:
+            str: One of the CONNECTION_* states; disconnected for unknown devices.
+        """
+        connection = self.get(path)
+        return connection.state if connection else CONNECTION_DISCONNECTED
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Device1 path -> DeviceConnection.as_dict() for every tracked device.
+        """
+        with self.condition:
+            return {path: connection.as_dict() for path, connection in self.connections.items()}
+
+    def mark_connecting(self, path):
+        """
+        Enter connecting when a Connect/ConnectProfile call is issued for a disconnected device.
+
+        Args:
+            path (str): Device1 object path.
+        returns:
+            None
+        """
+        self._mark(path, CONNECTION_CONNECTING, lambda state: state in (CONNECTION_DISCONNECTED,
+                                                                        CONNECTION_DISCONNECTING))
+
+    def mark_disconnecting(self, path):
+        """
+        Enter disconnecting when a Disconnect call is issued for a connected device.
+        """
+        self._mark(path, CONNECTION_DISCONNECTING, lambda state: state in CONNECTED_STATES
+                   or state == CONNECTION_CONNECTING)
+
+    def mark_failed(self, path):
+        """
+        Return to disconnected after a connect call failed before the device connected.
+        """
+        self._mark(path, CONNECTION_DISCONNECTED, lambda state: state == CONNECTION_CONNECTING)
+
+    def wait_for_state(self, path, states, timeout):
+        """
+        Block until the device is in one of the given states.
+
+        Relies on another thread (normally the GLib loop thread) delivering the mirror
+        events; BluetoothDeviceManager wraps it to pump the context when none does.
+
+        Args:
+            path (str): Device1 object path.
+            states (iterable): Acceptable CONNECTION_* states.
+            timeout (float): Seconds to wait.
+        Returns:
+            bool: True if a state was reached in time.
+        """
+        states = frozenset(states)
+        with self.condition:
+            return self.condition.wait_for(lambda: self.get_state(path) in states, timeout)
+
+    def on_object_mirror_change(self, signal_name, path, *args):
+        """
+        BluezObjectMirror listener applying Device1 and MediaTransport1 changes.
+        """
+        transitions = []
+        with self.condition:
+            if signal_name == "PropertiesChanged" and args[0] == "org.bluez.Device1":
+                connection = self.connections.get(path)
+                if connection:
+                    self._apply_device_properties(connection, args[1], transitions)
+            elif signal_name == "InterfacesAdded":
+                if "org.bluez.Device1" in args[0]:
+                    self._add_device(path, args[0]["org.bluez.Device1"], transitions)
+                if "org.bluez.MediaTransport1" in args[0]:
+                    self._transport_added(path, transitions)
+            elif signal_name == "InterfacesRemoved":
+                if "org.bluez.Device1" in args[0]:
+                    connection = self.connections.pop(path, None)
+                    if connection:
+                        # Removal takes the link down; waiters and listeners must see it
+                        connection.has_transport = False
+                        self._transition(connection, CONNECTION_DISCONNECTED, transitions)
+                if "org.bluez.MediaTransport1" in args[0]:
+                    self._transport_removed(path, transitions)
+            if transitions:
+                self.condition.notify_all()
+        self._notify(transitions)
+
+    def _mark(self, path, state, allowed):
+        transitions = []
+        with self.condition:
+            connection = self.connections.get(str(path))
+            if connection and allowed(connection.state):
+                self._transition(connection, state, transitions)
+                self.condition.notify_all()
+        self._notify(transitions)
+
+    def _add_device(self, path, props, transitions=None):
+        match = DEVICE_PATH_PATTERN.match(path)
+        if not match or match[3] or (self.adapter and match[1] != self.adapter):
+            return
+        connection = self.connections.get(path)
+        if connection is None:
+            connection = self.connections[path] = DeviceConnection(path, match[2].replace("_", ":").upper(), match[1])
+        self._apply_device_properties(connection, props, transitions if transitions is not None else [])
+
+    def _apply_device_properties(self, connection, changed, transitions):
+        if "Connected" in changed:
+            if not changed["Connected"]:
+                connection.has_transport = False
+                self._transition(connection, CONNECTION_DISCONNECTED, transitions)
+            elif not connection.connected:
+                self._transition(connection, CONNECTION_CONNECTED, transitions)
+        if "ServicesResolved" in changed:
+            if changed["ServicesResolved"] and connection.state == CONNECTION_CONNECTED:
+                self._transition(connection, CONNECTION_SERVICES_RESOLVED, transitions)
+                if connection.has_transport:
+                    self._transition(connection, CONNECTION_PROFILE_CONNECTED, transitions)
+            elif not changed["ServicesResolved"] and connection.state in (CONNECTION_SERVICES_RESOLVED,
+                                                                         CONNECTION_PROFILE_CONNECTED):
+                # bluetoothd clears ServicesResolved first when a link goes down
+                self._transition(connection, CONNECTION_DISCONNECTING, transitions)
+
+    def _device_for_child(self, path):
+        match = DEVICE_PATH_PATTERN.match(path)
+        if not match or not match[3]:
+            return None
+        return self.connections.get(path[:len(path) - len(match[3])])
+
+    def _transport_added(self, path, transitions=None):
+        connection = self._device_for_child(path)
+        if connection is None:
+            return
+        connection.has_transport = True
+        if connection.state in (CONNECTION_CONNECTED, CONNECTION_SERVICES_RESOLVED):
+            self._transition(connection, CONNECTION_PROFILE_CONNECTED, transitions if transitions is not None else [])
+
+    def _transport_removed(self, path, transitions):
+        connection = self._device_for_child(path)
+        if connection is None:
+            return
+        # The mirror has already dropped the removed transport from its index
+        connection.has_transport = bool(self.object_mirror.device_interfaces.get(connection.path, {})
+                                        .get("org.bluez.MediaTransport1"))
+        if not connection.has_transport and connection.state == CONNECTION_PROFILE_CONNECTED:
+            self._transition(connection, CONNECTION_SERVICES_RESOLVED, transitions)
+
+    def _transition(self, connection, state, transitions):
+        if state == connection.state:
+            return
+        now = time.monotonic()
+        old_state = connection.state
+        if state == CONNECTION_CONNECTING or (state == CONNECTION_CONNECTED and old_state != CONNECTION_CONNECTING):
+            # A new attempt; incoming connections start at connected
+            connection.phases = {}
+        if state not in (CONNECTION_DISCONNECTED, CONNECTION_DISCONNECTING):
+            connection.phases[state] = now
+        connection.state = state
+        connection.since = now
+        connection.history.append((state, now))
+        transitions.append((connection, old_state, state))
+
+    def _notify(self, transitions):
+        for connection, old_state, new_state in transitions:
+            for callback in list(self.listeners):
+                try:
+                    callback(connection, old_state, new_state)
+                except Exception as e:
+                    logging.error(f"Connection listener failed on {connection.address}: {e}")
+
+
+# Upper bounds in milliseconds of the D-Bus latency histogram buckets; the last one is open
+DBUS_LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000)
+DBUS_TIMEOUT_ERRORS = ("org.freedesktop.DBus.Error.NoReply", "org.freedesktop.DBus.Error.Timeout",
+                       "org.freedesktop.DBus.Error.TimedOut")
+
+
+class DBusCallStats:
+    """
+    Per-method latency histograms, error counts and timeout counts of D-Bus calls.
+
+    Calls are keyed by 'Interface.Method' and by the adapter (or 'obex') the object
+    belongs to, so slow controllers stand out. Filled by InstrumentedInterface.
+    """
+
+    def __init__(self):
+        """
+        Initialize empty statistics.
+        """
+        self.lock = threading.Lock()
+        # (method, adapter) -> {"count", "errors", "timeouts", "total", "max", "buckets"}
+        self.methods = {}
+
+    def record(self, method, adapter, elapsed, error=None):
+        """
+        Add one completed call.
+
+        Args:
+            method (str): 'Interface.Method', e.g. 'org.bluez.Device1.Pair'.
+            adapter (str): Adapter name like 'hci0', 'obex', or '' for other objects.
+            elapsed (float): Call duration in seconds.
+            error (DBusException): The error the call failed with, if any.
+        returns:
+            None
+        """
+        elapsed_ms = elapsed * 1000
+        bucket = len(DBUS_LATENCY_BUCKETS_MS)
+        for index, bound in enumerate(DBUS_LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                bucket = index
+                break
+        with self.lock:
+            entry = self.methods.get((method, adapter))
+            if entry is None:
+                entry = self.methods[(method, adapter)] = {
+                    "count": 0, "errors": 0, "timeouts": 0, "total": 0.0, "max": 0.0,
+                    "buckets": [0] * (len(DBUS_LATENCY_BUCKETS_MS) + 1),
+                }
+            entry["count"] += 1
+            entry["total"] += elapsed_ms
+            entry["max"] = max(entry["max"], elapsed_ms)
+            entry["buckets"][bucket] += 1
+            if error is not None:
+                entry["errors"] += 1
+                if isinstance(error, dbus.exceptions.DBusException) and error.get_dbus_name() in DBUS_TIMEOUT_ERRORS:
+                    entry["timeouts"] += 1
+
+    def snapshot(self):
+        """
+        Return the statistics collected so far.
+
+        args: None
+        Returns:
+            dict: 'Interface.Method@adapter' -> dict with count, errors, timeouts, mean_ms,
+            max_ms, p50_ms and p99_ms (upper bucket bounds) and histogram
+            ({'<=N ms' or '>N ms': count}).
+        """
+        with self.lock:
+            methods = {key: dict(entry, buckets=list(entry["buckets"])) for key, entry in self.methods.items()}
+        stats = {}
+        for (method, adapter), entry in sorted(methods.items()):
+            labels = [f"<={bound}ms" for bound in DBUS_LATENCY_BUCKETS_MS] + [f">{DBUS_LATENCY_BUCKETS_MS[-1]}ms"]
+            stats[f"{method}@{adapter}" if adapter else method] = {
+                "count": entry["count"],
+                "errors": entry["errors"],
+                "timeouts": entry["timeouts"],
+                "mean_ms": entry["total"] / entry["count"],
+                "max_ms": entry["max"],
+                "p50_ms": self._percentile(entry, 0.50),
+                "p99_ms": self._percentile(entry, 0.99),
+                "histogram": {label: count for label, count in zip(labels, entry["buckets"]) if count},
+            }
+        return stats
+
+    def reset(self):
+        """
+        Drop all collected statistics.
+
+        args: None
+        returns: None
+        """
+        with self.lock:
+            self.methods = {}
+
+    def format_report(self):
+        """
+        Returns:
+            str: One line per method, slowest total time first.
+        """
+        stats = self.snapshot()
+        lines = [f"{'METHOD':<60} {'COUNT':>7} {'ERR':>5} {'TMO':>5} {'MEAN':>9} {'P50':>8} {'P99':>8} {'MAX':>9}"]
+        for name, entry in sorted(stats.items(), key=lambda item: -item[1]["mean_ms"] * item[1]["count"]):
+            lines.append(f"{name:<60} {entry['count']:>7} {entry['errors']:>5} {entry['timeouts']:>5} "
+                         f"{entry['mean_ms']:>9.2f} {entry['p50_ms']:>8} {entry['p99_ms']:>8} {entry['max_ms']:>9.2f}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _percentile(entry, fraction):
+        target = entry["count"] * fraction
+        seen = 0
+        for index, count in enumerate(entry["buckets"]):
+            seen += count
+            if seen >= target and count:
+                return DBUS_LATENCY_BUCKETS_MS[index] if index < len(DBUS_LATENCY_BUCKETS_MS) else float("inf")
+        return 0
+
+
+dbus_call_stats = DBusCallStats()
+
+# Callables told about every instrumented call once it completes, as
+# observer(method, path, args, reply, error, started, elapsed) where reply is the tuple of
+# out arguments (None on error). Used by Backend_lib.Linux.dbus_recorder.
+dbus_call_observers = []
+
+
+def _notify_call_observers(method, path, args, reply, error, started, elapsed):
+    for observer in list(dbus_call_observers):
+        try:
+            observer(method, path, args, reply, error, started, elapsed)
+        except Exception as e:
+            logging.error(f"D-Bus call observer failed on {method}: {e}")
+
+
+class InstrumentedInterface:
+    """
+    dbus.Interface wrapper recording the latency of every method call in DBusCallStats.
+
+    Blocking calls are timed around the call; calls made with reply_handler/error_handler
+    are timed until their reply arrives. Anything that is not a D-Bus method (attributes
+    such as object_path) is passed through untouched. Completed calls are also handed to
+    dbus_call_observers, if any are registered.
+    """
+
+    def __init__(self, interface, stats=None):
+        """
+        Args:
+            interface (dbus.Interface): Interface wrapper to instrument.
+            stats (DBusCallStats): Statistics to record into; the module-wide one by default.
+        """
+        self._interface = interface
+        self._stats = stats or dbus_call_stats
+        path = str(interface.object_path)
+        self._path = path
+        self._adapter = path.split("/")[3] if path.startswith("/org/bluez/") else ""
+        self._prefix = interface.dbus_interface
+
+    def __getattr__(self, name):
+        attribute = getattr(self._interface, name)
+        if not name[:1].isupper():
+            return attribute
+        method_name = f"{self._prefix}.{name}"
+        stats = self._stats
+        adapter = self._adapter
+        path = self._path
+
+        def call(*args, **kwargs):
+            started = time.monotonic()
+            reply_handler = kwargs.get("reply_handler")
+            error_handler = kwargs.get("error_handler")
+            if reply_handler and error_handler:
+                def on_reply(*reply):
+                    elapsed = time.monotonic() - started
+                    stats.record(method_name, adapter, elapsed)
+                    if dbus_call_observers:
+                        _notify_call_observers(method_name, path, args, reply, None, started, elapsed)
+                    reply_handler(*reply)
+
+                def on_error(error):
+                    elapsed = time.monotonic() - started
+                    stats.record(method_name, adapter, elapsed, error)
+                    if dbus_call_observers:
+                        _notify_call_observers(method_name, path, args, None, error, started, elapsed)
+                    error_handler(error)
+
+                kwargs["reply_handler"], kwargs["error_handler"] = on_reply, on_error
+                return attribute(*args, **kwargs)
+            try:
+                result = attribute(*args, **kwargs)
+            except dbus.exceptions.DBusException as e:
+                elapsed = time.monotonic() - started
+                stats.record(method_name, adapter, elapsed, e)
+                if dbus_call_observers:
+                    _notify_call_observers(method_name, path, args, None, e, started, elapsed)
+                raise
+            elapsed = time.monotonic() - started
+            stats.record(method_name, adapter, elapsed)
+            if dbus_call_observers:
+                # dbus-python returns a plain tuple only for several out arguments
+                reply = () if result is None else result if type(result) is tuple else (result,)
+                _notify_call_observers(method_name, path, args, reply, None, started, elapsed)
+            return result
+
+        # Later lookups of the same method skip __getattr__
+        setattr(self, name, call)
+        return call
+
+
+class DBusProxyCache:
+    """
+    Bounded LRU cache of D-Bus object proxies and interface wrappers, keyed by object path.
+
+    Proxies are created without introspection, so repeated actions on the same object
+    skip both proxy setup and the Introspect round trip. They follow name owner changes,
+    so they keep working after the service restarts. Entries are evicted when the
+    object disappears from the bus or when the cache grows past max_size.
+    """
+
+    def __init__(self, bus, service="org.bluez", max_size=256):
+        """
+        Initialize the cache.
+
+        Args:
+            bus: D-Bus connection to create proxies on.
+            service (str): Bus name owning the objects.
+            max_size (int): Maximum number of object paths kept.
+        """
+        self.bus = bus
+        self.service = service
+        self.max_size = max_size
+        # path -> (proxy, {interface name: dbus.Interface})
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_object(self, path):
+        """
+        Return a cached proxy for the object path, creating it if needed.
+
+        Args:
+            path (str): D-Bus object path.
+        Returns:
+            dbus.proxies.ProxyObject: Proxy for the object.
+        """
+        return self._get_entry(path)[0]
+
+    def get_interface(self, path, interface):
+        """
+        Return a cached dbus.Interface wrapper for the object path and interface.
+
+        Calls made through it are recorded in dbus_call_stats.
+
+        Args:
+            path (str): D-Bus object path.
+            interface (str): D-Bus interface name.
+        Returns:
+            InstrumentedInterface: Interface wrapper.
+        """
+        proxy, interfaces = self._get_entry(path)
+        wrapper = interfaces.get(interface)
+        if wrapper is None:
+            wrapper = interfaces.setdefault(interface, InstrumentedInterface(dbus.Interface(proxy, interface)))
+        return wrapper
+
+    def evict(self, path):
+        """
+        Drop the cached proxies for an object path and all objects below it.
+
+        Args:
+            path (str): D-Bus object path.
+        returns:
+            None
+        """
+        prefix = path.rstrip("/") + "/"
+        with self._lock:
+            self._entries.pop(path, None)
+            for cached in [cached for cached in self._entries if cached.startswith(prefix)]:
+                del self._entries[cached]
+
+    def clear(self):
+        """
+        Drop every cached proxy.
+
+        args: None
+        returns: None
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def on_object_mirror_change(self, signal_name, path, *args):
+        """
+        Object mirror listener evicting proxies of objects that left the bus.
+        """
+        if signal_name == "InterfacesRemoved":
+            self.evict(path)
+
+    def _get_entry(self, path):
+        path = str(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._entries.move_to_end(path)
+                return entry
+            proxy = self.bus.get_object(self.service, path, introspect=False, follow_name_owner_changes=True)
+            entry = self._entries[path] = (proxy, {})
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return entry
+
+
 class BluetoothDeviceManager:
     """
     A class for managing Bluetooth devices using the BlueZ D-Bus API.
@@ -26,16 +1222,21 @@ class BluetoothDeviceManager:
     streaming audio (A2DP), media control (AVRCP), and removing Bluetooth devices.
     """
 
-    def __init__(self,interface=None,log=None,log_path=None):
+    def __init__(self,interface=None,log=None,log_path=None,bus=None,object_mirror=None,proxy_cache=None):
         """
         Initialize the BluetoothDeviceManager by setting up the system bus and adapter.
+
+        bus, object_mirror and proxy_cache may be passed in to share them between the
+        managers of several adapters (see Backend_lib.Linux.adapter_manager); shared ones
+        are left running by shutdown().
         """
         self.interface = interface
         if self.interface:
-            self.bus = dbus.SystemBus()
+            start_glib_loop()
+            self.bus = bus or dbus.SystemBus()
             self.adapter_path = f'/org/bluez/{self.interface}'
-            self.adapter_proxy = self.bus.get_object('org.bluez', self.adapter_path)
-            self.adapter = dbus.Interface(self.adapter_proxy, 'org.bluez.Adapter1')
+            self.proxy_cache = proxy_cache or DBusProxyCache(self.bus)
+            self.obex_proxy_cache = None
             self.device_address=None
             self.stream_process = None
             self.device_path = None
@@ -43,7 +1244,19 @@ class BluetoothDeviceManager:
             self.device_sink = None
             self.devices = {}
             self.last_session_path = None
+            self.discovery_filter = {}
             self.opp_process = None
+            self.owns_object_mirror = object_mirror is None
+            if self.owns_object_mirror:
+                self.object_mirror = BluezObjectMirror(self.bus)
+                self.object_mirror.add_listener(self.proxy_cache.on_object_mirror_change)
+                self.object_mirror.start()
+            else:
+                self.object_mirror = object_mirror
+            # A shared mirror has one manager per adapter, each tracking its own devices
+            self.connection_tracker = DeviceConnectionTracker(
+                self.object_mirror, None if self.owns_object_mirror else self.interface)
+            self.connection_tracker.start()
 
         self.log=log
         if self.log:
@@ -64,6 +1277,24 @@ class BluetoothDeviceManager:
             self.hcidump_log_name = None
             self.interface = None
 
+        # Opened on the first HCI command, see get_hci_transport()
+        self.hci_transport = None
+
+    @property
+    def adapter_proxy(self):
+        """
+        Proxy of the managed adapter, resolved through the proxy cache on every use.
+        """
+        return self.proxy_cache.get_object(self.adapter_path)
+
+    @property
+    def adapter(self):
+        """
+        Adapter1 interface of the managed adapter, resolved through the proxy cache on every use
+        so it is rebuilt after the cache drops it (e.g. when bluetoothd restarts).
+        """
+        return self.proxy_cache.get_interface(self.adapter_path, 'org.bluez.Adapter1')
+
 #---------CONTROLLER DETAILS----------------------#
     def get_controllers_connected(self):
         """
@@ -136,31 +1367,64 @@ class BluetoothDeviceManager:
         out.reverse()
         return ' '.join(out)
 
+    def get_hci_transport(self):
+        """
+        Returns the HCI transport of the current interface, opening it on first use.
+
+        The raw HCI socket is preferred; hcitool is the fallback when it cannot be opened.
+
+        args: None
+        Returns:
+            HciTransport: Transport commands are sent through.
+        """
+        transport = self.hci_transport
+        if transport is None or getattr(transport, "interface", self.interface) != self.interface:
+            if transport:
+                transport.close()
+            self.hci_transport = open_hci_transport(self.interface, self.log)
+        return self.hci_transport
+
+    def set_hci_transport(self, transport):
+        """
+        Replaces the HCI transport, e.g. with a LoopbackTransport for testing.
+
+        Args:
+            transport (HciTransport): Transport to use from now on.
+        returns:
+            None
+        """
+        if self.hci_transport and self.hci_transport is not transport:
+            self.hci_transport.close()
+        self.hci_transport = transport
+
     def run_hci_cmd(self, ogf, command, parameters=None):
         """
         Executes an HCI command with provided parameters.
 
         Args:
-            ogf (str): Opcode Group Field (e.g., '0x03').
+            ogf (str): Command group as listed in hci_commands (e.g., 'Controller and Baseband').
             command (str): Specific HCI command name.
             parameters (list): List of parameters for the command.
 
         Returns:
-            subprocess.CompletedProcess: Result of command execution.
-        """
-        _ogf = ogf.lower().replace(' ', '_')
-        _ocf_info = getattr(hci, _ogf)[command]
-        hci_command = 'hcitool -i {} cmd {} {}'.format(self.interface, hci.hci_commands[ogf], _ocf_info[0])
-        for index in range(len(parameters)):
-            param_len = list(_ocf_info[1][index].values())[1] if len(
-                _ocf_info[1][index].values()) > 1 else None
-            if param_len:
-                parameter = self.convert_to_little_endian(parameters[index], param_len)
-            else:
-                parameter = parameters[index].replace('0x', '')
-            hci_command = ' '.join([hci_command, parameter])
-        self.log.info(f"Executing command: {hci_command}")
-        return run(self.log, hci_command)
+            CommandComplete or CommandStatus: Decoded reply (see hci_events), or None if the
+            parameters were invalid or the command failed.
+        """
+        try:
+            ogf_value, ocf_value, encoded = encode_command(ogf, command, parameters)
+        except ValueError as e:
+            self.log.error(f"Invalid HCI command parameters: {e}")
+            return None
+        transport = self.get_hci_transport()
+        self.log.info(f"Executing command: {command} (ogf 0x{ogf_value:02x}, ocf 0x{ocf_value:04x}) "
+                      f"{encoded.hex(' ')} via {transport.name}")
+        try:
+            reply = transport.send_command(ogf_value, ocf_value, encoded)
+        except OSError as e:
+            self.log.error(f"HCI command {command} failed: {e}")
+            return None
+        self.log.info(f"Reply: {reply}")
+        return reply
 
     def get_connection_handles(self):
         """
@@ -187,7 +1451,7 @@ class BluetoothDeviceManager:
         return output
 
 #-------------LOGGING------------------------#
-    def _watch_log_file(self, log_file, text_browser: QTextBrowser):
+    def _watch_log_file(self, log_file, text_browser: "QTextBrowser"):
         if not log_file or not os.path.exists(log_file) or not text_browser:
             return
 
@@ -360,64 +1624,265 @@ class BluetoothDeviceManager:
             elif match := re.match('Manufacturer: (.*)', line):
                 details['Manufacturer'] = match[1]
 
-        self.name = details.get('Name')
-        self.bd_address = details.get('BD_ADDR')
-        self.link_policy = details.get('Link policy')
-        self.link_mode = details.get('Link mode')
-        self.hci_version = details.get('HCI Version')
-        self.lmp_version = details.get('LMP Version')
-        self.manufacturer = details.get('Manufacturer')
+        self.name = details.get('Name')
+        self.bd_address = details.get('BD_ADDR')
+        self.link_policy = details.get('Link policy')
+        self.link_mode = details.get('Link mode')
+        self.hci_version = details.get('HCI Version')
+        self.lmp_version = details.get('LMP Version')
+        self.manufacturer = details.get('Manufacturer')
+
+        return details
+
+
+    def start_discovery(self, transport=None, rssi=None, pathloss=None, uuids=None,
+                        duplicate_data=None, pattern=None):
+        """
+        Start scanning for nearby Bluetooth devices.
+
+        When any filter argument is given, Adapter1.SetDiscoveryFilter() is called first so
+        bluetoothd drops non-matching advertisers instead of creating objects and sending
+        RSSI updates for them. Without filter arguments any previously set filter is cleared.
+
+        :param transport: "auto", "bredr" or "le".
+        :param rssi: Minimum RSSI in dBm; devices weaker than this are not reported.
+        :param pathloss: Maximum pathloss in dB. Cannot be combined with rssi.
+        :param uuids: List of service UUIDs; only devices advertising one of them are reported.
+        :param duplicate_data: Whether to report repeated advertisements with unchanged data.
+        :param pattern: Prefix the device address or name must match.
+        """
+        discovery_filter = self.build_discovery_filter(transport, rssi, pathloss, uuids,
+                                                       duplicate_data, pattern)
+        if discovery_filter or self.discovery_filter:
+            self.adapter.SetDiscoveryFilter(discovery_filter)
+        self.discovery_filter = discovery_filter
+        self.adapter.StartDiscovery()
+
+    @staticmethod
+    def build_discovery_filter(transport=None, rssi=None, pathloss=None, uuids=None,
+                               duplicate_data=None, pattern=None):
+        """
+        Build the argument for Adapter1.SetDiscoveryFilter().
+
+        Arguments left as None are omitted so bluetoothd applies its defaults.
+
+        :return: dbus.Dictionary with signature "sv"; empty when no filter is requested.
+        :raises ValueError: If an argument is out of range or rssi and pathloss are both set.
+        """
+        discovery_filter = dbus.Dictionary({}, signature="sv")
+        if transport:
+            if transport not in ("auto", "bredr", "le"):
+                raise ValueError(f"Invalid transport '{transport}', expected auto, bredr or le")
+            discovery_filter["Transport"] = dbus.String(transport)
+        if rssi is not None and pathloss is not None:
+            raise ValueError("RSSI and Pathloss filters cannot be used together")
+        if rssi is not None:
+            if not -127 <= int(rssi) <= 20:
+                raise ValueError(f"RSSI threshold {rssi} out of range (-127..20 dBm)")
+            discovery_filter["RSSI"] = dbus.Int16(int(rssi))
+        if pathloss is not None:
+            if not 0 <= int(pathloss) <= 137:
+                raise ValueError(f"Pathloss {pathloss} out of range (0..137 dB)")
+            discovery_filter["Pathloss"] = dbus.UInt16(int(pathloss))
+        if uuids:
+            discovery_filter["UUIDs"] = dbus.Array([str(uuid) for uuid in uuids], signature="s")
+        if duplicate_data is not None:
+            discovery_filter["DuplicateData"] = dbus.Boolean(duplicate_data)
+        if pattern:
+            discovery_filter["Pattern"] = dbus.String(pattern)
+        return discovery_filter
+
+    def stop_discovery(self):
+        """
+        Stop Bluetooth device discovery.
+        """
+        self.adapter.StopDiscovery()
+
+    def power_on_adapter(self):
+        """
+        Power on the local Bluetooth adapter.
+        """
+        adapter = self._get_interface(self.adapter_path, "org.freedesktop.DBus.Properties")
+        adapter.Set("org.bluez.Adapter1", "Powered", dbus.Boolean(True, variant_level=1))
+
+    def inquiry(self, timeout, **discovery_filter):
+        """
+        Scan for nearby Bluetooth devices for a specified duration.
+
+        :param timeout: Duration in seconds to scan for devices.
+        :param discovery_filter: Optional filter keywords, see start_discovery().
+        :return: List of discovered devices in the format "Alias (Address)".
+        """
+        self.start_discovery(**discovery_filter)
+        time.sleep(timeout)
+        self.stop_discovery()
+
+        discovered = []
+        for path, interfaces in self.get_managed_objects().items():
+            if "org.bluez.Device1" in interfaces:
+                props = interfaces["org.bluez.Device1"]
+                address = props.get("Address")
+                if address:
+                    discovered.append(f"{props.get('Alias', address)} ({address})")
+        return discovered
+
+    def inquiry_stream(self, timeout, stop_event=None, **discovery_filter):
+        """
+        Scan for nearby devices and yield each one as soon as BlueZ reports it.
+
+        A device is yielded when its Device1 object appears (InterfacesAdded) and again
+        whenever its RSSI or Alias changes, so the first result arrives within
+        milliseconds instead of after the whole inquiry window.
+
+        :param timeout: Duration in seconds to scan for devices.
+        :param stop_event: Optional threading.Event ending the scan early.
+        :param discovery_filter: Optional filter keywords, see start_discovery().
+        :return: Generator of dicts with 'path', 'Address', 'Alias' and 'RSSI' keys.
+        """
+        events = queue.Queue()
+        device_prefix = f"{self.adapter_path}/dev_"
+
+        def on_change(signal_name, path, *args):
+            if not path.startswith(device_prefix):
+                return
+            if signal_name == "InterfacesAdded" and "org.bluez.Device1" in args[0]:
+                events.put(path)
+            elif signal_name == "PropertiesChanged" and args[0] == "org.bluez.Device1" \
+                    and ("RSSI" in args[1] or "Alias" in args[1]):
+                events.put(path)
+
+        self.object_mirror.add_listener(on_change)
+        try:
+            self.start_discovery(**discovery_filter)
+            deadline = time.monotonic() + timeout
+            while not (stop_event and stop_event.is_set()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                path = self._next_event(events, min(remaining, 0.1))
+                if path is None:
+                    continue
+                props = self.object_mirror.get_properties(path, "org.bluez.Device1")
+                address = props.get("Address")
+                if address:
+                    yield {
+                        "path": path,
+                        "Address": str(address),
+                        "Alias": str(props.get("Alias", address)),
+                        "RSSI": int(props["RSSI"]) if "RSSI" in props else None,
+                    }
+        finally:
+            self.object_mirror.remove_listener(on_change)
+            try:
+                self.stop_discovery()
+            except dbus.exceptions.DBusException as e:
+                print(f"Stop discovery failed: {e}")
+
+    def _next_event(self, events, timeout):
+        """
+        Pop the next item queued by a D-Bus handler, or None after timeout.
+
+        Iterates the default GLib context itself when no loop thread delivers signals.
+        """
+        glib_loop = get_glib_loop()
+        if glib_loop.is_running() and not glib_loop.in_loop_thread():
+            try:
+                return events.get(timeout=timeout)
+            except queue.Empty:
+                return None
+        GLib.MainContext.default().iteration(False)
+        try:
+            return events.get_nowait()
+        except queue.Empty:
+            time.sleep(min(timeout, 0.01))
+            return None
+
+    def get_managed_objects(self):
+        """
+        Return the mirrored BlueZ object tree.
+
+        The mirror is kept current from D-Bus signals, so this does not cost a
+        GetManagedObjects() round trip. The returned dict is a snapshot that is safe
+        to iterate while signals keep arriving; treat the interface and property
+        dicts in it as read-only, they are shared with the mirror.
+
+        args: None
+        returns:
+            dict: Object path -> {interface: {property: value}}.
+        """
+        return self.object_mirror.snapshot()
+
+    def _get_interface(self, path, interface):
+        """
+        Return a cached BlueZ D-Bus interface wrapper for the given object path.
 
-        return details
+        Args:
+            path (str): D-Bus object path under org.bluez.
+            interface (str): D-Bus interface name.
+        Returns:
+            dbus.Interface: Interface wrapper.
+        """
+        return self.proxy_cache.get_interface(path, interface)
 
+    def _get_obex_interface(self, path, interface):
+        """
+        Return a cached obexd D-Bus interface wrapper on the session bus.
 
-    def start_discovery(self):
+        Args:
+            path (str): D-Bus object path under org.bluez.obex.
+            interface (str): D-Bus interface name.
+        Returns:
+            dbus.Interface: Interface wrapper.
         """
-        Start scanning for nearby Bluetooth devices.
+        if self.obex_proxy_cache is None:
+            self.obex_proxy_cache = DBusProxyCache(dbus.SessionBus(), "org.bluez.obex")
+        return self.obex_proxy_cache.get_interface(path, interface)
+
+    def get_dbus_call_stats(self):
         """
-        self.adapter.StartDiscovery()
+        Per-method D-Bus latency statistics of all managers in this process.
 
-    def stop_discovery(self):
+        args: None
+        Returns:
+            dict: See DBusCallStats.snapshot().
         """
-        Stop Bluetooth device discovery.
+        return dbus_call_stats.snapshot()
+
+    def reset_dbus_call_stats(self):
         """
-        self.adapter.StopDiscovery()
+        Clear the D-Bus latency statistics, e.g. before a measurement run.
 
-    def power_on_adapter(self):
+        args: None
+        returns: None
         """
-        Power on the local Bluetooth adapter.
+        dbus_call_stats.reset()
+
+    def log_dbus_call_stats(self):
         """
-        adapter = dbus.Interface(
-            self.bus.get_object("org.bluez", self.adapter_path),
-            "org.freedesktop.DBus.Properties"
-        )
-        adapter.Set("org.bluez.Adapter1", "Powered", dbus.Boolean(True))
+        Write the D-Bus latency statistics to the log as a table.
 
-    def inquiry(self, timeout):
+        args: None
+        returns: None
         """
-        Scan for nearby Bluetooth devices for a specified duration.
+        logging.info("D-Bus call statistics:\n" + dbus_call_stats.format_report())
 
-        :param timeout: Duration in seconds to scan for devices.
-        :return: List of discovered devices in the format "Alias (Address)".
+    def shutdown(self):
         """
-        self.start_discovery()
-        time.sleep(timeout)
-        self.stop_discovery()
+        Release the D-Bus signal subscriptions held by this manager.
 
-        discovered = []
-        om = dbus.Interface(self.bus.get_object("org.bluez", "/"), "org.freedesktop.DBus.ObjectManager")
-        objects = om.GetManagedObjects()
-        for path, interfaces in objects.items():
-            if "org.bluez.Device1" in interfaces:
-                device_props = dbus.Interface(self.bus.get_object("org.bluez", path),
-                                              dbus_interface="org.freedesktop.DBus.Properties")
-                try:
-                    address = device_props.Get("org.bluez.Device1", "Address")
-                    alias = device_props.Get("org.bluez.Device1", "Alias")
-                    discovered.append(f"{alias} ({address})")
-                except:
-                    continue
-        return discovered
+        args: None
+        returns: None
+        """
+        self.stop_device_eviction()
+        if getattr(self, "hci_transport", None):
+            self.hci_transport.close()
+            self.hci_transport = None
+        if getattr(self, "connection_tracker", None):
+            self.connection_tracker.stop()
+        if not getattr(self, "owns_object_mirror", False):
+            return
+        self.object_mirror.stop()
+        self.proxy_cache.clear()
 
     def _get_device_path(self, address):
         """
@@ -431,31 +1896,26 @@ class BluetoothDeviceManager:
 
 
     def find_device_path(self, address, interface):
-        #adapter_path = f"/org/bluez/{interface}"
-        om = dbus.Interface(self.bus.get_object("org.bluez", "/"), "org.freedesktop.DBus.ObjectManager")
-        objects = om.GetManagedObjects()
-        formatted_address = address.replace(":", "_").upper()
-
-        for path, interfaces in objects.items():
-            if f"/{interface}/dev_{formatted_address}" in path:
-                if "org.bluez.Device1" in interfaces:
-                    return path
+        """
+        Look up the Device1 object path for an address on the given controller.
 
-        return None
+        :param address: Bluetooth device MAC address.
+        :param interface: Controller interface like 'hci0'. Defaults to this manager's interface.
+        :return: D-Bus object path, or None if the device is not known.
+        """
+        return self.object_mirror.lookup_device(address, interface or self.interface)
 
     def br_edr_connect(self, address, interface):
         device_path = self.find_device_path(address, interface)
         if device_path:
             try:
-                device = dbus.Interface(self.bus.get_object("org.bluez", device_path),
-                                        dbus_interface="org.bluez.Device1")
+                device = self._get_interface(device_path, "org.bluez.Device1")
+                self.connection_tracker.mark_connecting(device_path)
                 device.Connect()
-
-                props = dbus.Interface(self.bus.get_object("org.bluez", device_path),
-                                       "org.freedesktop.DBus.Properties")
-                connected = props.Get("org.bluez.Device1", "Connected")
-                return connected
+                # Connected is signalled around the Connect() reply; follow it from the tracker
+                return self._wait_for_connection_state(device_path, CONNECTED_STATES, CONNECTED_SIGNAL_TIMEOUT)
             except Exception as e:
+                self.connection_tracker.mark_failed(device_path)
                 print(f"Connection failed: {e}")
         else:
             print("Device path not found for connection")
@@ -465,12 +1925,11 @@ class BluetoothDeviceManager:
         device_path = self.find_device_path(address, interface)
         if device_path:
             try:
-                device = dbus.Interface(self.bus.get_object("org.bluez", device_path), "org.bluez.Device1")
-                props = dbus.Interface(self.bus.get_object("org.bluez", device_path), "org.freedesktop.DBus.Properties")
-                connected = props.Get("org.bluez.Device1", "Connected")
-                if not connected:
+                device = self._get_interface(device_path, "org.bluez.Device1")
+                if self.connection_tracker.get_state(device_path) == CONNECTION_DISCONNECTED:
                     print(f"Device {address} is already disconnected.")
                     return True
+                self.connection_tracker.mark_disconnecting(device_path)
                 device.Disconnect()
                 return True
             except dbus.exceptions.DBusException as e:
@@ -478,25 +1937,15 @@ class BluetoothDeviceManager:
         return False
 
     def remove_device(self, address, interface):
-        adapter_path = f"/org/bluez/{interface}"
-        obj = self.bus.get_object("org.bluez", "/")
-        manager = dbus.Interface(obj, "org.freedesktop.DBus.ObjectManager")
-        objects = manager.GetManagedObjects()
-
-
-        for path, interfaces in objects.items():
-            if "org.bluez.Device1" in interfaces:
-                if interfaces["org.bluez.Device1"].get("Address") == address and path.startswith(adapter_path):
-                    try:
-                        adapter = dbus.Interface(
-                            self.bus.get_object("org.bluez", self.adapter_path),
-                            "org.bluez.Adapter1"
-                        )
-                        adapter.RemoveDevice(path)
-                        return True
-                    except dbus.exceptions.DBusException as e:
-                        print(f"Error removing device {address}: {e}")
-                        return False
+        path = self.object_mirror.lookup_device(address, interface)
+        if path:
+            try:
+                adapter = self._get_interface(path.rsplit("/", 1)[0], "org.bluez.Adapter1")
+                adapter.RemoveDevice(dbus.ObjectPath(path))
+                return True
+            except dbus.exceptions.DBusException as e:
+                print(f"Error removing device {address}: {e}")
+                return False
         print(f"Device with address {address} not found on {interface}")
         return True  # already removed
 
@@ -505,12 +1954,11 @@ class BluetoothDeviceManager:
         device_path = self.find_device_path(address, interface)
         if device_path:
             try:
-                device = dbus.Interface(
-                    self.bus.get_object("org.bluez", device_path),
-                    dbus_interface="org.bluez.Device1"
-                )
-                device.ConnectProfile('0000110e-0000-1000-8000-00805f9b34fb')
+                device = self._get_interface(device_path, "org.bluez.Device1")
+                self.connection_tracker.mark_connecting(device_path)
+                device.ConnectProfile(A2DP_SINK_UUID)
             except Exception as e:
+                self.connection_tracker.mark_failed(device_path)
                 print("LE Connection failed:", e)
 
     def _get_device_interface(self, device_path):
@@ -520,10 +1968,7 @@ class BluetoothDeviceManager:
         :param device_path: D-Bus object path of the device.
         :return: DBus Interface for the device.
         """
-        return dbus.Interface(
-            self.bus.get_object("org.bluez", device_path),
-            "org.bluez.Device1"
-        )
+        return self._get_interface(device_path, "org.bluez.Device1")
 
     def pair(self, address, interface=None):
         """
@@ -536,13 +1981,11 @@ class BluetoothDeviceManager:
         device_path = self.find_device_path(address, interface)
         if device_path:
             try:
-                device = dbus.Interface(self.bus.get_object("org.bluez", device_path),
-                                        dbus_interface="org.bluez.Device1")
+                device = self._get_interface(device_path, "org.bluez.Device1")
                 device.Pair()
 
                 # Wait until pairing is confirmed (optional)
-                props = dbus.Interface(self.bus.get_object("org.bluez", device_path),
-                                       "org.freedesktop.DBus.Properties")
+                props = self._get_interface(device_path, "org.freedesktop.DBus.Properties")
                 paired = props.Get("org.bluez.Device1", "Paired")
                 if paired:
                     print(f"[Bluetooth] Successfully paired with {address} on {interface}")
@@ -558,6 +2001,551 @@ class BluetoothDeviceManager:
             print(f"[Bluetooth] Device path not found for {address} on {interface}")
             return False
 
+#-------------WAIT FOR PROPERTY----------------#
+    def wait_for_property(self, path, interface, name, predicate, timeout=10, bus=None, service="org.bluez"):
+        """
+        Block until a D-Bus property satisfies a predicate, reacting to PropertiesChanged.
+
+        For org.bluez objects on this manager's bus the current value comes from the object
+        mirror and changes from its listeners, so no D-Bus round trip is made. Other services
+        (e.g. obexd on the session bus) are read once with Properties.Get and then followed
+        through a temporary PropertiesChanged subscription on that object.
+
+        Args:
+            path (str): D-Bus object path.
+            interface (str): Interface owning the property, e.g. 'org.bluez.Device1'.
+            name (str): Property name, e.g. 'Connected'.
+            predicate (callable): Function taking the value and returning True when done.
+            timeout (float): Deadline in seconds.
+            bus: D-Bus connection the object lives on. Defaults to this manager's bus.
+            service (str): Bus name owning the object.
+
+        Returns:
+            The property value that satisfied the predicate.
+
+        Raises:
+            TimeoutError: If the predicate is not satisfied before the deadline.
+        """
+        path = str(path)
+        bus = bus or self.bus
+        reached = threading.Event()
+        result = {}
+
+        def check(value):
+            if not reached.is_set() and predicate(value):
+                result["value"] = value
+                reached.set()
+
+        def on_mirror_change(signal_name, changed_path, *args):
+            if signal_name == "PropertiesChanged" and changed_path == path and args[0] == interface \
+                    and name in args[1]:
+                check(args[1][name])
+
+        def on_properties_changed(changed_interface, changed, invalidated):
+            if changed_interface == interface and name in changed:
+                check(changed[name])
+
+        use_mirror = bus is self.bus and service == "org.bluez"
+        if use_mirror:
+            self.object_mirror.add_listener(on_mirror_change)
+        else:
+            match = bus.add_signal_receiver(on_properties_changed,
+                                            signal_name="PropertiesChanged",
+                                            dbus_interface="org.freedesktop.DBus.Properties",
+                                            bus_name=service,
+                                            path=path)
+        try:
+            if use_mirror:
+                props = self.object_mirror.get_properties(path, interface)
+                if name in props:
+                    check(props[name])
+            else:
+                try:
+                    props = InstrumentedInterface(dbus.Interface(bus.get_object(service, path, introspect=False),
+                                                                 "org.freedesktop.DBus.Properties"))
+                    check(props.Get(interface, name))
+                except dbus.exceptions.DBusException:
+                    pass  # not readable yet; wait for PropertiesChanged
+            self._wait_for_event(reached, timeout)
+        finally:
+            if use_mirror:
+                self.object_mirror.remove_listener(on_mirror_change)
+            else:
+                match.remove()
+
+        if not reached.is_set():
+            raise TimeoutError(f"Timeout waiting for {interface}.{name} on {path}")
+        return result["value"]
+
+    def _wait_for_event(self, event, timeout):
+        """
+        Wait for an event set from a D-Bus handler.
+
+        If the shared GLib loop thread is delivering signals, just block on the event;
+        otherwise (no loop thread, or called from inside it) iterate the default GLib
+        context here until the event is set or the deadline passes.
+        """
+        glib_loop = get_glib_loop()
+        if glib_loop.is_running() and not glib_loop.in_loop_thread():
+            event.wait(timeout)
+            return
+        context = GLib.MainContext.default()
+        deadline = time.monotonic() + timeout
+        while not event.is_set() and time.monotonic() < deadline:
+            if not context.iteration(False):
+                time.sleep(0.01)
+
+#-------------CONNECTION STATE----------------#
+    def get_connection_state(self, address, interface=None):
+        """
+        Connection state of a device from the connection tracker, without a D-Bus call.
+
+        Args:
+            address (str): Bluetooth MAC address.
+            interface (str): Controller interface like 'hci0'; this manager's by default.
+        Returns:
+            dict: See DeviceConnection.as_dict(); None if the device is unknown.
+        """
+        device_path = self.find_device_path(address, interface)
+        connection = self.connection_tracker.get(device_path) if device_path else None
+        if connection is None:
+            return None
+        with self.connection_tracker.condition:
+            return connection.as_dict()
+
+    def get_connection_states(self):
+        """
+        Connection state of every tracked device.
+
+        args: None
+        Returns:
+            dict: Device1 path -> DeviceConnection.as_dict().
+        """
+        return self.connection_tracker.snapshot()
+
+    def wait_for_connection_state(self, address, states, interface=None, timeout=30):
+        """
+        Block until a device reaches one of the given connection states.
+
+        Args:
+            address (str): Bluetooth MAC address.
+            states (iterable): CONNECTION_* states to wait for, e.g. (CONNECTION_PROFILE_CONNECTED,).
+            interface (str): Controller interface like 'hci0'; this manager's by default.
+            timeout (float): Seconds to wait.
+        Returns:
+            bool: True if a state was reached in time, False on timeout or unknown device.
+        """
+        device_path = self.find_device_path(address, interface)
+        if not device_path:
+            return False
+        return self._wait_for_connection_state(device_path, states, timeout)
+
+    def _wait_for_connection_state(self, device_path, states, timeout):
+        """
+        Wait for a tracked device to reach one of the given states.
+
+        Goes through _wait_for_event(), so without a GLib loop thread (or from inside it)
+        the default context is iterated here and the mirror events still arrive.
+        """
+        states = frozenset(states)
+        reached = threading.Event()
+
+        def on_transition(connection, old_state, new_state):
+            if connection.path == device_path and new_state in states:
+                reached.set()
+
+        self.connection_tracker.add_listener(on_transition)
+        try:
+            if self.connection_tracker.get_state(device_path) in states:
+                return True
+            self._wait_for_event(reached, timeout)
+        finally:
+            self.connection_tracker.remove_listener(on_transition)
+        return reached.is_set()
+
+#-------------ASYNC PAIR/CONNECT/DISCONNECT----------------#
+    def _call_async(self, method, *args, timeout=DEFAULT_DBUS_TIMEOUT, result=True, on_cancel=None):
+        """
+        Start a D-Bus method call without blocking and return a Future for its reply.
+
+        The reply is delivered by the GLib loop thread. Cancelling the returned Future
+        before the reply arrives runs on_cancel (e.g. CancelPairing) and drops the reply.
+
+        Args:
+            method: Bound dbus.Interface method, e.g. device.Pair.
+            *args: Method arguments.
+            timeout (float): Reply timeout in seconds.
+            result: Value the Future resolves to when the call succeeds.
+            on_cancel (callable): Optional cleanup run when the Future is cancelled.
+
+        Returns:
+            concurrent.futures.Future: Resolves to result, or raises the DBusException.
+        """
+        future = Future()
+
+        def reply_handler(*reply):
+            try:
+                future.set_result(result)
+            except InvalidStateError:
+                pass  # cancelled while the call was in flight
+
+        def error_handler(error):
+            try:
+                future.set_exception(error)
+            except InvalidStateError:
+                pass
+
+        def done_callback(done):
+            if done.cancelled() and on_cancel:
+                try:
+                    on_cancel()
+                except dbus.exceptions.DBusException as e:
+                    print(f"[Bluetooth] Cancel cleanup failed: {e}")
+
+        future.add_done_callback(done_callback)
+        method(*args, reply_handler=reply_handler, error_handler=error_handler, timeout=timeout)
+        return future
+
+    def _failed_future(self, error):
+        future = Future()
+        future.set_exception(error)
+        return future
+
+    def _device_for_async(self, address, interface):
+        device_path = self.find_device_path(address, interface)
+        if not device_path:
+            return None, self._failed_future(
+                LookupError(f"Device path not found for {address} on {interface or self.interface}"))
+        return device_path, None
+
+    def pair_async(self, address, interface=None, timeout=60):
+        """
+        Start pairing without blocking the caller.
+
+        Cancelling the returned Future calls Device1.CancelPairing().
+
+        :param address: Bluetooth MAC address.
+        :param interface: e.g., 'hci0', 'hci1'
+        :param timeout: Seconds to wait for the Pair() reply.
+        :return: concurrent.futures.Future resolving to True when paired.
+        """
+        device_path, failed = self._device_for_async(address, interface)
+        if failed:
+            return failed
+        device = self._get_interface(device_path, "org.bluez.Device1")
+        return self._call_async(device.Pair, timeout=timeout, on_cancel=device.CancelPairing)
+
+    def br_edr_connect_async(self, address, interface=None, timeout=DEFAULT_DBUS_TIMEOUT):
+        """
+        Start a Device1.Connect() without blocking the caller.
+
+        Cancelling the returned Future disconnects the device again.
+
+        :param address: Bluetooth MAC address.
+        :param interface: e.g., 'hci0', 'hci1'
+        :param timeout: Seconds to wait for the Connect() reply.
+        :return: concurrent.futures.Future resolving to True when connected.
+        """
+        device_path, failed = self._device_for_async(address, interface)
+        if failed:
+            return failed
+        device = self._get_interface(device_path, "org.bluez.Device1")
+        self.connection_tracker.mark_connecting(device_path)
+        return self._track_connect(device_path, self._call_async(device.Connect, timeout=timeout,
+                                                                 on_cancel=device.Disconnect))
+
+    def le_connect_async(self, address, interface=None, timeout=DEFAULT_DBUS_TIMEOUT):
+        """
+        Start a Device1.ConnectProfile() for A2DP sink without blocking the caller.
+
+        Cancelling the returned Future disconnects the profile again.
+
+        :param address: Bluetooth MAC address.
+        :param interface: e.g., 'hci0', 'hci1'
+        :param timeout: Seconds to wait for the ConnectProfile() reply.
+        :return: concurrent.futures.Future resolving to True when connected.
+        """
+        device_path, failed = self._device_for_async(address, interface)
+        if failed:
+            return failed
+        device = self._get_interface(device_path, "org.bluez.Device1")
+        self.connection_tracker.mark_connecting(device_path)
+        return self._track_connect(device_path, self._call_async(
+            device.ConnectProfile, A2DP_SINK_UUID, timeout=timeout,
+            on_cancel=lambda: device.DisconnectProfile(A2DP_SINK_UUID)))
+
+    def disconnect_le_device_async(self, address, interface=None, timeout=DEFAULT_DBUS_TIMEOUT):
+        """
+        Start a Device1.Disconnect() without blocking the caller.
+
+        :param address: Bluetooth MAC address.
+        :param interface: e.g., 'hci0', 'hci1'
+        :param timeout: Seconds to wait for the Disconnect() reply.
+        :return: concurrent.futures.Future resolving to True when disconnected.
+        """
+        device_path, failed = self._device_for_async(address, interface)
+        if failed:
+            return failed
+        if not self.object_mirror.get_properties(device_path, "org.bluez.Device1").get("Connected", False):
+            future = Future()
+            future.set_result(True)
+            return future
+        device = self._get_interface(device_path, "org.bluez.Device1")
+        self.connection_tracker.mark_disconnecting(device_path)
+        return self._call_async(device.Disconnect, timeout=timeout)
+
+    def _track_connect(self, device_path, future):
+        # A failed or cancelled attempt leaves the connecting state again
+        def done_callback(done):
+            if done.cancelled() or done.exception() is not None:
+                self.connection_tracker.mark_failed(device_path)
+
+        future.add_done_callback(done_callback)
+        return future
+
+    def remove_device_async(self, address, interface=None, timeout=DEFAULT_DBUS_TIMEOUT):
+        """
+        Start an Adapter1.RemoveDevice() on the device's own adapter without blocking the caller.
+
+        :param address: Bluetooth MAC address.
+        :param interface: e.g., 'hci0', 'hci1'
+        :param timeout: Seconds to wait for the RemoveDevice() reply.
+        :return: concurrent.futures.Future resolving to True when removed.
+        """
+        device_path, failed = self._device_for_async(address, interface)
+        if failed:
+            return failed
+        adapter = self._get_interface(device_path.rsplit("/", 1)[0], "org.bluez.Adapter1")
+        return self._call_async(adapter.RemoveDevice, dbus.ObjectPath(device_path), timeout=timeout)
+
+    def _evict_device_async(self, address, interface=None, timeout=DEFAULT_DBUS_TIMEOUT):
+        """
+        remove_device_async() unless the mirror shows the device paired, bonded, trusted or
+        connected at the moment of the call, e.g. because it was paired during an eviction sweep.
+
+        :return: concurrent.futures.Future resolving to True when removed.
+        """
+        device_path, failed = self._device_for_async(address, interface)
+        if failed:
+            return failed
+        if self._is_eviction_protected(device_path):
+            return self._failed_future(RuntimeError(f"{address} is paired or connected now; kept"))
+        return self.remove_device_async(address, interface, timeout=timeout)
+
+    def _is_eviction_protected(self, device_path):
+        props = self.object_mirror.get_properties(device_path, "org.bluez.Device1")
+        return bool(props) and bool(DeviceRecord.from_properties(props, device_path).flags & self.EVICTION_PROTECTED)
+
+#-------------BATCH PAIR/CONNECT----------------#
+    BATCH_ACTIONS = {
+        "pair": "pair_async",
+        "connect": "br_edr_connect_async",
+        "le_connect": "le_connect_async",
+        "disconnect": "disconnect_le_device_async",
+        "remove": "remove_device_async",
+        "evict": "_evict_device_async",
+    }
+
+    def run_batch(self, devices, action, concurrency=4, timeout=None, on_result=None):
+        """
+        Run one action on many devices with a bounded number of calls in flight per adapter.
+
+        Calls are issued with the *_async methods, so up to `concurrency` devices per
+        adapter are in progress at once. Pairing is limited to one outstanding Pair() per
+        adapter, since bluetoothd rejects a second one with org.bluez.Error.InProgress.
+
+        Args:
+            devices (list): Addresses, or (address, interface) tuples for devices on other adapters.
+            action (str): One of 'pair', 'connect', 'le_connect', 'disconnect', 'remove', or
+                          'evict' (remove unless paired or connected when the call starts).
+            concurrency (int): Maximum calls in flight per adapter.
+            timeout (float): Per-device D-Bus reply timeout; the method's default when None.
+            on_result (callable): Optional callback receiving each result dict as it completes.
+                                  Runs on the calling thread.
+
+        Returns:
+            list: One dict per device, in input order, with keys 'address', 'interface',
+            'action', 'status' ('success' or 'failed'), 'error' and 'elapsed' (seconds).
+
+        Raises:
+            ValueError: If action is unknown or concurrency is below 1.
+        """
+        if action not in self.BATCH_ACTIONS:
+            raise ValueError(f"Unknown batch action '{action}', expected one of {sorted(self.BATCH_ACTIONS)}")
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        start_call = getattr(self, self.BATCH_ACTIONS[action])
+        limit = 1 if action == "pair" else concurrency
+
+        results = []
+        pending = {}
+        for index, device in enumerate(devices):
+            address, interface = device if isinstance(device, tuple) else (device, self.interface)
+            results.append({"address": address, "interface": interface, "action": action,
+                            "status": None, "error": None, "elapsed": None})
+            pending.setdefault(interface, []).append(index)
+        for queue_of_adapter in pending.values():
+            queue_of_adapter.reverse()
+
+        completed = queue.Queue()
+        in_flight = {interface: 0 for interface in pending}
+        started_at = {}
+        remaining = len(results)
+
+        while remaining:
+            for interface, waiting in pending.items():
+                while waiting and in_flight[interface] < limit:
+                    index = waiting.pop()
+                    started_at[index] = time.monotonic()
+                    in_flight[interface] += 1
+                    kwargs = {"timeout": timeout} if timeout is not None else {}
+                    try:
+                        future = start_call(results[index]["address"], interface, **kwargs)
+                    except Exception as e:
+                        # e.g. DBusException, or ValueError for an unknown address; the
+                        # failure belongs to this device, not to the whole batch
+                        future = self._failed_future(e)
+                    future.add_done_callback(lambda done, index=index: completed.put((index, done)))
+
+            item = self._next_event(completed, 0.1)
+            if item is None:
+                continue
+            index, done = item
+            result = results[index]
+            in_flight[result["interface"]] -= 1
+            remaining -= 1
+            result["elapsed"] = time.monotonic() - started_at[index]
+            error = done.exception() if not done.cancelled() else "cancelled"
+            result["status"] = "failed" if error else "success"
+            result["error"] = str(error) if error else None
+            if on_result:
+                on_result(result)
+
+        return results
+
+#-------------STALE DEVICE EVICTION----------------#
+    # Devices with any of these flags are never evicted
+    EVICTION_PROTECTED = DeviceRecord.PAIRED | DeviceRecord.BONDED | DeviceRecord.TRUSTED | DeviceRecord.CONNECTED
+
+    def evict_stale_devices(self, ttl=300, max_devices=None, interface=None, concurrency=8, dry_run=False):
+        """
+        Remove cached devices that were not seen recently, keeping the BlueZ tree small.
+
+        Only devices that are neither paired, bonded, trusted nor connected are candidates.
+        A candidate is evicted when no signal about it arrived within ttl seconds; if
+        max_devices is set and the adapter still holds more devices than that, the
+        least recently seen candidates are evicted as well. Devices the mirror has no
+        sighting for yet count as seen now. Removal uses batched Adapter1.RemoveDevice
+        calls through run_batch(), and each device is checked again right before its
+        call, so one paired or connected during the sweep is kept.
+
+        Args:
+            ttl (float): Seconds since the last sighting after which a device is stale.
+            max_devices (int): Optional cap on devices kept on the adapter.
+            interface (str): Controller interface like 'hci0'; defaults to this manager's.
+            concurrency (int): RemoveDevice calls in flight at once.
+            dry_run (bool): Only report what would be removed.
+
+        Returns:
+            dict: Report with 'objects_before'/'objects_after' (whole tree),
+            'devices_before'/'devices_after' (this adapter), 'evicted_stale', 'evicted_lru',
+            'removed', 'kept' (paired or connected during the sweep) and 'failed' address
+            lists and 'elapsed' seconds.
+        """
+        started = time.monotonic()
+        interface = interface or self.interface
+        device_prefix = f"/org/bluez/{interface}/dev_"
+
+        objects = self.get_managed_objects()
+        with self.object_mirror.lock:
+            last_seen = dict(self.object_mirror.device_last_seen)
+        now = time.monotonic()
+        devices = []
+        candidates = []
+        for path, interfaces in objects.items():
+            props = interfaces.get("org.bluez.Device1")
+            if not props or not path.startswith(device_prefix) or not props.get("Address"):
+                continue
+            devices.append(path)
+            if not DeviceRecord.from_properties(props, path).flags & self.EVICTION_PROTECTED:
+                candidates.append((last_seen.get(path, now), str(props["Address"])))
+
+        candidates.sort()
+        stale = [address for seen, address in candidates if now - seen > ttl]
+        lru = []
+        if max_devices is not None:
+            excess = len(devices) - len(stale) - max_devices
+            if excess > 0:
+                lru = [address for seen, address in candidates if now - seen <= ttl][:excess]
+
+        report = {
+            "interface": interface,
+            "objects_before": len(objects),
+            "devices_before": len(devices),
+            "evicted_stale": len(stale),
+            "evicted_lru": len(lru),
+            "removed": [],
+            "kept": [],
+            "failed": [],
+        }
+        to_remove = stale + lru
+        if dry_run:
+            report["removed"] = to_remove
+        elif to_remove:
+            for result in self.run_batch([(address, interface) for address in to_remove], "evict",
+                                         concurrency=concurrency):
+                if result["status"] == "success":
+                    report["removed"].append(result["address"])
+                elif self._is_eviction_protected(self.find_device_path(result["address"], interface)):
+                    report["kept"].append(result["address"])
+                else:
+                    report["failed"].append(result["address"])
+                    logging.warning(f"Evicting {result['address']} failed: {result['error']}")
+
+        objects = self.get_managed_objects()
+        report["objects_after"] = len(objects)
+        report["devices_after"] = sum(1 for path, interfaces in objects.items()
+                                      if path.startswith(device_prefix) and "org.bluez.Device1" in interfaces)
+        report["elapsed"] = time.monotonic() - started
+        logging.info(f"Device eviction on {interface}: {report['objects_before']} -> {report['objects_after']} objects, "
+                     f"{len(report['removed'])} {'to remove' if dry_run else 'removed'}, {len(report['failed'])} failed")
+        return report
+
+    def start_device_eviction(self, interval=60, **policy):
+        """
+        Run evict_stale_devices() every interval seconds in a background thread.
+
+        Args:
+            interval (float): Seconds between eviction passes.
+            **policy: Keyword arguments for evict_stale_devices() (ttl, max_devices, ...).
+        returns:
+            None
+        """
+        self.stop_device_eviction()
+        stop_event = threading.Event()
+
+        def run():
+            while not stop_event.wait(interval):
+                try:
+                    self.evict_stale_devices(**policy)
+                except dbus.exceptions.DBusException as e:
+                    logging.error(f"Device eviction failed: {e}")
+
+        self.eviction_stop_event = stop_event
+        threading.Thread(target=run, name=f"bluez-eviction-{self.interface}", daemon=True).start()
+
+    def stop_device_eviction(self):
+        """
+        Stop the background eviction started by start_device_eviction().
+
+        args: None
+        returns: None
+        """
+        stop_event = getattr(self, "eviction_stop_event", None)
+        if stop_event:
+            stop_event.set()
+            self.eviction_stop_event = None
+
     def set_discoverable_on(self):
         """
         Makes the Bluetooth device discoverable.
@@ -595,15 +2583,7 @@ class BluetoothDeviceManager:
         device_path = self.find_device_path(device_address,interface=self.interface)
         if not device_path:
             return False
-
-        props = dbus.Interface(
-            self.bus.get_object("org.bluez", device_path),
-            "org.freedesktop.DBus.Properties"
-        )
-        try:
-            return props.Get("org.bluez.Device1", "Paired")
-        except dbus.exceptions.DBusException:
-            return False
+        return bool(self.object_mirror.get_properties(device_path, "org.bluez.Device1").get("Paired", False))
 
     def is_device_connected(self, device_address):
         """
@@ -619,75 +2599,86 @@ class BluetoothDeviceManager:
         if not device_path:
             print(f"[DEBUG] Device path not found for {device_address} on {self.interface}")
             return False
-
-        try:
-            props = dbus.Interface(
-                self.bus.get_object("org.bluez", device_path),
-                "org.freedesktop.DBus.Properties"
-            )
-            connected = props.Get("org.bluez.Device1", "Connected")
-
-            # Extra validation: make sure device is under the correct adapter/interface
-            if self.interface not in device_path:
-                print(f"[DEBUG] Device path {device_path} does not match interface {self.interface}")
-                return False
-
-            return connected
-
-        except dbus.exceptions.DBusException as e:
-            print(f"[DEBUG] DBusException while checking connection: {e}")
-            return False
+        return self.connection_tracker.get_state(device_path) in CONNECTED_STATES
     def refresh_device_list(self):
         """
         Updates the internal device list with currently available devices.
 
+        self.devices maps DeviceRecord.key (adapter index and address) to the record.
+
         args: None
         returns: None
         """
         self.devices.clear()
-        om = dbus.Interface(self.bus.get_object("org.bluez", "/"), "org.freedesktop.DBus.ObjectManager")
-        objects = om.GetManagedObjects()
+        objects = self.get_managed_objects()
         for path, interfaces in objects.items():
             if "org.bluez.Device1" in interfaces:
                 props = interfaces["org.bluez.Device1"]
-                address = props.get("Address")
-                name = props.get("Name", "Unknown")
-                uuids = props.get("UUIDs", [])
-                connected = props.get("Connected", False)
-                if address:
-                    self.devices[address] = {
-                        "Name": name,
-                        "UUIDs": uuids,
-                        "Connected": connected,
-                    }
+                if props.get("Address"):
+                    record = DeviceRecord.from_properties(props, path)
+                    self.devices[record.key] = record
+
+    def get_device_snapshot(self):
+        """
+        Classify every known device in a single pass over the mirrored object tree.
+
+        All views come from the same snapshot, so callers needing several of them (e.g.
+        paired and connected, or A2DP sink and source) see one consistent state.
+
+        Views per adapter (each a dict of address -> name):
+            paired, connected: Devices with Paired / Connected set.
+            a2dp_sink, a2dp_source: Connected devices offering the A2DP Sink / Source role.
+            avrcp: Connected devices offering an AVRCP target or controller.
+            opp: Connected devices offering Object Push.
+
+        args: None
+        Returns:
+            dict: Adapter name (e.g. 'hci0') -> {view name -> {address: name}}.
+        """
+        snapshot = {}
+        for path, interfaces in self.get_managed_objects().items():
+            props = interfaces.get("org.bluez.Device1")
+            if not props or not props.get("Address"):
+                continue
+            adapter = str(props.get("Adapter") or path.rsplit("/", 1)[0]).rsplit("/", 1)[-1]
+            if adapter not in snapshot:
+                snapshot[adapter] = {view: {} for view in DEVICE_SNAPSHOT_VIEWS}
+            views = snapshot[adapter]
+            record = DeviceRecord.from_properties(props, path)
+            address = str(props["Address"])
+            name = record.name or "Unknown"
+            if record.paired:
+                views["paired"][address] = name
+            if not record.connected:
+                continue
+            views["connected"][address] = name
+            if record.is_a2dp_sink:
+                views["a2dp_sink"][address] = name
+            if record.is_a2dp_source:
+                views["a2dp_source"][address] = name
+            if record.is_avrcp:
+                views["avrcp"][address] = name
+            if record.is_opp:
+                views["opp"][address] = name
+        return snapshot
+
+    def get_adapter_device_snapshot(self, interface=None):
+        """
+        Device views of a single adapter, see get_device_snapshot().
+
+        Args:
+            interface (str): Controller interface like 'hci0'; defaults to this manager's.
+        Returns:
+            dict: View name -> {address: name}; empty views if the adapter has no devices.
+        """
+        views = self.get_device_snapshot().get(interface or self.interface)
+        return views or {view: {} for view in DEVICE_SNAPSHOT_VIEWS}
 
     def get_paired_devices(self, interface=None):
-        paired = {}
-        adapter_path = f"/org/bluez/{interface}"
-        om = dbus.Interface(self.bus.get_object("org.bluez", "/"), "org.freedesktop.DBus.ObjectManager")
-        objects = om.GetManagedObjects()
-        for path, interfaces in objects.items():
-            if "org.bluez.Device1" in interfaces:
-                props = interfaces["org.bluez.Device1"]
-                if props.get("Paired", False) and props.get("Adapter") == adapter_path:
-                    address = props.get("Address")
-                    name = props.get("Name", "Unknown")
-                    paired[address] = name
-        return paired
+        return self.get_adapter_device_snapshot(interface)["paired"]
 
     def get_connected_devices(self, interface=None):
-        connected = {}
-        adapter_path = f"/org/bluez/{interface}"
-        om = dbus.Interface(self.bus.get_object("org.bluez", "/"), "org.freedesktop.DBus.ObjectManager")
-        objects = om.GetManagedObjects()
-        for path, interfaces in objects.items():
-            if "org.bluez.Device1" in interfaces:
-                props = interfaces["org.bluez.Device1"]
-                if props.get("Connected", False) and props.get("Adapter") == adapter_path:
-                    address = props.get("Address")
-                    name = props.get("Name", "Unknown")
-                    connected[address] = name
-        return connected
+        return self.get_adapter_device_snapshot(interface)["connected"]
 
 
 #--------------------OPP FUNCTIONS---------------------#
@@ -708,48 +2699,44 @@ class BluetoothDeviceManager:
             return "error", msg
 
         try:
-            session_bus = dbus.SessionBus()
-            obex_service = "org.bluez.obex"
-            manager_obj = session_bus.get_object(obex_service, "/org/bluez/obex")
-            manager = dbus.Interface(manager_obj, "org.bluez.obex.Client1")
+            manager = self._get_obex_interface("/org/bluez/obex", "org.bluez.obex.Client1")
 
             # Clean up old session if it exists
             if self.last_session_path:
                 try:
-                    manager.RemoveSession(self.last_session_path)
+                    manager.RemoveSession(dbus.ObjectPath(self.last_session_path))
+                    self.obex_proxy_cache.evict(self.last_session_path)
                     print(f"Removed previous session: {self.last_session_path}")
-                    time.sleep(1.0)
                 except Exception as e:
                     print(f"Previous session cleanup failed: {e}")
 
             # Create a new OBEX session
-            session_path = manager.CreateSession(device_address, {"Target": dbus.String("opp")})
+            session_path = manager.CreateSession(device_address,
+                                                 dbus.Dictionary({"Target": dbus.String("opp")}, signature="sv"))
             session_path = str(session_path)
             self.last_session_path = session_path
             print(f"Created OBEX session: {session_path}")
 
             # Push the file
-            opp_obj = session_bus.get_object(obex_service, session_path)
-            opp = dbus.Interface(opp_obj, "org.bluez.obex.ObjectPush1")
-            transfer_path = opp.SendFile(file_path)
+            opp = self._get_obex_interface(session_path, "org.bluez.obex.ObjectPush1")
+            transfer_path, transfer_props = opp.SendFile(file_path)
             transfer_path = str(transfer_path)
             print(f"Transfer started: {transfer_path}")
 
-            # Monitor transfer status
-            transfer_obj = session_bus.get_object(obex_service, transfer_path)
-            transfer_props = dbus.Interface(transfer_obj, "org.freedesktop.DBus.Properties")
-
-            status = "unknown"
-            for _ in range(40):
-                status = str(transfer_props.Get("org.bluez.obex.Transfer1", "Status"))
-                print(f"Transfer status: {status}")
-                if status in ["complete", "error"]:
-                    break
-                time.sleep(0.5)
+            # Wait for the transfer to finish, reacting to Transfer1.Status changes
+            status = str(transfer_props.get("Status", "unknown"))
+            try:
+                status = str(self.wait_for_property(transfer_path, "org.bluez.obex.Transfer1", "Status",
+                                                    lambda value: value in ("complete", "error"), timeout=20,
+                                                    bus=self.obex_proxy_cache.bus, service="org.bluez.obex"))
+            except TimeoutError:
+                print(f"Transfer did not finish in time, last status: {status}")
+            print(f"Transfer status: {status}")
 
             # Always remove session
             try:
-                manager.RemoveSession(session_path)
+                manager.RemoveSession(dbus.ObjectPath(session_path))
+                self.obex_proxy_cache.evict(session_path)
                 self.last_session_path = None
                 print("Session removed after transfer.")
             except Exception as e:
@@ -871,13 +2858,13 @@ class BluetoothDeviceManager:
         try:
             # Ensure device_address is stored for stop_a2dp_stream
             self.device_address = address # Store the address of the device being streamed to
-            device = dbus.Interface(self.bus.get_object("org.bluez", device_path), "org.bluez.Device1")
+            device = self._get_interface(device_path, "org.bluez.Device1")
             print(device)
-            props = dbus.Interface(self.bus.get_object("org.bluez", device_path), "org.freedesktop.DBus.Properties")
+            props = self._get_interface(device_path, "org.freedesktop.DBus.Properties")
             connected = props.Get("org.bluez.Device1", "Connected")
             if not connected:
                 device.Connect()
-                time.sleep(1.5)
+                self.wait_for_property(device_path, "org.bluez.Device1", "Connected", bool, timeout=10)
             print(f"[A2DP] Connected to {address}")
             if not filepath:
                 return "No audio file specified for streaming"
@@ -929,7 +2916,7 @@ class BluetoothDeviceManager:
             return "A2DP stream stopped"
         return "No active A2DP stream"
 
-    def get_connected_a2dp_source_devices(self, interface):
+    def get_connected_a2dp_source_devices(self, interface=None):
         """
         Get a list of currently connected A2DP source devices on the given interface.
 
@@ -939,23 +2926,9 @@ class BluetoothDeviceManager:
         Returns:
             dict: Dictionary of connected A2DP source devices (MAC -> Name)
         """
-        connected = {}
-        adapter_path = f"/org/bluez/{interface}"
-        om = dbus.Interface(self.bus.get_object("org.bluez", "/"), "org.freedesktop.DBus.ObjectManager")
-        objects = om.GetManagedObjects()
-
-        for path, interfaces in objects.items():
-            if "org.bluez.Device1" in interfaces:
-                props = interfaces["org.bluez.Device1"]
-                if props.get("Connected", False) and props.get("Adapter") == adapter_path:
-                    uuids = props.get("UUIDs", [])
-                    if any("110a" in uuid.lower() for uuid in uuids):  # A2DP Source UUID
-                        address = props.get("Address")
-                        name = props.get("Name", "Unknown")
-                        connected[address] = name
-        return connected
+        return self.get_adapter_device_snapshot(interface)["a2dp_source"]
 
-    def get_connected_a2dp_sink_devices(self, interface):
+    def get_connected_a2dp_sink_devices(self, interface=None):
         """
         Get a list of currently connected A2DP sink devices on the given interface.
 
@@ -965,21 +2938,7 @@ class BluetoothDeviceManager:
         Returns:
             dict: Dictionary of connected A2DP sink devices (MAC -> Name)
         """
-        connected = {}
-        adapter_path = f"/org/bluez/{interface}"
-        om = dbus.Interface(self.bus.get_object("org.bluez", "/"), "org.freedesktop.DBus.ObjectManager")
-        objects = om.GetManagedObjects()
-
-        for path, interfaces in objects.items():
-            if "org.bluez.Device1" in interfaces:
-                props = interfaces["org.bluez.Device1"]
-                if props.get("Connected", False) and props.get("Adapter") == adapter_path:
-                    uuids = props.get("UUIDs", [])
-                    if any("110b" in uuid.lower() for uuid in uuids):  # A2DP Sink UUID
-                        address = props.get("Address")
-                        name = props.get("Name", "Unknown")
-                        connected[address] = name
-        return connected
+        return self.get_adapter_device_snapshot(interface)["a2dp_sink"]
 
 
     def _get_media_control_interface(self, address, controller=None):
@@ -995,26 +2954,11 @@ class BluetoothDeviceManager:
             dbus.Interface: The MediaControl1 D-Bus interface or None if not found.
         """
         try:
-            om = dbus.Interface(self.bus.get_object("org.bluez", "/"), "org.freedesktop.DBus.ObjectManager")
-            objects = om.GetManagedObjects()
-            formatted_addr = address.replace(":", "_").upper()
-
             print("Searching for MediaControl1 interface...")
-            for path, interfaces in objects.items():
-                if "org.bluez.MediaControl1" in interfaces and formatted_addr in path:
-                    if controller:
-                        if f"/{controller}/dev_{formatted_addr}" in path:
-                            print(f"Found MediaControl1 interface at: {path}")
-                            return dbus.Interface(
-                                self.bus.get_object("org.bluez", path),
-                                "org.bluez.MediaControl1"
-                            )
-                    else:
-                        print(f"Found MediaControl1 interface at: {path}")
-                        return dbus.Interface(
-                            self.bus.get_object("org.bluez", path),
-                            "org.bluez.MediaControl1"
-                        )
+            path = self.object_mirror.lookup_interface(address, "org.bluez.MediaControl1", controller)
+            if path:
+                print(f"Found MediaControl1 interface at: {path}")
+                return self._get_interface(path, "org.bluez.MediaControl1")
 
             print(f"No MediaControl1 interface found for device: {address} on controller: {controller or 'any'}")
         except Exception as e:
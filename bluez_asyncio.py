@@ -0,0 +1,266 @@
+import asyncio
+import threading
+
+from Backend_lib.Linux.bluez import BluetoothDeviceManager
+from Backend_lib.Linux.bluez import DEFAULT_DBUS_TIMEOUT
+
+
+class AsyncBluetoothDeviceManager:
+    """
+    asyncio front end for BluetoothDeviceManager.
+
+    D-Bus calls are issued without blocking through the manager's *_async methods and
+    their replies, delivered on the GLib loop thread, are bridged into the asyncio loop
+    with asyncio.wrap_future(). Property waits and discovery use a single object mirror
+    listener that hands events over with call_soon_threadsafe(), so any number of
+    concurrent waits costs no extra threads and no extra D-Bus subscriptions.
+
+    Create it from a coroutine running in the event loop it should serve:
+
+        manager = AsyncBluetoothDeviceManager(interface="hci0")
+        async for device in manager.discover(10, transport="bredr"):
+            ...
+        await manager.pair(address)
+        await manager.wait_connected(address)
+    """
+
+    def __init__(self, interface=None, manager=None, loop=None):
+        """
+        Initialize the facade.
+
+        Args:
+            interface (str): Controller interface like 'hci0'; ignored when manager is given.
+            manager (BluetoothDeviceManager): Existing manager to share the D-Bus connection with.
+            loop (asyncio.AbstractEventLoop): Event loop to deliver results to; defaults to
+                                              the running loop.
+        """
+        self.manager = manager or BluetoothDeviceManager(interface=interface)
+        self.interface = self.manager.interface
+        self.loop = loop or asyncio.get_running_loop()
+        self.lock = threading.Lock()
+        # (path, interface) -> set of callbacks taking the changed properties
+        self.watchers = {}
+        # callbacks taking (signal_name, path, *args) for every mirror change
+        self.stream_watchers = set()
+        self.manager.object_mirror.add_listener(self.on_object_mirror_change)
+
+    def close(self):
+        """
+        Detach from the object mirror. Pending waits are left to time out.
+
+        args: None
+        returns: None
+        """
+        self.manager.object_mirror.remove_listener(self.on_object_mirror_change)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+#-------------CALLS----------------#
+    async def pair(self, address, interface=None, timeout=60):
+        """
+        Pair with a device.
+
+        :param address: Bluetooth MAC address.
+        :param interface: e.g., 'hci0', 'hci1'
+        :param timeout: Seconds to wait for the Pair() reply.
+        :return: True when paired. Raises the DBusException or LookupError on failure.
+        """
+        return await self._wrap(self.manager.pair_async(address, interface, timeout=timeout))
+
+    async def connect(self, address, interface=None, timeout=DEFAULT_DBUS_TIMEOUT):
+        """
+        Connect all auto-connectable profiles of a device (Device1.Connect).
+        """
+        return await self._wrap(self.manager.br_edr_connect_async(address, interface, timeout=timeout))
+
+    async def le_connect(self, address, interface=None, timeout=DEFAULT_DBUS_TIMEOUT):
+        """
+        Connect the A2DP sink profile of a device (Device1.ConnectProfile).
+        """
+        return await self._wrap(self.manager.le_connect_async(address, interface, timeout=timeout))
+
+    async def disconnect(self, address, interface=None, timeout=DEFAULT_DBUS_TIMEOUT):
+        """
+        Disconnect a device.
+        """
+        return await self._wrap(self.manager.disconnect_le_device_async(address, interface, timeout=timeout))
+
+    async def remove(self, address, interface=None, timeout=DEFAULT_DBUS_TIMEOUT):
+        """
+        Remove a device from its adapter.
+        """
+        return await self._wrap(self.manager.remove_device_async(address, interface, timeout=timeout))
+
+    async def _wrap(self, future):
+        # Cancelling the awaiting task cancels the concurrent Future, which runs its
+        # on_cancel cleanup (e.g. CancelPairing)
+        return await asyncio.wrap_future(future, loop=self.loop)
+
+    async def _call(self, method, *args, timeout=DEFAULT_DBUS_TIMEOUT):
+        return await self._wrap(self.manager._call_async(method, *args, timeout=timeout))
+
+#-------------DISCOVERY----------------#
+    async def discover(self, timeout, **discovery_filter):
+        """
+        Scan for nearby devices and yield each one as soon as BlueZ reports it.
+
+        Same results as BluetoothDeviceManager.inquiry_stream(): a device is yielded when it
+        appears and again whenever its RSSI or Alias changes. Discovery is stopped when the
+        timeout expires or the consumer stops iterating.
+
+        :param timeout: Duration in seconds to scan for devices.
+        :param discovery_filter: Optional filter keywords, see BluetoothDeviceManager.start_discovery().
+        :return: Async generator of dicts with 'path', 'Address', 'Alias' and 'RSSI' keys.
+        """
+        manager = self.manager
+        events = asyncio.Queue()
+        device_prefix = f"{manager.adapter_path}/dev_"
+
+        def on_change(signal_name, path, *args):
+            if not path.startswith(device_prefix):
+                return
+            if signal_name == "InterfacesAdded" and "org.bluez.Device1" in args[0]:
+                self.loop.call_soon_threadsafe(events.put_nowait, path)
+            elif signal_name == "PropertiesChanged" and args[0] == "org.bluez.Device1" \
+                    and ("RSSI" in args[1] or "Alias" in args[1]):
+                self.loop.call_soon_threadsafe(events.put_nowait, path)
+
+        discovery_filter = manager.build_discovery_filter(**discovery_filter)
+        with self.lock:
+            self.stream_watchers.add(on_change)
+        try:
+            if discovery_filter or manager.discovery_filter:
+                await self._call(manager.adapter.SetDiscoveryFilter, discovery_filter)
+            manager.discovery_filter = discovery_filter
+            await self._call(manager.adapter.StartDiscovery)
+            deadline = self.loop.time() + timeout
+            while True:
+                remaining = deadline - self.loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    path = await asyncio.wait_for(events.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                props = manager.object_mirror.get_properties(path, "org.bluez.Device1")
+                address = props.get("Address")
+                if address:
+                    yield {
+                        "path": path,
+                        "Address": str(address),
+                        "Alias": str(props.get("Alias", address)),
+                        "RSSI": int(props["RSSI"]) if "RSSI" in props else None,
+                    }
+        finally:
+            with self.lock:
+                self.stream_watchers.discard(on_change)
+            try:
+                await self._call(manager.adapter.StopDiscovery)
+            except Exception as e:
+                print(f"Stop discovery failed: {e}")
+
+#-------------WAIT FOR PROPERTY----------------#
+    async def wait_for_property(self, path, interface, name, predicate, timeout=10):
+        """
+        Wait until a mirrored property satisfies predicate.
+
+        Async counterpart of BluetoothDeviceManager.wait_for_property() for org.bluez objects.
+
+        Args:
+            path (str): D-Bus object path.
+            interface (str): Interface owning the property, e.g. 'org.bluez.Device1'.
+            name (str): Property name.
+            predicate (callable): Called with the property value; waiting ends when it returns True.
+            timeout (float): Seconds to wait.
+        Returns:
+            The property value that satisfied predicate.
+        Raises:
+            TimeoutError: If the property did not satisfy predicate in time.
+        """
+        result = self.loop.create_future()
+        key = (str(path), interface)
+
+        def resolve(value):
+            if not result.done():
+                result.set_result(value)
+
+        def on_properties(changed):
+            if name in changed and predicate(changed[name]):
+                self.loop.call_soon_threadsafe(resolve, changed[name])
+
+        with self.lock:
+            self.watchers.setdefault(key, set()).add(on_properties)
+        try:
+            # Registered first so a change between this read and the wait is not lost
+            current = self.manager.object_mirror.get_properties(path, interface)
+            if name in current and predicate(current[name]):
+                return current[name]
+            try:
+                return await asyncio.wait_for(result, timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"{interface}.{name} on {path} not satisfied within {timeout}s")
+        finally:
+            with self.lock:
+                callbacks = self.watchers.get(key)
+                if callbacks is not None:
+                    callbacks.discard(on_properties)
+                    if not callbacks:
+                        del self.watchers[key]
+
+    async def wait_connected(self, address, interface=None, timeout=30):
+        """
+        Wait until a device reports Connected = True.
+
+        :param address: Bluetooth MAC address.
+        :param interface: e.g., 'hci0', 'hci1'
+        :param timeout: Seconds to wait.
+        :return: True. Raises TimeoutError or LookupError.
+        """
+        return await self._wait_device_flag(address, interface, "Connected", True, timeout)
+
+    async def wait_disconnected(self, address, interface=None, timeout=30):
+        """
+        Wait until a device reports Connected = False.
+        """
+        return await self._wait_device_flag(address, interface, "Connected", False, timeout)
+
+    async def wait_paired(self, address, interface=None, timeout=60):
+        """
+        Wait until a device reports Paired = True.
+        """
+        return await self._wait_device_flag(address, interface, "Paired", True, timeout)
+
+    async def _wait_device_flag(self, address, interface, name, expected, timeout):
+        device_path = self.manager.find_device_path(address, interface)
+        if not device_path:
+            raise LookupError(f"Device path not found for {address} on {interface or self.interface}")
+        await self.wait_for_property(device_path, "org.bluez.Device1", name,
+                                     lambda value: bool(value) == expected, timeout)
+        return True
+
+    def on_object_mirror_change(self, signal_name, path, *args):
+        """
+        BluezObjectMirror listener dispatching to the waits and discovery streams.
+
+        Runs on the GLib loop thread; callbacks hand results to the event loop themselves.
+        """
+        with self.lock:
+            stream_watchers = list(self.stream_watchers)
+            callbacks = None
+            if signal_name == "PropertiesChanged":
+                callbacks = list(self.watchers.get((path, str(args[0])), ()))
+            elif signal_name == "InterfacesAdded":
+                callbacks = [(interface, callback) for interface, props in args[0].items()
+                             for callback in self.watchers.get((path, str(interface)), ())]
+        for callback in stream_watchers:
+            callback(signal_name, path, *args)
+        if signal_name == "PropertiesChanged":
+            for callback in callbacks:
+                callback(args[1])
+        elif signal_name == "InterfacesAdded":
+            for interface, callback in callbacks:
+                callback(args[0][interface])
@@ -1,6 +1,10 @@
 import re
 
-from Backend_lib.Linux import hci_commands as hci
+from Backend_lib.Linux.hci_connections import ConnectionHandleTracker
+from Backend_lib.Linux.hci_encoder import encode_command
+from Backend_lib.Linux.hci_script import ON_ERROR_STOP
+from Backend_lib.Linux.hci_script import run_script
+from Backend_lib.Linux.hci_transport import open_hci_transport
 from utils import run
 
 
@@ -35,6 +39,10 @@ class Controller:
         self.hcidump_log_name = None
         self.hci_dump_started = False
         self.log_path = None
+        # Opened on the first HCI command, see get_hci_transport()
+        self.hci_transport = None
+        # Live handle table, see start_connection_tracking()
+        self.connection_tracker = None
 
     def get_controllers_connected(self):
         """
@@ -139,46 +147,152 @@ class Controller:
         out.reverse()
         return ' '.join(out)
 
+    def get_hci_transport(self):
+        """
+        Returns the HCI transport of the current interface, opening it on first use.
+
+        The raw HCI socket is preferred; hcitool is the fallback when it cannot be opened.
+
+        args: None
+        Returns:
+            HciTransport: Transport commands are sent through.
+        """
+        transport = self.hci_transport
+        if transport is None or getattr(transport, "interface", self.interface) != self.interface:
+            if transport:
+                transport.close()
+            self.hci_transport = open_hci_transport(self.interface, self.log)
+        return self.hci_transport
+
+    def set_hci_transport(self, transport):
+        """
+        Replaces the HCI transport, e.g. with a LoopbackTransport for testing.
+
+        Args:
+            transport (HciTransport): Transport to use from now on.
+        returns:
+            None
+        """
+        if self.hci_transport and self.hci_transport is not transport:
+            self.hci_transport.close()
+        self.hci_transport = transport
+
     def run_hci_cmd(self, ogf, command, parameters=None):
         """
         Executes an HCI command with provided parameters.
 
         Args:
-            ogf (str): Opcode Group Field (e.g., '0x03').
+            ogf (str): Command group as listed in hci_commands (e.g., 'Controller and Baseband').
             command (str): Specific HCI command name.
             parameters (list): List of parameters for the command.
 
         Returns:
-            subprocess.CompletedProcess: Result of command execution.
-        """
-        _ogf = ogf.lower().replace(' ', '_')
-        _ocf_info = getattr(hci, _ogf)[command]
-        hci_command = 'hcitool -i {} cmd {} {}'.format(self.interface, hci.hci_commands[ogf], _ocf_info[0])
-        for index in range(len(parameters)):
-            param_len = list(_ocf_info[1][index].values())[1] if len(
-                _ocf_info[1][index].values()) > 1 else None
-            if param_len:
-                parameter = self.convert_to_little_endian(parameters[index], param_len)
-            else:
-                parameter = parameters[index].replace('0x', '')
-            hci_command = ' '.join([hci_command, parameter])
-        self.log.info(f"Executing command: {hci_command}")
-        return run(self.log, hci_command)
+            CommandComplete or CommandStatus: Decoded reply (see hci_events), or None if the
+            parameters were invalid or the command failed.
+        """
+        try:
+            ogf_value, ocf_value, encoded = encode_command(ogf, command, parameters)
+        except ValueError as e:
+            self.log.error(f"Invalid HCI command parameters: {e}")
+            return None
+        transport = self.get_hci_transport()
+        self.log.info(f"Executing command: {command} (ogf 0x{ogf_value:02x}, ocf 0x{ocf_value:04x}) "
+                      f"{encoded.hex(' ')} via {transport.name}")
+        try:
+            reply = transport.send_command(ogf_value, ocf_value, encoded)
+        except OSError as e:
+            self.log.error(f"HCI command {command} failed: {e}")
+            return None
+        self.log.info(f"Reply: {reply}")
+        return reply
+
+    def run_hci_script(self, script_path, on_error=ON_ERROR_STOP):
+        """
+        Runs a file of HCI commands back-to-back, pipelined where the transport allows.
+
+        Args:
+            script_path (str): Script file, see hci_script for the format.
+            on_error (str): 'stop' to skip the rest after a failure, 'continue' to run everything.
+        Returns:
+            ScriptReport: Per-command outcome, status and latency, or None if the script
+            could not be read.
+        """
+        transport = self.get_hci_transport()
+        self.log.info(f"Running HCI script {script_path} via {transport.name}")
+        try:
+            report = run_script(transport, script_path, on_error, log=self.log)
+        except OSError as e:
+            self.log.error(f"Cannot run HCI script {script_path}: {e}")
+            return None
+        self.log.info(report.summary())
+        return report
+
+    def start_connection_tracking(self):
+        """
+        Starts keeping the connection handles of the current interface from HCI events.
+
+        The table is seeded once from 'hcitool con'; after that get_connection_handles()
+        no longer runs it. Without access to the raw HCI socket the handles stay polled.
+
+        args: None
+        Returns:
+            ConnectionHandleTracker: The tracker, whether or not it could read events.
+        """
+        tracker = self.connection_tracker
+        if tracker and tracker.interface == self.interface:
+            if tracker.running:
+                return tracker
+        else:
+            if tracker:
+                tracker.stop()
+            tracker = self.connection_tracker = ConnectionHandleTracker(self.interface, self.log)
+        if tracker.start():
+            tracker.seed(self.read_connection_handles())
+        return tracker
+
+    def stop_connection_tracking(self):
+        """
+        Stops the connection handle tracker, if any.
+
+        args: None
+        returns: None
+        """
+        if self.connection_tracker:
+            self.connection_tracker.stop()
+            self.connection_tracker = None
 
     def get_connection_handles(self):
         """
         Retrieves active Bluetooth connection handles for the current interface.
 
+        Served from the live table while connection tracking runs, otherwise read with
+        'hcitool con'.
+
+        args: None
+        Returns:
+            dict: Dictionary of connection handles with hex values.
+        """
+        tracker = self.connection_tracker
+        if tracker and tracker.running and tracker.interface == self.interface:
+            self.handles = tracker.snapshot()
+        else:
+            self.handles = self.read_connection_handles()
+        return self.handles
+
+    def read_connection_handles(self):
+        """
+        Reads the active connection handles with 'hcitool con'.
+
         args: None
         Returns:
             dict: Dictionary of connection handles with hex values.
         """
         hcitool_con_cmd = f"hcitool -i {self.interface} con"
-        self.handles = {}
+        handles = {}
         result = run(self.log, hcitool_con_cmd)
         results = result.stdout.split('\n')
         for line in results:
             if 'handle' in line:
                 handle = (line.strip().split('state')[0]).replace('< ', '').strip()
-                self.handles[handle] = hex(int(handle.split(' ')[-1]))
-        return self.handles
+                handles[handle] = hex(int(handle.split(' ')[-1]))
+        return handles
@@ -0,0 +1,111 @@
+import logging
+import threading
+
+import dbus.mainloop.glib
+
+from gi.repository import GLib
+
+
+class GLibLoopThread:
+    """
+    Runs the default GLib main context in a dedicated daemon thread.
+
+    dbus-python is attached to the default GLib context (DBusGMainLoop), so D-Bus signal
+    handlers and asynchronous method replies are only dispatched while that context is
+    iterated. The Qt application runs its own event loop, so this thread does the GLib
+    iteration. Handlers therefore run on this thread; anything touching Qt widgets must
+    be marshalled to the GUI thread (see UI_lib.qt_dbus_bridge.QtDBusBridge).
+    """
+
+    def __init__(self):
+        """
+        Initialize the loop thread without starting it.
+        """
+        self.loop = None
+        self.thread = None
+        self._started = threading.Event()
+
+    def start(self):
+        """
+        Start iterating the GLib main context. Does nothing if already running.
+
+        args: None
+        returns: None
+        """
+        if self.is_running():
+            return
+        dbus.mainloop.glib.threads_init()
+        self.loop = GLib.MainLoop()
+        self._started.clear()
+        self.thread = threading.Thread(target=self._run, name="glib-mainloop", daemon=True)
+        self.thread.start()
+        self._started.wait(timeout=2)
+        logging.info("GLib main loop thread started")
+
+    def stop(self):
+        """
+        Quit the GLib main loop and wait for the thread to finish.
+
+        args: None
+        returns: None
+        """
+        if not self.is_running():
+            return
+        self.loop.quit()
+        if not self.in_loop_thread():
+            self.thread.join(timeout=2)
+        logging.info("GLib main loop thread stopped")
+
+    def is_running(self):
+        """
+        Returns:
+            bool: True if the loop thread is alive.
+        """
+        return self.thread is not None and self.thread.is_alive()
+
+    def in_loop_thread(self):
+        """
+        Returns:
+            bool: True if called from the loop thread itself.
+        """
+        return self.thread is not None and threading.current_thread() is self.thread
+
+    def _run(self):
+        GLib.idle_add(self._started.set)
+        try:
+            self.loop.run()
+        except Exception as e:
+            logging.error(f"GLib main loop stopped with error: {e}")
+
+
+_glib_loop = GLibLoopThread()
+
+
+def start_glib_loop():
+    """
+    Start the shared GLib main loop thread if it is not running yet.
+
+    args: None
+    Returns:
+        GLibLoopThread: The shared loop thread.
+    """
+    _glib_loop.start()
+    return _glib_loop
+
+
+def stop_glib_loop():
+    """
+    Stop the shared GLib main loop thread.
+
+    args: None
+    returns: None
+    """
+    _glib_loop.stop()
+
+
+def get_glib_loop():
+    """
+    Returns:
+        GLibLoopThread: The shared loop thread, started or not.
+    """
+    return _glib_loop
@@ -0,0 +1,546 @@
+"""
+Record the D-Bus traffic of BluetoothDeviceManager and replay it without hardware.
+
+DBusRecorder writes every call made through InstrumentedInterface (arguments, reply or
+error, latency) and every signal the BlueZ services emit, with timestamps, to a gzip
+compressed JSON lines file:
+
+    recorder = DBusRecorder("/tmp/rig.dbusrec.gz")
+    recorder.start(bus, object_mirror=manager.object_mirror)
+    ...
+    recorder.stop()
+
+DBusReplayer loads such a file and exposes a ReplayBus that can stand in for the system
+bus. Calls made on it are answered with the recorded replies (matched by method and
+object path, in order) and play() emits the recorded signals, re-issuing the recorded
+calls no client has made, either at recorded speed or as fast as possible:
+
+    replayer = DBusReplayer("/tmp/rig.dbusrec.gz")
+    manager = BluetoothDeviceManager(interface="hci0", bus=replayer.bus)
+    print(replayer.play(speed=None))
+
+From the command line:
+
+    python3 -m Backend_lib.Linux.dbus_recorder summary /tmp/rig.dbusrec.gz
+    python3 -m Backend_lib.Linux.dbus_recorder replay /tmp/rig.dbusrec.gz --speed 1
+    python3 -m Backend_lib.Linux.dbus_recorder replay /tmp/rig.dbusrec.gz --profile 30
+"""
+import argparse
+import cProfile
+import gzip
+import json
+import logging
+import pstats
+import threading
+import time
+from collections import Counter
+from collections import deque
+
+import dbus
+
+from Backend_lib.Linux.bluez import DEVICE_PATH_PATTERN
+from Backend_lib.Linux.bluez import InstrumentedInterface
+from Backend_lib.Linux.bluez import dbus_call_observers
+from Backend_lib.Linux.bluez import dbus_call_stats
+
+RECORDING_FORMAT = "bluez-dbus-recording"
+RECORDING_VERSION = 1
+
+# Event layouts, one JSON array per line after the header object:
+#   [t, "c", "Interface.Method", path, args, reply, error, elapsed]   reply: list of out args
+#   [t, "s", interface, member, path, args]                          error: [name, message]
+CALL_EVENT = "c"
+SIGNAL_EVENT = "s"
+
+# Dicts whose keys are not all strings (e.g. ManufacturerData a{qv}) are stored as pairs
+ITEMS_KEY = "__items__"
+
+
+def encode_value(value):
+    """
+    Convert a dbus-python value to plain JSON types.
+
+    Booleans stay booleans, integer and string subtypes become int/str, byte arrays and
+    structs become lists.
+
+    Args:
+        value: Value received from or sent to D-Bus.
+    Returns:
+        JSON serialisable value.
+    """
+    if isinstance(value, (bool, dbus.Boolean)):
+        return bool(value)
+    if isinstance(value, str):
+        return str(value)
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        return float(value)
+    if isinstance(value, bytes):
+        return list(value)
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value):
+            return {str(key): encode_value(item) for key, item in value.items()}
+        return {ITEMS_KEY: [[encode_value(key), encode_value(item)] for key, item in value.items()]}
+    if isinstance(value, (list, tuple)):
+        return [encode_value(item) for item in value]
+    if value is None:
+        return None
+    return str(value)
+
+
+def decode_value(value):
+    """
+    Undo the dict key encoding of encode_value(). Other values are returned as read.
+    """
+    if isinstance(value, dict):
+        if len(value) == 1 and ITEMS_KEY in value:
+            return {decode_value(key): decode_value(item) for key, item in value[ITEMS_KEY]}
+        return {key: decode_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode_value(item) for item in value]
+    return value
+
+
+def load_recording(path):
+    """
+    Read a recording written by DBusRecorder.
+
+    Args:
+        path (str): Recording file.
+    Returns:
+        tuple: (header dict, list of events sorted by time with decoded arguments).
+    Raises:
+        ValueError: If the file is not a recording of a supported version.
+    """
+    with gzip.open(path, "rt") as recording:
+        header = json.loads(recording.readline() or "{}")
+        if header.get("format") != RECORDING_FORMAT or header.get("version") != RECORDING_VERSION:
+            raise ValueError(f"{path} is not a version {RECORDING_VERSION} D-Bus recording")
+        events = []
+        for line in recording:
+            event = json.loads(line)
+            if event[1] == CALL_EVENT:
+                event[4], event[5] = decode_value(event[4]), decode_value(event[5])
+            else:
+                event[5] = decode_value(event[5])
+            events.append(event)
+    # Calls are written when their reply arrives but stamped with their start time
+    events.sort(key=lambda event: event[0])
+    return header, events
+
+
+class DBusRecorder:
+    """
+    Records D-Bus calls, replies and signals to a file for DBusReplayer.
+
+    Calls are taken from InstrumentedInterface through dbus_call_observers, so everything
+    BluetoothDeviceManager sends through its proxy cache is captured; signals are taken
+    from a catch-all match on each bus added. Events are written as they happen, from
+    whichever thread delivered them.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): File to write; gzip compressed JSON lines.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = None
+        self.started = None
+        self.events = 0
+        self._signal_matches = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def start(self, bus=None, service="org.bluez", object_mirror=None):
+        """
+        Open the file and start recording.
+
+        Args:
+            bus: Bus whose signals to record; the system bus by default.
+            service (str): Bus name whose signals to record.
+            object_mirror (BluezObjectMirror): If given, its current tree is written as the
+                reply of a GetManagedObjects() call, so a replay started from this recording
+                sees the objects that existed before recording began.
+        returns:
+            None
+        """
+        if self.file:
+            return
+        self.file = gzip.open(self.path, "wt")
+        self.started = time.monotonic()
+        self.events = 0
+        self.file.write(json.dumps({"format": RECORDING_FORMAT, "version": RECORDING_VERSION,
+                                    "started": time.time()}) + "\n")
+        if object_mirror is not None:
+            self._write([0.0, CALL_EVENT, "org.freedesktop.DBus.ObjectManager.GetManagedObjects", "/", [],
+                         [encode_value(object_mirror.snapshot())], None, 0.0])
+        dbus_call_observers.append(self.on_call)
+        self.add_bus(bus or dbus.SystemBus(), service)
+        logging.info(f"Recording D-Bus traffic to {self.path}")
+
+    def add_bus(self, bus, service):
+        """
+        Also record the signals of a service on another bus, e.g. org.bluez.obex on the
+        session bus.
+
+        Args:
+            bus: D-Bus connection.
+            service (str): Bus name whose signals to record.
+        returns:
+            None
+        """
+        self._signal_matches.append(bus.add_signal_receiver(
+            self.on_signal, bus_name=service, interface_keyword="dbus_interface",
+            member_keyword="member", path_keyword="path"))
+
+    def stop(self):
+        """
+        Stop recording and close the file.
+
+        args: None
+        returns: None
+        """
+        if self.on_call in dbus_call_observers:
+            dbus_call_observers.remove(self.on_call)
+        for match in self._signal_matches:
+            match.remove()
+        self._signal_matches = []
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+                logging.info(f"Recorded {self.events} D-Bus events to {self.path}")
+
+    def on_call(self, method, path, args, reply, error, started, elapsed):
+        """
+        dbus_call_observers callback writing one completed call.
+        """
+        if error is not None:
+            error = [error.get_dbus_name(), error.get_dbus_message()] \
+                if isinstance(error, dbus.exceptions.DBusException) else [None, str(error)]
+        self._write([round(max(0.0, started - self.started), 6), CALL_EVENT, method, path, encode_value(args),
+                     encode_value(reply) if reply is not None else None, error, round(elapsed, 6)])
+
+    def on_signal(self, *args, dbus_interface=None, member=None, path=None):
+        """
+        Signal receiver writing one signal.
+        """
+        self._write([round(time.monotonic() - self.started, 6), SIGNAL_EVENT, str(dbus_interface), str(member),
+                     str(path), encode_value(args)])
+
+    def _write(self, event):
+        line = json.dumps(event, separators=(",", ":")) + "\n"
+        with self.lock:
+            if self.file:
+                self.file.write(line)
+                self.events += 1
+
+
+class ReplaySignalMatch:
+    """
+    Signal subscription on a ReplayBus, removed like a dbus-python SignalMatch.
+    """
+
+    def __init__(self, bus, handler, signal_name, dbus_interface, path, keywords):
+        self.bus = bus
+        self.handler = handler
+        self.signal_name = signal_name
+        self.dbus_interface = dbus_interface
+        self.path = path
+        self.keywords = keywords
+
+    def matches(self, interface, member, path):
+        return (self.signal_name is None or self.signal_name == member) \
+            and (self.dbus_interface is None or self.dbus_interface == interface) \
+            and (self.path is None or self.path == path)
+
+    def remove(self):
+        self.bus.remove_signal_match(self)
+
+
+class ReplayProxy:
+    """
+    Object proxy on a ReplayBus; usable with dbus.Interface like a dbus-python proxy.
+    """
+
+    def __init__(self, bus, bus_name, object_path):
+        self.bus = bus
+        self.bus_name = bus_name
+        self.requested_bus_name = bus_name
+        self.object_path = str(object_path)
+
+    def get_dbus_method(self, member, dbus_interface=None):
+        method = f"{dbus_interface}.{member}"
+        path = self.object_path
+
+        def call(*args, reply_handler=None, error_handler=None, **kwargs):
+            return self.bus.call(method, path, args, reply_handler, error_handler)
+
+        return call
+
+    def connect_to_signal(self, signal_name, handler_function, dbus_interface=None, **keywords):
+        return self.bus.add_signal_receiver(handler_function, signal_name=signal_name,
+                                            dbus_interface=dbus_interface, path=self.object_path, **keywords)
+
+
+class ReplayBus:
+    """
+    Stand-in for a dbus-python bus connection that answers from a recording.
+
+    Every call is matched to the earliest recorded call of the same method on the same
+    object that has not been answered yet, and gets that call's reply or error. Calls
+    with no match left fail with org.freedesktop.DBus.Error.UnknownMethod. Async replies
+    are delivered before the call returns unless latency_scale asks for recorded latency.
+    """
+
+    def __init__(self, events):
+        """
+        Args:
+            events (list): Events as returned by load_recording().
+        """
+        self.events = events
+        self.lock = threading.Lock()
+        self.receivers = []
+        # Recorded latencies are multiplied by this; 0 answers immediately
+        self.latency_scale = 0
+        self.reset()
+
+    def reset(self):
+        """
+        Make every recorded reply available again.
+
+        args: None
+        returns: None
+        """
+        with self.lock:
+            # (method, path) -> deque of event indexes not answered yet
+            self.pending = {}
+            self.consumed = set()
+            self.unmatched = Counter()
+            for index, event in enumerate(self.events):
+                if event[1] == CALL_EVENT:
+                    self.pending.setdefault((event[2], event[3]), deque()).append(index)
+
+    def get_object(self, bus_name, object_path, introspect=True, follow_name_owner_changes=False):
+        return ReplayProxy(self, bus_name, object_path)
+
+    def add_signal_receiver(self, handler_function, signal_name=None, dbus_interface=None, bus_name=None,
+                            path=None, **keywords):
+        match = ReplaySignalMatch(self, handler_function, signal_name, dbus_interface, path, keywords)
+        with self.lock:
+            self.receivers.append(match)
+        return match
+
+    def remove_signal_match(self, match):
+        with self.lock:
+            if match in self.receivers:
+                self.receivers.remove(match)
+
+    def call(self, method, path, args, reply_handler=None, error_handler=None):
+        """
+        Answer one method call from the recording.
+
+        Returns:
+            The recorded return value for blocking calls; None when reply_handler is given.
+        Raises:
+            DBusException: The recorded error of a blocking call.
+        """
+        index = self.take(method, path)
+        if index is None:
+            reply, error, elapsed = None, dbus.exceptions.DBusException(
+                f"{method} on {path} is not in the recording",
+                name="org.freedesktop.DBus.Error.UnknownMethod"), 0.0
+        else:
+            event = self.events[index]
+            reply, elapsed = event[5], event[7]
+            error = dbus.exceptions.DBusException(event[6][1], name=event[6][0]) if event[6] else None
+        delay = elapsed * self.latency_scale
+        if reply_handler is not None:
+            deliver = (lambda: error_handler(error)) if error else (lambda: reply_handler(*reply))
+            if delay:
+                threading.Timer(delay, deliver).start()
+            else:
+                deliver()
+            return None
+        if delay:
+            time.sleep(delay)
+        if error:
+            raise error
+        if not reply:
+            return None
+        return reply[0] if len(reply) == 1 else tuple(reply)
+
+    def take(self, method, path):
+        """
+        Mark the next unanswered recorded call of method on path as answered.
+
+        Returns:
+            int: Index of the event, or None if none is left.
+        """
+        with self.lock:
+            queue = self.pending.get((method, str(path)))
+            while queue:
+                index = queue.popleft()
+                if index not in self.consumed:
+                    self.consumed.add(index)
+                    return index
+            self.unmatched[method] += 1
+            return None
+
+    def emit(self, interface, member, path, args):
+        """
+        Deliver a signal to the matching receivers on the calling thread.
+        """
+        with self.lock:
+            receivers = [match for match in self.receivers if match.matches(interface, member, path)]
+        for match in receivers:
+            keywords = {}
+            if match.keywords.get("path_keyword"):
+                keywords[match.keywords["path_keyword"]] = path
+            if match.keywords.get("interface_keyword"):
+                keywords[match.keywords["interface_keyword"]] = interface
+            if match.keywords.get("member_keyword"):
+                keywords[match.keywords["member_keyword"]] = member
+            try:
+                match.handler(*args, **keywords)
+            except Exception as e:
+                logging.error(f"Replayed signal {interface}.{member} on {path} failed: {e}")
+
+
+class DBusReplayer:
+    """
+    Replays a DBusRecorder file against code running on self.bus.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Recording written by DBusRecorder.
+        """
+        self.path = path
+        self.header, self.events = load_recording(path)
+        self.bus = ReplayBus(self.events)
+
+    def adapters(self):
+        """
+        Returns:
+            list: Adapter interface names seen in the recording, e.g. ['hci0'].
+        """
+        adapters = set()
+        for event in self.events:
+            path = event[3] if event[1] == CALL_EVENT else event[4]
+            match = DEVICE_PATH_PATTERN.match(path)
+            if match:
+                adapters.add(match[1])
+            elif path.startswith("/org/bluez/hci"):
+                adapters.add(path.split("/")[3])
+        return sorted(adapters)
+
+    def summary(self):
+        """
+        Returns:
+            dict: Duration, event counts and the most frequent calls and signals.
+        """
+        calls = Counter(event[2] for event in self.events if event[1] == CALL_EVENT)
+        signals = Counter(f"{event[2]}.{event[3]}" for event in self.events if event[1] == SIGNAL_EVENT)
+        return {
+            "duration": self.events[-1][0] if self.events else 0.0,
+            "calls": sum(calls.values()),
+            "errors": sum(1 for event in self.events if event[1] == CALL_EVENT and event[6]),
+            "signals": sum(signals.values()),
+            "top_calls": calls.most_common(10),
+            "top_signals": signals.most_common(10),
+        }
+
+    def play(self, speed=None, issue_calls=True):
+        """
+        Emit the recorded signals in order, and issue the recorded calls nobody has made.
+
+        Calls already answered for a client on self.bus are skipped, so a client that makes
+        the same calls as the recorded session is served its replies and sees the signals
+        in between at the recorded points.
+
+        Args:
+            speed (float): 1.0 for recorded speed, 2.0 for twice as fast; None or 0 to
+                           replay as fast as possible. Also scales reply latencies.
+            issue_calls (bool): Issue the unanswered recorded calls through
+                                InstrumentedInterface; False only emits signals.
+        Returns:
+            dict: Counts of signals, issued calls, skipped calls and errors, the elapsed
+            time, and calls clients made that had no recorded reply.
+        """
+        self.bus.latency_scale = 1 / speed if speed else 0
+        result = {"signals": 0, "calls": 0, "skipped": 0, "errors": 0}
+        started = time.monotonic()
+        for index, event in enumerate(self.events):
+            if speed:
+                delay = started + event[0] / speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            if event[1] == SIGNAL_EVENT:
+                self.bus.emit(event[2], event[3], event[4], event[5])
+                result["signals"] += 1
+                continue
+            if not issue_calls or index in self.bus.consumed:
+                result["skipped"] += 1
+                continue
+            interface, member = event[2].rsplit(".", 1)
+            method = getattr(InstrumentedInterface(dbus.Interface(self.bus.get_object("org.bluez", event[3]),
+                                                                  interface)), member)
+            try:
+                method(*event[4])
+            except dbus.exceptions.DBusException:
+                result["errors"] += 1
+            result["calls"] += 1
+        result["elapsed"] = time.monotonic() - started
+        result["unmatched"] = dict(self.bus.unmatched)
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or replay a recorded BlueZ D-Bus session")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summary_parser = commands.add_parser("summary", help="Print what a recording contains")
+    summary_parser.add_argument("recording")
+    replay_parser = commands.add_parser("replay", help="Replay a recording against a BluetoothDeviceManager")
+    replay_parser.add_argument("recording")
+    replay_parser.add_argument("--speed", type=float, default=0,
+                               help="1 for recorded speed; 0 (default) for as fast as possible")
+    replay_parser.add_argument("--interface", help="Adapter to build the manager for; the first recorded one by default")
+    replay_parser.add_argument("--profile", type=int, metavar="N",
+                               help="Profile the replay and print the N most expensive functions")
+    args = parser.parse_args()
+
+    replayer = DBusReplayer(args.recording)
+    if args.command == "summary":
+        print(json.dumps(replayer.summary(), indent=2))
+        return
+
+    from Backend_lib.Linux.bluez import BluetoothDeviceManager
+
+    adapters = replayer.adapters()
+    interface = args.interface or (adapters[0] if adapters else "hci0")
+    manager = BluetoothDeviceManager(interface=interface, bus=replayer.bus)
+    dbus_call_stats.reset()
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    result = replayer.play(speed=args.speed)
+    if profiler:
+        profiler.disable()
+    manager.shutdown()
+    print(json.dumps(result, indent=2))
+    print(dbus_call_stats.format_report())
+    if profiler:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(args.profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from Backend_lib.Linux.bluez import DEVICE_PATH_PATTERN
+from Backend_lib.Linux.bluez import DeviceRecord
+
+DEFAULT_INVENTORY_PATH = os.path.join(os.path.expanduser("~"), ".bt_device_inventory.db")
+
+# Role name -> DeviceRecord property, stored comma separated in the roles column
+DEVICE_ROLES = (("a2dp_sink", "is_a2dp_sink"), ("a2dp_source", "is_a2dp_source"),
+                ("avrcp", "is_avrcp"), ("opp", "is_opp"))
+
+INVENTORY_COLUMNS = ("adapter", "address", "name", "class", "uuids", "rssi", "last_seen",
+                     "paired", "connected", "roles")
+
+# Columns compared to decide whether a snapshot changed a stored device
+PROPERTY_COLUMNS = ("name", "class", "uuids", "rssi", "paired", "connected", "roles")
+
+
+class DeviceInventory:
+    """
+    On-disk SQLite inventory of the devices seen on each controller.
+
+    The UI reads it at startup to show known devices before BlueZ has been queried, and
+    keeps it current from the object mirror. Mirror events are merged in memory and
+    written in one transaction every flush_interval seconds by a writer thread, so RSSI
+    floods during discovery do not turn into one disk write per signal and the GLib
+    loop thread never waits on the disk. Call close() to write what is still buffered.
+    """
+
+    def __init__(self, db_path=DEFAULT_INVENTORY_PATH, flush_interval=2.0):
+        """
+        Open (and create if needed) the inventory database.
+
+        Args:
+            db_path (str): Path of the SQLite file; ':memory:' for a throwaway inventory.
+            flush_interval (float): Seconds between writes of buffered mirror updates.
+        """
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        # (adapter, address) -> {column: value} not yet written
+        self.pending = {}
+        self.object_mirror = None
+        self.writer = None
+        self.writer_stop = threading.Event()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS devices ("
+            "adapter TEXT NOT NULL, address TEXT NOT NULL, name TEXT, class INTEGER, uuids TEXT, "
+            "rssi INTEGER, last_seen REAL, paired INTEGER DEFAULT 0, connected INTEGER DEFAULT 0, "
+            "roles TEXT, PRIMARY KEY (adapter, address))")
+        self.connection.commit()
+        # (adapter, address) -> {column: value} as written, for telling real changes from repeats
+        self.stored = {}
+        for row in self.connection.execute(f"SELECT adapter, address, {', '.join(PROPERTY_COLUMNS)} FROM devices"):
+            self.stored[(row[0], row[1])] = dict(zip(PROPERTY_COLUMNS, row[2:]))
+
+    def load(self, adapter):
+        """
+        Return the stored devices of one controller, most recently seen first.
+
+        Args:
+            adapter (str): Controller interface like 'hci0'.
+        Returns:
+            list: Dicts keyed by INVENTORY_COLUMNS; uuids and roles are lists.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT {', '.join(INVENTORY_COLUMNS)} FROM devices WHERE adapter = ? "
+                "ORDER BY last_seen DESC", (adapter,)).fetchall()
+        devices = []
+        for row in rows:
+            device = dict(zip(INVENTORY_COLUMNS, row))
+            device["uuids"] = device["uuids"].split(",") if device["uuids"] else []
+            device["roles"] = device["roles"].split(",") if device["roles"] else []
+            device["paired"] = bool(device["paired"])
+            device["connected"] = bool(device["connected"])
+            devices.append(device)
+        return devices
+
+    def record(self, adapter, props, seen=True):
+        """
+        Buffer the Device1 properties of one device for the next flush.
+
+        Args:
+            adapter (str): Controller interface like 'hci0'.
+            props (dict): org.bluez.Device1 properties; must contain Address.
+            seen (bool): False when the properties come from a snapshot rather than a signal
+                         about the device; it is then only written if a stored property
+                         changed, and last_seen is only set for devices not stored yet.
+        returns:
+            None
+        """
+        device = DeviceRecord.from_properties(props)
+        row = {
+            "paired": int(device.paired),
+            "connected": int(device.connected),
+            "roles": ",".join(role for role, attribute in DEVICE_ROLES if getattr(device, attribute)),
+        }
+        if "Name" in props or "Alias" in props:
+            row["name"] = str(props.get("Name", props.get("Alias")))
+        if "Class" in props:
+            row["class"] = int(props["Class"])
+        if "UUIDs" in props:
+            row["uuids"] = ",".join(str(uuid).lower() for uuid in props["UUIDs"])
+        if "RSSI" in props:
+            row["rssi"] = int(props["RSSI"])
+        key = (adapter, str(props["Address"]).upper())
+        with self.lock:
+            if not seen:
+                known = {**self.stored.get(key, {}), **self.pending.get(key, {})}
+                if all(known.get(column) == value for column, value in row.items()):
+                    return
+            if seen or key not in self.stored:
+                row["last_seen"] = time.time()
+            self.pending.setdefault(key, {}).update(row)
+
+    def sync(self, objects):
+        """
+        Record the devices of a GetManagedObjects()-style tree whose properties differ
+        from the stored ones, and write them out.
+
+        Args:
+            objects (dict): Object path -> {interface: {property: value}}.
+        returns:
+            None
+        """
+        for path, interfaces in objects.items():
+            props = interfaces.get("org.bluez.Device1")
+            match = DEVICE_PATH_PATTERN.match(path)
+            if props and props.get("Address") and match and not match[3]:
+                self.record(match[1], props, seen=False)
+        self.flush()
+
+    def flush(self):
+        """
+        Write all buffered updates in one transaction.
+
+        args: None
+        returns: None
+        """
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            if not pending:
+                return
+            try:
+                with self.connection:
+                    for (adapter, address), row in pending.items():
+                        columns = list(row)
+                        self.connection.execute(
+                            f"INSERT INTO devices (adapter, address, {', '.join(columns)}) "
+                            f"VALUES (?, ?, {', '.join('?' for _ in columns)}) "
+                            f"ON CONFLICT (adapter, address) DO UPDATE SET "
+                            f"{', '.join(f'{column} = excluded.{column}' for column in columns)}",
+                            (adapter, address, *row.values()))
+            except sqlite3.Error as e:
+                logging.error(f"Device inventory write failed: {e}")
+                return
+            for key, row in pending.items():
+                self.stored.setdefault(key, {}).update(
+                    (column, value) for column, value in row.items() if column in PROPERTY_COLUMNS)
+
+    def forget(self, adapter, address):
+        """
+        Delete one device from the inventory.
+
+        Args:
+            adapter (str): Controller interface like 'hci0'.
+            address (str): Bluetooth MAC address.
+        returns:
+            None
+        """
+        with self.lock:
+            self.pending.pop((adapter, address.upper()), None)
+            self.stored.pop((adapter, address.upper()), None)
+            with self.connection:
+                self.connection.execute("DELETE FROM devices WHERE adapter = ? AND address = ?",
+                                        (adapter, address.upper()))
+
+    def attach(self, object_mirror):
+        """
+        Keep the inventory current from a BluezObjectMirror and start the writer thread.
+
+        Args:
+            object_mirror (BluezObjectMirror): Mirror to follow.
+        returns:
+            None
+        """
+        self.detach()
+        self.object_mirror = object_mirror
+        object_mirror.add_listener(self.on_object_mirror_change)
+        self.writer_stop.clear()
+        self.writer = threading.Thread(target=self._write_periodically, name="device-inventory-writer", daemon=True)
+        self.writer.start()
+
+    def detach(self):
+        """
+        Stop following the mirror attached with attach() and stop the writer thread.
+
+        args: None
+        returns: None
+        """
+        if self.object_mirror:
+            self.object_mirror.remove_listener(self.on_object_mirror_change)
+            self.object_mirror = None
+        if self.writer:
+            self.writer_stop.set()
+            self.writer.join()
+            self.writer = None
+
+    def close(self):
+        """
+        Detach, write buffered updates and close the database.
+
+        args: None
+        returns: None
+        """
+        self.detach()
+        self.flush()
+        with self.lock:
+            self.connection.close()
+
+    def on_object_mirror_change(self, signal_name, path, *args):
+        """
+        BluezObjectMirror listener recording added and changed devices.
+        """
+        if signal_name == "InterfacesAdded":
+            if "org.bluez.Device1" not in args[0]:
+                return
+        elif signal_name != "PropertiesChanged" or args[0] != "org.bluez.Device1":
+            return
+        match = DEVICE_PATH_PATTERN.match(path)
+        if not match or match[3]:
+            return
+        props = self.object_mirror.get_properties(path, "org.bluez.Device1")
+        if props.get("Address"):
+            self.record(match[1], props)
+
+    def _write_periodically(self):
+        while not self.writer_stop.wait(self.flush_interval):
+            self.flush()
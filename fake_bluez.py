@@ -0,0 +1,837 @@
+"""
+Stand-in BlueZ and obexd D-Bus services for offline load testing.
+
+Runs on a private dbus-daemon and implements the parts of the BlueZ API used by
+BluetoothDeviceManager: ObjectManager, Properties, Adapter1, Device1, MediaControl1 and
+obex Client1/ObjectPush1/Transfer1. Device counts, method latencies and failure rates are
+configurable; InterfacesAdded, InterfacesRemoved and PropertiesChanged are emitted like
+bluetoothd does.
+
+Programs use it through FakeBluezEnvironment, which starts the private bus and the
+service process and points DBUS_SYSTEM_BUS_ADDRESS / DBUS_SESSION_BUS_ADDRESS at it:
+
+    with FakeBluezEnvironment(devices=10000, latency=0.02, failure_rate=0.01):
+        manager = BluetoothDeviceManager(interface="hci0")
+        ...
+
+Run on its own, it starts a private bus and prints the exports needed to point the UI
+(or any other program) at it; with --address it serves on an existing bus instead:
+
+    python3 fake_bluez.py --devices 10000 --latency 0.02
+    python3 fake_bluez.py --address unix:path=/tmp/bus --devices 1000
+
+--smoke starts a small environment, checks the exported tree and a few method calls over
+the private bus, prints one line per check and exits non-zero if any check fails:
+
+    python3 fake_bluez.py --smoke
+"""
+import argparse
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import dbus
+import dbus.bus
+import dbus.service
+import dbus.mainloop.glib
+
+from gi.repository import GLib
+
+PROPERTIES_INTERFACE = "org.freedesktop.DBus.Properties"
+OBJECT_MANAGER_INTERFACE = "org.freedesktop.DBus.ObjectManager"
+
+A2DP_SOURCE_UUID = "0000110a-0000-1000-8000-00805f9b34fb"
+A2DP_SINK_UUID = "0000110b-0000-1000-8000-00805f9b34fb"
+AVRCP_TARGET_UUID = "0000110c-0000-1000-8000-00805f9b34fb"
+AVRCP_UUID = "0000110e-0000-1000-8000-00805f9b34fb"
+OPP_UUID = "00001105-0000-1000-8000-00805f9b34fb"
+
+# Service sets handed out round-robin to simulated devices
+DEVICE_PROFILES = (
+    (A2DP_SINK_UUID, AVRCP_UUID, AVRCP_TARGET_UUID),
+    (A2DP_SOURCE_UUID, AVRCP_UUID),
+    (OPP_UUID,),
+    (A2DP_SINK_UUID, AVRCP_UUID, OPP_UUID),
+    (),
+)
+
+BUS_CONFIG = """<!DOCTYPE busconfig PUBLIC "-//freedesktop//DTD D-Bus Bus Configuration 1.0//EN"
+ "http://www.freedesktop.org/standards/dbus/1.0/busconfig.dtd">
+<busconfig>
+  <type>session</type>
+  <listen>unix:dir={directory}</listen>
+  <auth>EXTERNAL</auth>
+  <policy context="default">
+    <allow send_destination="*" eavesdrop="true"/>
+    <allow eavesdrop="true"/>
+    <allow own="*"/>
+  </policy>
+</busconfig>
+"""
+
+
+class FakeBluezError(dbus.DBusException):
+    """
+    D-Bus error returned by the simulated services.
+    """
+
+    def __init__(self, name, message="Simulated failure"):
+        """
+        Args:
+            name (str): D-Bus error name, e.g. 'org.bluez.Error.Failed'.
+            message (str): Error message.
+        """
+        self._dbus_error_name = name
+        super().__init__(message)
+
+
+class FakeObject(dbus.service.Object):
+    """
+    Exported object holding properties for one or more interfaces.
+    """
+
+    def __init__(self, service, path, interfaces):
+        """
+        Args:
+            service (FakeService): Owning service.
+            path (str): Object path.
+            interfaces (dict): Interface name -> {property: value}.
+        """
+        self.service = service
+        self.path = path
+        self.interfaces = interfaces
+        super().__init__(service.connection, path)
+
+    @dbus.service.method(PROPERTIES_INTERFACE, in_signature="ss", out_signature="v")
+    def Get(self, interface, name):
+        props = self.interfaces.get(interface, {})
+        if name not in props:
+            raise FakeBluezError("org.freedesktop.DBus.Error.InvalidArgs", f"No such property '{name}'")
+        return props[name]
+
+    @dbus.service.method(PROPERTIES_INTERFACE, in_signature="s", out_signature="a{sv}")
+    def GetAll(self, interface):
+        return self.interfaces.get(interface, {})
+
+    @dbus.service.method(PROPERTIES_INTERFACE, in_signature="ssv", out_signature="")
+    def Set(self, interface, name, value):
+        if name not in self.interfaces.get(interface, {}):
+            raise FakeBluezError("org.freedesktop.DBus.Error.InvalidArgs", f"No such property '{name}'")
+        self.update(interface, **{name: value})
+
+    @dbus.service.signal(PROPERTIES_INTERFACE, signature="sa{sv}as")
+    def PropertiesChanged(self, interface, changed, invalidated):
+        pass
+
+    def update(self, interface, **changed):
+        """
+        Change properties and emit PropertiesChanged for the ones whose value differs.
+        """
+        props = self.interfaces[interface]
+        changed = {name: value for name, value in changed.items() if props.get(name) != value}
+        if changed:
+            props.update(changed)
+            self.PropertiesChanged(interface, changed, dbus.Array([], signature="s"))
+
+    def add_interface(self, interface, props):
+        """
+        Start exporting another interface on this object and emit InterfacesAdded.
+        """
+        self.interfaces[interface] = props
+        self.service.root.InterfacesAdded(self.path, {interface: props})
+
+    def remove_interface(self, interface):
+        """
+        Stop exporting an interface on this object and emit InterfacesRemoved.
+        """
+        if self.interfaces.pop(interface, None) is not None:
+            self.service.root.InterfacesRemoved(self.path, [interface])
+
+
+class FakeObjectManager(dbus.service.Object):
+    """
+    Root object implementing org.freedesktop.DBus.ObjectManager for one service.
+    """
+
+    def __init__(self, service):
+        self.service = service
+        super().__init__(service.connection, "/")
+
+    @dbus.service.method(OBJECT_MANAGER_INTERFACE, in_signature="", out_signature="a{oa{sa{sv}}}")
+    def GetManagedObjects(self):
+        return {path: obj.interfaces for path, obj in self.service.objects.items()}
+
+    @dbus.service.signal(OBJECT_MANAGER_INTERFACE, signature="oa{sa{sv}}")
+    def InterfacesAdded(self, path, interfaces):
+        pass
+
+    @dbus.service.signal(OBJECT_MANAGER_INTERFACE, signature="oas")
+    def InterfacesRemoved(self, path, interfaces):
+        pass
+
+
+class FakeService:
+    """
+    Common state of a simulated service: connection, exported objects, latency and failures.
+    """
+
+    def __init__(self, connection, bus_name, latency=0.0, jitter=0.0, failure_rate=0.0, seed=0):
+        """
+        Args:
+            connection (dbus.bus.BusConnection): Connection to export objects on.
+            bus_name (str): Well-known name to own.
+            latency (float): Seconds before a method reply is sent.
+            jitter (float): Maximum extra random seconds added to latency.
+            failure_rate (float): Probability (0..1) that a method call fails.
+            seed (int): Random seed, for reproducible runs.
+        """
+        self.connection = connection
+        self.bus_name = dbus.service.BusName(bus_name, connection)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.objects = {}
+        self.root = FakeObjectManager(self)
+
+    def export(self, obj, announce=True):
+        """
+        Register an exported object and optionally emit InterfacesAdded for it.
+        """
+        self.objects[obj.path] = obj
+        if announce:
+            self.root.InterfacesAdded(obj.path, obj.interfaces)
+
+    def unexport(self, path):
+        """
+        Remove an object and its children and emit InterfacesRemoved for each.
+        """
+        for child in [child for child in self.objects if child == path or child.startswith(path + "/")]:
+            obj = self.objects.pop(child)
+            obj.remove_from_connection()
+            self.root.InterfacesRemoved(child, list(obj.interfaces))
+
+    def complete(self, reply, error, action=None, error_name="org.bluez.Error.Failed"):
+        """
+        Finish an asynchronous method call after the configured latency.
+
+        Args:
+            reply (callable): dbus-python reply callback.
+            error (callable): dbus-python error callback.
+            action (callable): Optional function applying the method's effect; its return
+                               value is passed to reply when not None.
+            error_name (str): D-Bus error name used for simulated failures.
+        returns:
+            None
+        """
+        def finish():
+            if self.failure_rate and self.random.random() < self.failure_rate:
+                error(FakeBluezError(error_name))
+                return False
+            try:
+                result = action() if action else None
+            except dbus.DBusException as e:
+                error(e)
+                return False
+            reply(*(() if result is None else result if isinstance(result, tuple) else (result,)))
+            return False
+
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            GLib.timeout_add(int(delay * 1000), finish)
+        else:
+            finish()
+
+
+#-------------BLUEZ----------------#
+class FakeAdapter(FakeObject):
+    """
+    org.bluez.Adapter1 with simulated discovery.
+    """
+
+    def __init__(self, service, index, discovery_interval):
+        path = f"/org/bluez/hci{index}"
+        super().__init__(service, path, {
+            "org.bluez.Adapter1": {
+                "Address": dbus.String(f"00:1A:7D:DA:71:{index:02X}"),
+                "AddressType": dbus.String("public"),
+                "Name": dbus.String(f"fake-hci{index}"),
+                "Alias": dbus.String(f"fake-hci{index}"),
+                "Class": dbus.UInt32(0x6c0100),
+                "Powered": dbus.Boolean(True),
+                "Discoverable": dbus.Boolean(False),
+                "Pairable": dbus.Boolean(True),
+                "Discovering": dbus.Boolean(False),
+                "UUIDs": dbus.Array([], signature="s"),
+            },
+        })
+        self.index = index
+        self.discovery_interval = discovery_interval
+        self.discovery_timer = None
+        self.discovery_filter = {}
+        # Devices not announced yet; discovery reveals them one per tick
+        self.hidden_devices = []
+
+    @dbus.service.method("org.bluez.Adapter1", in_signature="", out_signature="",
+                         async_callbacks=("reply", "error"))
+    def StartDiscovery(self, reply, error):
+        def start():
+            if self.discovery_timer is None:
+                self.discovery_timer = GLib.timeout_add(int(self.discovery_interval * 1000), self.discovery_tick)
+            self.update("org.bluez.Adapter1", Discovering=dbus.Boolean(True))
+        self.service.complete(reply, error, start)
+
+    @dbus.service.method("org.bluez.Adapter1", in_signature="", out_signature="",
+                         async_callbacks=("reply", "error"))
+    def StopDiscovery(self, reply, error):
+        def stop():
+            if self.discovery_timer is not None:
+                GLib.source_remove(self.discovery_timer)
+                self.discovery_timer = None
+            self.update("org.bluez.Adapter1", Discovering=dbus.Boolean(False))
+        self.service.complete(reply, error, stop)
+
+    @dbus.service.method("org.bluez.Adapter1", in_signature="a{sv}", out_signature="")
+    def SetDiscoveryFilter(self, discovery_filter):
+        if "RSSI" in discovery_filter and "Pathloss" in discovery_filter:
+            raise FakeBluezError("org.bluez.Error.InvalidArguments", "RSSI and Pathloss are exclusive")
+        self.discovery_filter = dict(discovery_filter)
+
+    @dbus.service.method("org.bluez.Adapter1", in_signature="", out_signature="as")
+    def GetDiscoveryFilters(self):
+        return ["UUIDs", "RSSI", "Pathloss", "Transport", "DuplicateData", "Discoverable", "Pattern"]
+
+    @dbus.service.method("org.bluez.Adapter1", in_signature="o", out_signature="",
+                         async_callbacks=("reply", "error"))
+    def RemoveDevice(self, device, reply, error):
+        def remove():
+            if str(device) not in self.service.objects or not str(device).startswith(self.path + "/"):
+                raise FakeBluezError("org.bluez.Error.DoesNotExist", "Does Not Exist")
+            self.service.unexport(str(device))
+        self.service.complete(reply, error, remove)
+
+    def discovery_tick(self):
+        """
+        Announce one hidden device and refresh the RSSI of a few known ones.
+        """
+        if self.hidden_devices:
+            self.service.export(self.hidden_devices.pop())
+        devices = [obj for path, obj in self.service.objects.items()
+                   if isinstance(obj, FakeDevice) and path.startswith(self.path + "/")]
+        minimum_rssi = self.discovery_filter.get("RSSI")
+        for device in self.service.random.sample(devices, min(len(devices), 5)):
+            rssi = self.service.random.randint(-95, -30)
+            if minimum_rssi is None or rssi >= minimum_rssi:
+                device.update("org.bluez.Device1", RSSI=dbus.Int16(rssi))
+        return True
+
+
+class FakeDevice(FakeObject):
+    """
+    org.bluez.Device1, plus org.bluez.MediaControl1 while connected with AVRCP.
+    """
+
+    def __init__(self, service, adapter_path, number, paired=False, connected=False):
+        address = ":".join(f"{(number >> shift) & 0xFF:02X}" for shift in range(40, -8, -8))
+        address = "0A" + address[2:]
+        uuids = DEVICE_PROFILES[number % len(DEVICE_PROFILES)]
+        super().__init__(service, f"{adapter_path}/dev_{address.replace(':', '_')}", {
+            "org.bluez.Device1": {
+                "Address": dbus.String(address),
+                "AddressType": dbus.String("public"),
+                "Name": dbus.String(f"FakeDevice{number}"),
+                "Alias": dbus.String(f"FakeDevice{number}"),
+                "Class": dbus.UInt32(0x240404),
+                "Adapter": dbus.ObjectPath(adapter_path),
+                "Paired": dbus.Boolean(paired),
+                "Bonded": dbus.Boolean(paired),
+                "Trusted": dbus.Boolean(paired),
+                "Blocked": dbus.Boolean(False),
+                "Connected": dbus.Boolean(connected),
+                "ServicesResolved": dbus.Boolean(connected),
+                "LegacyPairing": dbus.Boolean(False),
+                "RSSI": dbus.Int16(-60),
+                "UUIDs": dbus.Array(uuids, signature="s"),
+            },
+        })
+        if connected:
+            self.connect_media_control()
+
+    @property
+    def has_avrcp(self):
+        return AVRCP_UUID in self.interfaces["org.bluez.Device1"]["UUIDs"]
+
+    def connect_media_control(self):
+        if self.has_avrcp and "org.bluez.MediaControl1" not in self.interfaces:
+            self.interfaces["org.bluez.MediaControl1"] = {"Connected": dbus.Boolean(True)}
+            return True
+        return False
+
+    def set_connected(self, connected):
+        self.update("org.bluez.Device1", Connected=dbus.Boolean(connected),
+                    ServicesResolved=dbus.Boolean(connected))
+        if connected and self.connect_media_control():
+            self.service.root.InterfacesAdded(self.path, {"org.bluez.MediaControl1":
+                                                          self.interfaces["org.bluez.MediaControl1"]})
+        elif not connected:
+            self.remove_interface("org.bluez.MediaControl1")
+
+    @dbus.service.method("org.bluez.Device1", in_signature="", out_signature="",
+                         async_callbacks=("reply", "error"))
+    def Pair(self, reply, error):
+        def pair():
+            if self.interfaces["org.bluez.Device1"]["Paired"]:
+                raise FakeBluezError("org.bluez.Error.AlreadyExists", "Already Exists")
+            self.update("org.bluez.Device1", Paired=dbus.Boolean(True), Bonded=dbus.Boolean(True))
+        self.service.complete(reply, error, pair, "org.bluez.Error.AuthenticationFailed")
+
+    @dbus.service.method("org.bluez.Device1", in_signature="", out_signature="")
+    def CancelPairing(self):
+        pass
+
+    @dbus.service.method("org.bluez.Device1", in_signature="", out_signature="",
+                         async_callbacks=("reply", "error"))
+    def Connect(self, reply, error):
+        self.service.complete(reply, error, lambda: self.set_connected(True))
+
+    @dbus.service.method("org.bluez.Device1", in_signature="", out_signature="",
+                         async_callbacks=("reply", "error"))
+    def Disconnect(self, reply, error):
+        self.service.complete(reply, error, lambda: self.set_connected(False))
+
+    @dbus.service.method("org.bluez.Device1", in_signature="s", out_signature="",
+                         async_callbacks=("reply", "error"))
+    def ConnectProfile(self, uuid, reply, error):
+        def connect():
+            if str(uuid).lower() not in self.interfaces["org.bluez.Device1"]["UUIDs"]:
+                raise FakeBluezError("org.bluez.Error.NotAvailable", "Profile not available")
+            self.set_connected(True)
+        self.service.complete(reply, error, connect)
+
+    @dbus.service.method("org.bluez.Device1", in_signature="s", out_signature="",
+                         async_callbacks=("reply", "error"))
+    def DisconnectProfile(self, uuid, reply, error):
+        self.service.complete(reply, error, lambda: self.set_connected(False))
+
+    def media_command(self, reply, error):
+        if "org.bluez.MediaControl1" not in self.interfaces:
+            error(FakeBluezError("org.bluez.Error.NotConnected", "Not Connected"))
+            return
+        self.service.complete(reply, error)
+
+    @dbus.service.method("org.bluez.MediaControl1", in_signature="", out_signature="",
+                         async_callbacks=("reply", "error"))
+    def Play(self, reply, error):
+        self.media_command(reply, error)
+
+    @dbus.service.method("org.bluez.MediaControl1", in_signature="", out_signature="",
+                         async_callbacks=("reply", "error"))
+    def Pause(self, reply, error):
+        self.media_command(reply, error)
+
+    @dbus.service.method("org.bluez.MediaControl1", in_signature="", out_signature="",
+                         async_callbacks=("reply", "error"))
+    def Stop(self, reply, error):
+        self.media_command(reply, error)
+
+    @dbus.service.method("org.bluez.MediaControl1", in_signature="", out_signature="",
+                         async_callbacks=("reply", "error"))
+    def Next(self, reply, error):
+        self.media_command(reply, error)
+
+    @dbus.service.method("org.bluez.MediaControl1", in_signature="", out_signature="",
+                         async_callbacks=("reply", "error"))
+    def Previous(self, reply, error):
+        self.media_command(reply, error)
+
+    @dbus.service.method("org.bluez.MediaControl1", in_signature="", out_signature="",
+                         async_callbacks=("reply", "error"))
+    def Rewind(self, reply, error):
+        self.media_command(reply, error)
+
+    @dbus.service.method("org.bluez.MediaControl1", in_signature="", out_signature="",
+                         async_callbacks=("reply", "error"))
+    def FastForward(self, reply, error):
+        self.media_command(reply, error)
+
+
+class FakeBluez(FakeService):
+    """
+    Simulated bluetoothd: adapters hci0..hciN-1, each with a share of the devices.
+    """
+
+    def __init__(self, connection, adapters=1, devices=100, hidden_devices=0, paired_ratio=0.1,
+                 connected_ratio=0.05, discovery_interval=0.1, **options):
+        """
+        Args:
+            connection (dbus.bus.BusConnection): Connection to export objects on.
+            adapters (int): Number of adapters.
+            devices (int): Devices known at startup, spread over the adapters.
+            hidden_devices (int): Extra devices per adapter revealed one by one during discovery.
+            paired_ratio (float): Share of startup devices that are paired.
+            connected_ratio (float): Share of startup devices that are connected.
+            discovery_interval (float): Seconds between discovery ticks.
+            **options: latency, jitter, failure_rate and seed, see FakeService.
+        """
+        super().__init__(connection, "org.bluez", **options)
+        number = 0
+        for index in range(adapters):
+            adapter = FakeAdapter(self, index, discovery_interval)
+            self.export(adapter, announce=False)
+            for _ in range(devices // adapters + (1 if index < devices % adapters else 0)):
+                self.export(FakeDevice(self, adapter.path, number,
+                                       paired=self.random.random() < paired_ratio,
+                                       connected=self.random.random() < connected_ratio), announce=False)
+                number += 1
+            for _ in range(hidden_devices):
+                adapter.hidden_devices.append(FakeDevice(self, adapter.path, number))
+                number += 1
+
+
+#-------------OBEX----------------#
+class FakeObexClient(FakeObject):
+    """
+    org.bluez.obex.Client1 creating Object Push sessions.
+    """
+
+    def __init__(self, service):
+        super().__init__(service, "/org/bluez/obex", {"org.bluez.obex.Client1": {}})
+        self.session_count = 0
+
+    @dbus.service.method("org.bluez.obex.Client1", in_signature="sa{sv}", out_signature="o",
+                         async_callbacks=("reply", "error"))
+    def CreateSession(self, destination, args, reply, error):
+        def create():
+            session = FakeObexSession(self.service, f"/org/bluez/obex/client/session{self.session_count}",
+                                      str(destination), str(args.get("Target", "opp")))
+            self.session_count += 1
+            self.service.export(session)
+            return dbus.ObjectPath(session.path)
+        self.service.complete(reply, error, create, "org.bluez.obex.Error.Failed")
+
+    @dbus.service.method("org.bluez.obex.Client1", in_signature="o", out_signature="")
+    def RemoveSession(self, session):
+        if str(session) not in self.service.objects:
+            raise FakeBluezError("org.bluez.obex.Error.InvalidArguments", "Invalid Arguments")
+        self.service.unexport(str(session))
+
+
+class FakeObexSession(FakeObject):
+    """
+    org.bluez.obex.Session1 and ObjectPush1; each SendFile() creates a Transfer1 object.
+    """
+
+    def __init__(self, service, path, destination, target):
+        super().__init__(service, path, {
+            "org.bluez.obex.Session1": {
+                "Destination": dbus.String(destination),
+                "Target": dbus.String(target),
+            },
+            "org.bluez.obex.ObjectPush1": {},
+        })
+        self.transfer_count = 0
+
+    @dbus.service.method("org.bluez.obex.ObjectPush1", in_signature="s", out_signature="oa{sv}")
+    def SendFile(self, sourcefile):
+        if not os.path.isfile(sourcefile):
+            raise FakeBluezError("org.bluez.obex.Error.Failed", f"Unable to open {sourcefile}")
+        transfer = FakeObexTransfer(self.service, f"{self.path}/transfer{self.transfer_count}", self.path,
+                                    str(sourcefile))
+        self.transfer_count += 1
+        self.service.export(transfer)
+        transfer.start()
+        return dbus.ObjectPath(transfer.path), transfer.interfaces["org.bluez.obex.Transfer1"]
+
+
+class FakeObexTransfer(FakeObject):
+    """
+    org.bluez.obex.Transfer1 going queued -> active -> complete/error.
+    """
+
+    def __init__(self, service, path, session_path, filename):
+        size = os.path.getsize(filename)
+        super().__init__(service, path, {
+            "org.bluez.obex.Transfer1": {
+                "Status": dbus.String("queued"),
+                "Session": dbus.ObjectPath(session_path),
+                "Name": dbus.String(os.path.basename(filename)),
+                "Filename": dbus.String(filename),
+                "Size": dbus.UInt64(size),
+                "Transferred": dbus.UInt64(0),
+            },
+        })
+
+    def start(self):
+        """
+        Run the transfer: active now, complete or error after the service latency.
+        """
+        self.update("org.bluez.obex.Transfer1", Status=dbus.String("active"))
+
+        def finish(*_):
+            size = self.interfaces["org.bluez.obex.Transfer1"]["Size"]
+            self.update("org.bluez.obex.Transfer1", Transferred=dbus.UInt64(size), Status=dbus.String("complete"))
+
+        def fail(_error):
+            self.update("org.bluez.obex.Transfer1", Status=dbus.String("error"))
+
+        self.service.complete(finish, fail)
+
+
+class FakeObex(FakeService):
+    """
+    Simulated obexd client service.
+    """
+
+    def __init__(self, connection, **options):
+        super().__init__(connection, "org.bluez.obex", **options)
+        self.export(FakeObexClient(self), announce=False)
+
+
+#-------------ENVIRONMENT----------------#
+def run_service(address, **options):
+    """
+    Export the fake org.bluez and org.bluez.obex services on a bus and serve forever.
+
+    Prints 'READY' on stdout once both names are owned.
+
+    Args:
+        address (str): D-Bus address of the bus to use.
+        **options: Keyword arguments for FakeBluez; latency, jitter, failure_rate and
+                   seed also apply to FakeObex.
+    returns:
+        None
+    """
+    dbus.mainloop.glib.DBusGMainLoop(set_as_default=True)
+    bluez_connection = dbus.bus.BusConnection(address)
+    obex_connection = dbus.bus.BusConnection(address)
+    services = [
+        FakeBluez(bluez_connection, **options),
+        FakeObex(obex_connection, **{key: options[key] for key in ("latency", "jitter", "failure_rate", "seed")
+                                     if key in options}),
+    ]
+    loop = GLib.MainLoop()
+    GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signal.SIGTERM, loop.quit)
+    print("READY", flush=True)
+    loop.run()
+    return services
+
+
+class FakeBluezEnvironment:
+    """
+    Private dbus-daemon with the fake services, for use as a context manager.
+
+    While active, DBUS_SYSTEM_BUS_ADDRESS and DBUS_SESSION_BUS_ADDRESS point at the private
+    bus, so dbus.SystemBus() and dbus.SessionBus() created afterwards in this process (and
+    in children) talk to the fake services. Create it before the first bus connection is
+    made, since dbus-python shares one connection per bus type.
+    """
+
+    def __init__(self, startup_timeout=120, **options):
+        """
+        Args:
+            startup_timeout (float): Seconds to wait for the service to export its objects.
+            **options: Service options, see FakeBluez (adapters, devices, latency, ...).
+        """
+        self.startup_timeout = startup_timeout
+        self.options = options
+        self.directory = None
+        self.daemon = None
+        self.service = None
+        self.address = None
+        self.saved_environment = {}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def start(self):
+        """
+        Start the private bus and the service process and wait until the service is ready.
+
+        args: None
+        Returns:
+            FakeBluezEnvironment: self.
+        Raises:
+            RuntimeError: If the bus or the service does not come up.
+        """
+        self.directory = tempfile.mkdtemp(prefix="fake-bluez-")
+        config_path = os.path.join(self.directory, "bus.conf")
+        with open(config_path, "w") as config:
+            config.write(BUS_CONFIG.format(directory=self.directory))
+        self.daemon = subprocess.Popen(["dbus-daemon", f"--config-file={config_path}", "--nofork",
+                                        "--print-address=1"], stdout=subprocess.PIPE, text=True)
+        self.address = self.daemon.stdout.readline().strip()
+        if not self.address:
+            self.stop()
+            raise RuntimeError("dbus-daemon did not report its address")
+
+        command = [sys.executable, os.path.abspath(__file__), "--address", self.address]
+        for name, value in self.options.items():
+            command += [f"--{name.replace('_', '-')}", str(value)]
+        self.service = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+        deadline = time.monotonic() + self.startup_timeout
+        line = ""
+        while time.monotonic() < deadline and self.service.poll() is None:
+            line = self.service.stdout.readline().strip()
+            if line == "READY":
+                break
+        if line != "READY":
+            self.stop()
+            raise RuntimeError("Fake BlueZ service did not start")
+
+        for variable in ("DBUS_SYSTEM_BUS_ADDRESS", "DBUS_SESSION_BUS_ADDRESS"):
+            self.saved_environment[variable] = os.environ.get(variable)
+            os.environ[variable] = self.address
+        return self
+
+    def stop(self):
+        """
+        Stop the service and the private bus and restore the bus environment variables.
+
+        args: None
+        returns: None
+        """
+        for process in (self.service, self.daemon):
+            if process and process.poll() is None:
+                process.terminate()
+                try:
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+        self.service = self.daemon = None
+        for variable, value in self.saved_environment.items():
+            if value is None:
+                os.environ.pop(variable, None)
+            else:
+                os.environ[variable] = value
+        self.saved_environment = {}
+        if self.directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+
+
+#-------------SMOKE TEST----------------#
+SMOKE_OPTIONS = {"adapters": 2, "devices": 20, "hidden_devices": 1, "paired_ratio": 0.5,
+                 "connected_ratio": 0.5, "discovery_interval": 0.05, "seed": 1}
+
+
+def wait_until(condition, timeout=5.0):
+    """
+    Args:
+        condition (callable): Polled until it returns a true value.
+        timeout (float): Seconds to keep polling.
+    Returns:
+        The last value returned by condition.
+    """
+    deadline = time.monotonic() + timeout
+    result = condition()
+    while not result and time.monotonic() < deadline:
+        time.sleep(0.05)
+        result = condition()
+    return result
+
+
+def run_smoke_test():
+    """
+    Start a small fake environment and exercise it over D-Bus like BluetoothDeviceManager does.
+
+    args: None
+    Returns:
+        bool: True if every check passed.
+    """
+    failures = 0
+
+    def check(name, passed, detail=""):
+        nonlocal failures
+        print(f"{'ok  ' if passed else 'FAIL'} {name}{f' ({detail})' if detail else ''}", flush=True)
+        failures += not passed
+
+    with FakeBluezEnvironment(startup_timeout=30, **SMOKE_OPTIONS) as environment:
+        bus = dbus.bus.BusConnection(environment.address)
+        root = dbus.Interface(bus.get_object("org.bluez", "/"), OBJECT_MANAGER_INTERFACE)
+
+        def devices(adapter_path):
+            return {path: interfaces["org.bluez.Device1"] for path, interfaces in root.GetManagedObjects().items()
+                    if "org.bluez.Device1" in interfaces and path.startswith(adapter_path + "/")}
+
+        objects = root.GetManagedObjects()
+        adapters = sorted(path for path, interfaces in objects.items() if "org.bluez.Adapter1" in interfaces)
+        check("adapters exported", adapters == ["/org/bluez/hci0", "/org/bluez/hci1"], ", ".join(adapters))
+        known = devices(adapters[0])
+        check("devices exported", len(known) == SMOKE_OPTIONS["devices"] // 2, f"{len(known)} on hci0")
+
+        properties = dbus.Interface(bus.get_object("org.bluez", adapters[0]), PROPERTIES_INTERFACE)
+        check("Properties.Get", properties.Get("org.bluez.Adapter1", "Powered") == True)
+
+        adapter = dbus.Interface(bus.get_object("org.bluez", adapters[0]), "org.bluez.Adapter1")
+        adapter.StartDiscovery()
+        revealed = wait_until(lambda: len(devices(adapters[0])) > len(known))
+        adapter.StopDiscovery()
+        check("discovery reveals hidden devices", revealed)
+
+        path, props = next((path, props) for path, props in known.items() if not props["Connected"])
+        device = dbus.Interface(bus.get_object("org.bluez", path), "org.bluez.Device1")
+        device.Connect()
+        check("Device1.Connect", devices(adapters[0])[path]["Connected"] == True, str(props["Address"]))
+        adapter.RemoveDevice(path)
+        check("Adapter1.RemoveDevice", path not in devices(adapters[0]))
+        try:
+            adapter.RemoveDevice(path)
+            check("RemoveDevice of a removed device fails", False)
+        except dbus.DBusException as e:
+            check("RemoveDevice of a removed device fails", e.get_dbus_name() == "org.bluez.Error.DoesNotExist",
+                  e.get_dbus_name())
+
+        client = dbus.Interface(bus.get_object("org.bluez.obex", "/org/bluez/obex"), "org.bluez.obex.Client1")
+        session_path = client.CreateSession(str(props["Address"]), {"Target": "opp"})
+        push = dbus.Interface(bus.get_object("org.bluez.obex", session_path), "org.bluez.obex.ObjectPush1")
+        transfer_path, _ = push.SendFile(os.path.abspath(__file__))
+        transfer = dbus.Interface(bus.get_object("org.bluez.obex", transfer_path), PROPERTIES_INTERFACE)
+        status = wait_until(lambda: transfer.Get("org.bluez.obex.Transfer1", "Status") == "complete")
+        check("obex transfer completes", status)
+        client.RemoveSession(session_path)
+        bus.close()
+
+    print(f"{'SMOKE OK' if not failures else f'SMOKE FAILED: {failures} check(s)'}", flush=True)
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake BlueZ/obexd D-Bus services for offline testing")
+    parser.add_argument("--address", help="D-Bus address of the bus to serve on; a private bus is started if omitted")
+    parser.add_argument("--smoke", action="store_true", help="Run a quick self-check on a private bus and exit")
+    parser.add_argument("--adapters", type=int, default=1)
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--hidden-devices", type=int, default=0)
+    parser.add_argument("--paired-ratio", type=float, default=0.1)
+    parser.add_argument("--connected-ratio", type=float, default=0.05)
+    parser.add_argument("--discovery-interval", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = vars(parser.parse_args())
+    if args.pop("smoke"):
+        sys.exit(0 if run_smoke_test() else 1)
+    address = args.pop("address")
+    if address:
+        run_service(address, **args)
+        return
+    with FakeBluezEnvironment(**args) as environment:
+        print(f"export DBUS_SYSTEM_BUS_ADDRESS={environment.address}")
+        print(f"export DBUS_SESSION_BUS_ADDRESS={environment.address}", flush=True)
+        try:
+            environment.service.wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
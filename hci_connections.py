@@ -0,0 +1,197 @@
+"""
+Live table of a controller's connection handles, kept from HCI events.
+
+ConnectionHandleTracker reads Connection Complete, LE (Enhanced) Connection Complete and
+Disconnection Complete events from a raw HCI socket on a background thread, so looking
+up the handles no longer runs 'hcitool con'. Listeners are told whenever a link comes
+or goes; they run on the reader thread, so UI code must hand the update over to its
+own thread.
+"""
+import select
+import socket
+import struct
+import threading
+
+from Backend_lib.Linux.hci_events import ConnectionComplete
+from Backend_lib.Linux.hci_events import DisconnectionComplete
+from Backend_lib.Linux.hci_events import EVT_CONN_COMPLETE
+from Backend_lib.Linux.hci_events import EVT_DISCONN_COMPLETE
+from Backend_lib.Linux.hci_events import EVT_LE_META_EVENT
+from Backend_lib.Linux.hci_events import HCI_EVENT_PKT
+from Backend_lib.Linux.hci_events import LeConnectionComplete
+from Backend_lib.Linux.hci_events import decode_event
+from Backend_lib.Linux.hci_transport import BTPROTO_HCI
+from Backend_lib.Linux.hci_transport import HCI_FILTER
+from Backend_lib.Linux.hci_transport import SOL_HCI
+
+# Link_Type of Connection Complete, named as 'hcitool con' does
+LINK_TYPE_NAMES = {0x00: "SCO", 0x01: "ACL", 0x02: "eSCO"}
+
+# Seconds the reader thread blocks before checking whether it was stopped
+EVENT_POLL_INTERVAL = 0.5
+
+
+class ConnectionHandleTracker:
+    """
+    Keeps the connection handles of one controller up to date from HCI events.
+    """
+
+    def __init__(self, interface, log):
+        """
+        Args:
+            interface (str): Controller interface like 'hci0'.
+            log: Logger for reader errors.
+        """
+        self.interface = interface
+        self.log = log
+        self.lock = threading.Lock()
+        # handle -> label like 'ACL 11:22:33:44:55:66 handle 256'
+        self.connections = {}
+        self.listeners = []
+        self.sock = None
+        self.thread = None
+        self.stopped = threading.Event()
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        """
+        Open the event socket and start the reader thread.
+
+        args: None
+        Returns:
+            bool: True if events are being read, False if the raw socket is unavailable.
+        """
+        if self.running:
+            return True
+        if not hasattr(socket, "AF_BLUETOOTH"):
+            self.log.info("AF_BLUETOOTH sockets are not supported; connection handles are polled")
+            return False
+        try:
+            self.sock = socket.socket(socket.AF_BLUETOOTH, socket.SOCK_RAW, BTPROTO_HCI)
+            self.sock.bind((int(self.interface.replace("hci", "")),))
+            # struct hci_filter { type_mask; event_mask[2]; opcode }, padded to 16 bytes
+            event_mask = (1 << EVT_CONN_COMPLETE) | (1 << EVT_DISCONN_COMPLETE) | (1 << EVT_LE_META_EVENT)
+            self.sock.setsockopt(SOL_HCI, HCI_FILTER, struct.pack("<IIIH2x", 1 << HCI_EVENT_PKT,
+                                                                  event_mask & 0xFFFFFFFF, event_mask >> 32, 0))
+        except (OSError, ValueError) as e:
+            self.log.info(f"Cannot read HCI events on {self.interface} ({e}); connection handles are polled")
+            if self.sock:
+                self.sock.close()
+                self.sock = None
+            return False
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._read_events, name=f"hci-connections-{self.interface}",
+                                       daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """
+        Stop the reader thread and close the socket.
+
+        args: None
+        returns: None
+        """
+        self.stopped.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(EVENT_POLL_INTERVAL * 2)
+        self.thread = None
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+    def add_listener(self, callback):
+        """
+        Args:
+            callback (callable): Called with the handles dict (see snapshot()) on every change.
+        returns:
+            None
+        """
+        if callback not in self.listeners:
+            self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """
+        Args:
+            callback (callable): A callback passed to add_listener().
+        returns:
+            None
+        """
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def seed(self, handles):
+        """
+        Replace the table, e.g. with what 'hcitool con' reports for links made before
+        the tracker started.
+
+        Args:
+            handles (dict): Label -> hex handle string, as returned by snapshot().
+        returns:
+            None
+        """
+        with self.lock:
+            self.connections = {int(handle, 16): label for label, handle in handles.items()}
+        self._notify()
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Label -> handle as a hex string, e.g. {'ACL 11:22:33:44:55:66 handle 256': '0x100'}.
+        """
+        with self.lock:
+            return {label: hex(handle) for handle, label in self.connections.items()}
+
+    def on_event(self, event):
+        """
+        Update the table from a decoded HCI event; other events are ignored.
+
+        Args:
+            event (HciEvent): Event from hci_events.decode_event().
+        returns:
+            None
+        """
+        if getattr(event, "status", None) != 0:
+            return
+        if isinstance(event, ConnectionComplete):
+            label = f"{LINK_TYPE_NAMES.get(event.link_type, 'ACL')} {event.address} handle {event.handle}"
+        elif isinstance(event, LeConnectionComplete):
+            label = f"LE {event.peer_address} handle {event.handle}"
+        elif isinstance(event, DisconnectionComplete):
+            with self.lock:
+                if self.connections.pop(event.handle, None) is None:
+                    return
+            self._notify()
+            return
+        else:
+            return
+        with self.lock:
+            self.connections[event.handle] = label
+        self._notify()
+
+    def _notify(self):
+        handles = self.snapshot()
+        for callback in list(self.listeners):
+            try:
+                callback(handles)
+            except Exception as e:
+                self.log.error(f"Connection handle listener failed: {e}")
+
+    def _read_events(self):
+        sock = self.sock
+        while not self.stopped.is_set():
+            try:
+                if not select.select([sock], [], [], EVENT_POLL_INTERVAL)[0]:
+                    continue
+                packet = sock.recv(260)
+            except (OSError, ValueError) as e:
+                if not self.stopped.is_set():
+                    self.log.error(f"Reading HCI events on {self.interface} failed: {e}")
+                return
+            try:
+                self.on_event(decode_event(packet))
+            except ValueError as e:
+                self.log.debug(f"Ignoring HCI event: {e}")
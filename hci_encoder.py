@@ -0,0 +1,235 @@
+import struct
+
+from Backend_lib.Linux import hci_commands as hci
+from Backend_lib.Linux.hci_transport import HCI_COMMAND_PKT
+from Backend_lib.Linux.hci_transport import make_opcode
+
+# Parameter widths struct can pack natively as little-endian unsigned ints
+STRUCT_CODES = {1: "B", 2: "H", 4: "I", 8: "Q"}
+
+
+def parse_parameter_value(value):
+    """
+    Args:
+        value (int, str or bytes): int, '0x..' hex string, decimal string or raw bytes.
+    Returns:
+        int or bytes: The value as an int, or the bytes unchanged.
+    Raises:
+        ValueError: If a string is neither hex nor decimal.
+    """
+    if isinstance(value, (int, bytes, bytearray)):
+        return value
+    value = str(value).strip()
+    return int(value, 16) if value.lower().startswith("0x") else int(value)
+
+
+class CompiledCommand:
+    """
+    One hci_commands entry compiled to a struct layout.
+
+    Packets are packed in a single struct call: header (packet type, opcode, length)
+    followed by the fields, with widths the struct module cannot pack natively (3-octet
+    LAP, 6-octet BD_ADDR, 248-octet names...) stored as fixed-size byte strings. Fields
+    without a size in the table carry their hex digits as given and make the command
+    variable length.
+    """
+
+    __slots__ = ("group", "name", "ogf", "ocf", "opcode", "fields", "defaults", "struct", "native", "length")
+
+    def __init__(self, group, name, ogf, ocf, fields, defaults):
+        """
+        Args:
+            group (str): Command group, e.g. 'Link Control'.
+            name (str): Command name, e.g. 'Disconnect'.
+            ogf (int): Opcode Group Field.
+            ocf (int): Opcode Command Field.
+            fields (tuple): (parameter name, size in octets or None) in packet order.
+            defaults (tuple): Default value of each parameter from the table.
+        """
+        self.group = group
+        self.name = name
+        self.ogf = ogf
+        self.ocf = ocf
+        self.opcode = make_opcode(ogf, ocf)
+        self.fields = fields
+        self.defaults = defaults
+        # Per field: True if packed from an int, False if from a byte string
+        self.native = tuple(size in STRUCT_CODES for _, size in fields)
+        if all(size is not None for _, size in fields):
+            self.length = sum(size for _, size in fields)
+            self.struct = struct.Struct("<BHB" + "".join(STRUCT_CODES.get(size) or f"{size}s" for _, size in fields))
+        else:
+            self.length = None
+            self.struct = None
+
+    def pack(self, parameters=()):
+        """
+        Build the command packet.
+
+        Args:
+            parameters (sequence): One value per field (int, '0x..'/decimal string or bytes).
+                                   Trailing parameters may be left out, as before.
+        Returns:
+            bytes: HCI command packet including the packet type indicator.
+        Raises:
+            ValueError: Too many parameters, or a value that is malformed or does not fit.
+        """
+        if self.struct is not None and len(parameters) == len(self.fields):
+            values = [self._field_value(index, value) for index, value in enumerate(parameters)]
+            try:
+                return self.struct.pack(HCI_COMMAND_PKT, self.opcode, self.length, *values)
+            except struct.error as e:
+                raise ValueError(f"{self.name}: {e}")
+        body = self.pack_parameters(parameters)
+        return struct.pack("<BHB", HCI_COMMAND_PKT, self.opcode, len(body)) + body
+
+    def pack_parameters(self, parameters=()):
+        """
+        Encode the parameters alone, without the packet header.
+
+        Returns:
+            bytes: Parameter bytes.
+        Raises:
+            ValueError: As for pack().
+        """
+        if len(parameters) > len(self.fields):
+            raise ValueError(f"{self.name} takes {len(self.fields)} parameters, got {len(parameters)}")
+        encoded = bytearray()
+        for index, value in enumerate(parameters):
+            name, size = self.fields[index]
+            if size is None:
+                digits = str(value).lower().replace("0x", "").replace(" ", "")
+                try:
+                    encoded += bytes.fromhex(digits if len(digits) % 2 == 0 else "0" + digits)
+                except ValueError:
+                    raise ValueError(f"{self.name}: {name} must be hex digits, got {value!r}")
+                continue
+            value = self._field_value(index, value)
+            encoded += value if isinstance(value, bytes) else value.to_bytes(size, "little")
+        return bytes(encoded)
+
+    def pack_many(self, rows):
+        """
+        Build one packet per row of parameters, for sweeps and scripts.
+
+        Rows of ints for commands whose fields are all 1, 2, 4 or 8 octets go straight to
+        struct; other rows go through pack().
+
+        Args:
+            rows (iterable): Parameter sequences.
+        Returns:
+            list: bytes packets in row order.
+        Raises:
+            ValueError: On the first row that does not encode.
+        """
+        if self.struct is None or not all(self.native):
+            return [self.pack(row) for row in rows]
+        pack = self.struct.pack
+        header = (HCI_COMMAND_PKT, self.opcode, self.length)
+        try:
+            return [pack(*header, *row) for row in rows]
+        except struct.error:
+            # Strings, short rows or out-of-range values; redo with conversion and checks
+            return [self.pack(row) for row in rows]
+
+    def _field_value(self, index, value):
+        name, size = self.fields[index]
+        try:
+            value = parse_parameter_value(value)
+        except ValueError:
+            raise ValueError(f"{self.name}: {name} must be a hex or decimal number, got {value!r}")
+        if isinstance(value, (bytes, bytearray)):
+            if len(value) != size:
+                raise ValueError(f"{self.name}: {name} is {size} octets, got {len(value)}")
+            value = int.from_bytes(value, "little") if self.native[index] else bytes(value)
+            return value
+        if not 0 <= value < 1 << (8 * size):
+            raise ValueError(f"{self.name}: {name} does not fit in {size} octets: 0x{value:x}")
+        return value if self.native[index] else value.to_bytes(size, "little")
+
+    def __repr__(self):
+        return f"CompiledCommand({self.group}/{self.name}, opcode=0x{self.opcode:04x}, fields={self.fields})"
+
+
+class HciCommandEncoder:
+    """
+    Compiles the hci_commands tables into CompiledCommands, each entry once on first use.
+    """
+
+    def __init__(self, tables=hci):
+        """
+        Args:
+            tables: Module (or object) with hci_commands and one table per group.
+        """
+        self.tables = tables
+        # (group, command) -> CompiledCommand
+        self.commands = {}
+
+    def get(self, group, command):
+        """
+        Args:
+            group (str): Command group as listed in hci_commands, e.g. 'Link Control'.
+            command (str): Command name within the group.
+        Returns:
+            CompiledCommand: The compiled command.
+        Raises:
+            KeyError: If the group or command is not in the tables.
+        """
+        compiled = self.commands.get((group, command))
+        if compiled is None:
+            compiled = self.commands[(group, command)] = self._compile(group, command)
+        return compiled
+
+    def compile_all(self):
+        """
+        Compile every command of every group.
+
+        Returns:
+            dict: (group, command) -> CompiledCommand.
+        """
+        for group in self.tables.hci_commands:
+            for command in getattr(self.tables, group.lower().replace(' ', '_')):
+                self.get(group, command)
+        return dict(self.commands)
+
+    def encode(self, group, command, parameters=()):
+        """
+        Returns:
+            bytes: HCI command packet, see CompiledCommand.pack().
+        """
+        return self.get(group, command).pack(parameters)
+
+    def _compile(self, group, command):
+        try:
+            table = getattr(self.tables, group.lower().replace(' ', '_'))
+            ogf = self.tables.hci_commands[group]
+        except AttributeError:
+            raise KeyError(group)
+        ocf, parameters = table[command]
+        fields, defaults = [], []
+        for parameter in parameters:
+            items = list(parameter.items())
+            size = items[1][1] if len(items) > 1 else None
+            fields.append((items[0][0], int(size) if size is not None else None))
+            defaults.append(items[0][1])
+        return CompiledCommand(group, command, int(ogf, 16), int(ocf, 16), tuple(fields), tuple(defaults))
+
+
+hci_encoder = HciCommandEncoder()
+
+
+def encode_command(group, command, parameters=None):
+    """
+    Look up a command in hci_commands and encode its parameters.
+
+    Args:
+        group (str): Command group as listed in hci.hci_commands, e.g. 'Link Control'.
+        command (str): Command name within the group, e.g. 'Disconnect'.
+        parameters (list): Parameter values in table order.
+    Returns:
+        tuple: (ogf, ocf, parameter bytes).
+    Raises:
+        ValueError: If a parameter is malformed or does not fit its field.
+    """
+    compiled = hci_encoder.get(group, command)
+    return compiled.ogf, compiled.ocf, compiled.pack_parameters(parameters or [])
@@ -0,0 +1,454 @@
+import struct
+
+HCI_EVENT_PKT = 0x04
+
+EVT_CONN_COMPLETE = 0x03
+EVT_DISCONN_COMPLETE = 0x05
+EVT_CMD_COMPLETE = 0x0E
+EVT_CMD_STATUS = 0x0F
+EVT_NUM_COMP_PKTS = 0x13
+EVT_LE_META_EVENT = 0x3E
+
+EVT_LE_CONN_COMPLETE = 0x01
+EVT_LE_ADVERTISING_REPORT = 0x02
+EVT_LE_CONN_UPDATE_COMPLETE = 0x03
+EVT_LE_ENHANCED_CONN_COMPLETE = 0x0A
+
+EVENT_NAMES = {
+    EVT_CONN_COMPLETE: "Connection Complete",
+    EVT_DISCONN_COMPLETE: "Disconnection Complete",
+    EVT_CMD_COMPLETE: "Command Complete",
+    EVT_CMD_STATUS: "Command Status",
+    EVT_NUM_COMP_PKTS: "Number Of Completed Packets",
+    EVT_LE_META_EVENT: "LE Meta",
+}
+
+LE_SUBEVENT_NAMES = {
+    EVT_LE_CONN_COMPLETE: "LE Connection Complete",
+    EVT_LE_ADVERTISING_REPORT: "LE Advertising Report",
+    EVT_LE_CONN_UPDATE_COMPLETE: "LE Connection Update Complete",
+    EVT_LE_ENHANCED_CONN_COMPLETE: "LE Enhanced Connection Complete",
+}
+
+# Error codes from Core Specification Vol 1 Part F
+STATUS_NAMES = {
+    0x00: "Success",
+    0x01: "Unknown HCI Command",
+    0x02: "Unknown Connection Identifier",
+    0x04: "Page Timeout",
+    0x05: "Authentication Failure",
+    0x06: "PIN or Key Missing",
+    0x07: "Memory Capacity Exceeded",
+    0x08: "Connection Timeout",
+    0x0C: "Command Disallowed",
+    0x0D: "Connection Rejected due to Limited Resources",
+    0x11: "Unsupported Feature or Parameter Value",
+    0x12: "Invalid HCI Command Parameters",
+    0x13: "Remote User Terminated Connection",
+    0x16: "Connection Terminated By Local Host",
+    0x1A: "Unsupported Remote Feature",
+    0x22: "LMP/LL Response Timeout",
+    0x3B: "Unacceptable Connection Parameters",
+    0x3E: "Connection Failed to be Established",
+}
+
+# Return parameters after the status, per opcode. Besides struct codes: A = BD_ADDR,
+# N = 248-octet UTF-8 name, C = 3-octet Class of Device
+COMMAND_RETURN_LAYOUTS = {
+    0x0C14: (("Local_Name", "N"),),                                    # Read_Local_Name
+    0x0C15: (("Connection_Accept_Timeout", "H"),),
+    0x0C17: (("Page_Timeout", "H"),),
+    0x0C19: (("Scan_Enable", "B"),),
+    0x0C23: (("Class_Of_Device", "C"),),
+    0x1001: (("HCI_Version", "B"), ("HCI_Subversion", "H"), ("LMP_Version", "B"),
+             ("Company_Identifier", "H"), ("LMP_Subversion", "H")),      # Read_Local_Version_Information
+    0x1002: (("Supported_Commands", "64s"),),
+    0x1003: (("LMP_Features", "8s"),),
+    0x1005: (("ACL_Data_Packet_Length", "H"), ("Synchronous_Data_Packet_Length", "B"),
+             ("Total_Num_ACL_Data_Packets", "H"), ("Total_Num_Synchronous_Data_Packets", "H")),
+    0x1009: (("BD_ADDR", "A"),),                                       # Read_BD_ADDR
+    0x1405: (("Connection_Handle", "H"), ("RSSI", "b")),                # Read_RSSI
+    0x2002: (("LE_ACL_Data_Packet_Length", "H"), ("Total_Num_LE_ACL_Data_Packets", "B")),
+    0x2003: (("LE_Features", "8s"),),
+    0x2007: (("TX_Power_Level", "b"),),
+    0x200F: (("Filter_Accept_List_Size", "B"),),
+    0x2018: (("Random_Number", "8s"),),                                # LE_Rand
+    0x201C: (("LE_States", "8s"),),
+}
+
+# Fields shown in hex by describe()
+HEX_FIELDS = ("opcode", "handle", "Connection_Handle", "Company_Identifier", "Class_Of_Device")
+
+
+def format_bd_addr(data):
+    """
+    Args:
+        data (bytes): 6-octet address as sent over HCI (little endian).
+    Returns:
+        str: Address like 'AA:BB:CC:DD:EE:FF'.
+    """
+    return ":".join(f"{octet:02X}" for octet in reversed(data))
+
+
+def _decode_name(data):
+    return data.split(b"\x00", 1)[0].decode("utf-8", "replace")
+
+
+def _compile_layout(fields):
+    codes, converters = [], []
+    for name, code in fields:
+        if code == "A":
+            codes.append("6s")
+            converters.append((name, format_bd_addr))
+        elif code == "N":
+            codes.append("248s")
+            converters.append((name, _decode_name))
+        elif code == "C":
+            codes.append("3s")
+            converters.append((name, lambda data: int.from_bytes(data, "little")))
+        else:
+            codes.append(code)
+            converters.append((name, None))
+    return struct.Struct("<" + "".join(codes)), tuple(converters)
+
+
+# Compiled once: opcode -> (struct.Struct, ((name, converter or None), ...))
+_return_layouts = {opcode: _compile_layout(fields) for opcode, fields in COMMAND_RETURN_LAYOUTS.items()}
+
+
+class HciEvent:
+    """
+    An HCI event. Events without a dedicated decoder are returned as this class.
+    """
+
+    __slots__ = ("code", "parameters", "raw")
+
+    # Attributes listed by describe()
+    FIELDS = ()
+
+    def __init__(self, code, parameters, raw):
+        """
+        Args:
+            code (int): Event code.
+            parameters (bytes): Event parameters.
+            raw (bytes): The whole packet as received.
+        """
+        self.code = code
+        self.parameters = parameters
+        self.raw = raw
+
+    @property
+    def name(self):
+        return EVENT_NAMES.get(self.code, f"Event 0x{self.code:02x}")
+
+    def describe(self):
+        """
+        Returns:
+            str: Event name and one 'field: value' line per decoded field.
+        """
+        lines = [self.name]
+        for field in self.FIELDS:
+            lines.append(f"  {field}: {format_field(field, getattr(self, field))}")
+        if not self.FIELDS and self.parameters:
+            lines.append(f"  parameters: {self.parameters.hex(' ')}")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        fields = ", ".join(f"{field}={format_field(field, getattr(self, field))}" for field in self.FIELDS)
+        return f"{type(self).__name__}({fields or self.parameters.hex(' ')})"
+
+
+class CommandComplete(HciEvent):
+    """
+    Command Complete; return_parameters holds the decoded fields for known opcodes.
+    """
+
+    __slots__ = ("num_packets", "opcode", "status", "return_data", "return_parameters")
+
+    FIELDS = ("opcode", "status", "num_packets", "return_parameters")
+
+    def __init__(self, code, parameters, raw):
+        super().__init__(code, parameters, raw)
+        self.num_packets, self.opcode = struct.unpack_from("<BH", parameters)
+        # Commands with no return parameters (e.g. NOP) complete without a status
+        self.status = parameters[3] if len(parameters) > 3 else 0
+        self.return_data = bytes(parameters[4:])
+        self.return_parameters = decode_return_parameters(self.opcode, self.return_data)
+
+    @property
+    def ok(self):
+        return self.status == 0
+
+    def describe(self):
+        lines = [self.name,
+                 f"  opcode: 0x{self.opcode:04x}",
+                 f"  status: {format_field('status', self.status)}",
+                 f"  num_packets: {self.num_packets}"]
+        if self.return_parameters:
+            lines += [f"  {name}: {format_field(name, value)}" for name, value in self.return_parameters.items()]
+        elif self.return_data:
+            lines.append(f"  return parameters: {self.return_data.hex(' ')}")
+        return "\n".join(lines)
+
+
+class CommandStatus(HciEvent):
+    """
+    Command Status, sent for commands that complete later with their own event.
+    """
+
+    __slots__ = ("status", "num_packets", "opcode")
+
+    FIELDS = ("opcode", "status", "num_packets")
+
+    def __init__(self, code, parameters, raw):
+        super().__init__(code, parameters, raw)
+        self.status, self.num_packets, self.opcode = struct.unpack_from("<BBH", parameters)
+
+    @property
+    def ok(self):
+        return self.status == 0
+
+
+class ConnectionComplete(HciEvent):
+    """
+    BR/EDR Connection Complete.
+    """
+
+    __slots__ = ("status", "handle", "address", "link_type", "encryption_enabled")
+
+    FIELDS = ("status", "handle", "address", "link_type", "encryption_enabled")
+
+    def __init__(self, code, parameters, raw):
+        super().__init__(code, parameters, raw)
+        self.status, self.handle, address, self.link_type, encryption = struct.unpack_from("<BH6sBB", parameters)
+        self.handle &= 0x0FFF
+        self.address = format_bd_addr(address)
+        self.encryption_enabled = bool(encryption)
+
+
+class DisconnectionComplete(HciEvent):
+    """
+    Disconnection Complete.
+    """
+
+    __slots__ = ("status", "handle", "reason")
+
+    FIELDS = ("status", "handle", "reason")
+
+    def __init__(self, code, parameters, raw):
+        super().__init__(code, parameters, raw)
+        self.status, self.handle, self.reason = struct.unpack_from("<BHB", parameters)
+        self.handle &= 0x0FFF
+
+
+class NumberOfCompletedPackets(HciEvent):
+    """
+    Number Of Completed Packets; completed is a tuple of (handle, packets) pairs.
+    """
+
+    __slots__ = ("completed",)
+
+    FIELDS = ("completed",)
+
+    def __init__(self, code, parameters, raw):
+        super().__init__(code, parameters, raw)
+        count = parameters[0]
+        self.completed = tuple((handle & 0x0FFF, packets)
+                               for handle, packets in struct.iter_unpack("<HH", parameters[1:1 + 4 * count]))
+
+
+class LeMetaEvent(HciEvent):
+    """
+    LE Meta event. Subevents without a dedicated decoder are returned as this class.
+    """
+
+    __slots__ = ("subevent",)
+
+    FIELDS = ("subevent",)
+
+    def __init__(self, code, parameters, raw):
+        super().__init__(code, parameters, raw)
+        self.subevent = parameters[0]
+
+    @property
+    def name(self):
+        return LE_SUBEVENT_NAMES.get(self.subevent, f"LE Meta subevent 0x{self.subevent:02x}")
+
+
+class LeConnectionComplete(LeMetaEvent):
+    """
+    LE Connection Complete. interval is in 1.25 ms units and supervision_timeout in 10 ms
+    units, as sent by the controller.
+    """
+
+    __slots__ = ("status", "handle", "role", "peer_address_type", "peer_address", "interval", "latency",
+                 "supervision_timeout", "clock_accuracy")
+
+    FIELDS = ("status", "handle", "role", "peer_address_type", "peer_address", "interval", "latency",
+              "supervision_timeout")
+
+    def __init__(self, code, parameters, raw):
+        super().__init__(code, parameters, raw)
+        (self.status, self.handle, self.role, self.peer_address_type, address) = struct.unpack_from(
+            "<BHBB6s", parameters, 1)
+        self.handle &= 0x0FFF
+        self.peer_address = format_bd_addr(address)
+        self.interval, self.latency, self.supervision_timeout, self.clock_accuracy = struct.unpack_from(
+            "<HHHB", parameters, self._timing_offset())
+
+    def _timing_offset(self):
+        return 12
+
+
+class LeEnhancedConnectionComplete(LeConnectionComplete):
+    """
+    LE Enhanced Connection Complete, which adds the resolvable private addresses in use.
+    """
+
+    __slots__ = ("local_rpa", "peer_rpa")
+
+    FIELDS = LeConnectionComplete.FIELDS + ("local_rpa", "peer_rpa")
+
+    def __init__(self, code, parameters, raw):
+        super().__init__(code, parameters, raw)
+        self.local_rpa = format_bd_addr(parameters[12:18])
+        self.peer_rpa = format_bd_addr(parameters[18:24])
+
+    def _timing_offset(self):
+        return 24
+
+
+class AdvertisingReport:
+    """
+    One report of an LE Advertising Report event.
+    """
+
+    __slots__ = ("event_type", "address_type", "address", "data", "rssi")
+
+    def __init__(self, event_type, address_type, address, data, rssi):
+        self.event_type = event_type
+        self.address_type = address_type
+        self.address = address
+        self.data = data
+        self.rssi = rssi
+
+    def __repr__(self):
+        return f"AdvertisingReport({self.address}, type={self.event_type}, rssi={self.rssi}, data={self.data.hex()})"
+
+
+class LeAdvertisingReport(LeMetaEvent):
+    """
+    LE Advertising Report; reports is a tuple of AdvertisingReport.
+    """
+
+    __slots__ = ("reports",)
+
+    FIELDS = ("reports",)
+
+    def __init__(self, code, parameters, raw):
+        super().__init__(code, parameters, raw)
+        reports = []
+        offset = 2
+        # Reports follow each other in full, as Linux controllers send them
+        for _ in range(parameters[1]):
+            event_type, address_type, address, length = struct.unpack_from("<BB6sB", parameters, offset)
+            offset += 9
+            data = bytes(parameters[offset:offset + length])
+            offset += length
+            rssi = struct.unpack_from("<b", parameters, offset)[0]
+            offset += 1
+            reports.append(AdvertisingReport(event_type, address_type, format_bd_addr(address), data, rssi))
+        self.reports = tuple(reports)
+
+
+class LeConnectionUpdateComplete(LeMetaEvent):
+    """
+    LE Connection Update Complete.
+    """
+
+    __slots__ = ("status", "handle", "interval", "latency", "supervision_timeout")
+
+    FIELDS = ("status", "handle", "interval", "latency", "supervision_timeout")
+
+    def __init__(self, code, parameters, raw):
+        super().__init__(code, parameters, raw)
+        self.status, self.handle, self.interval, self.latency, self.supervision_timeout = struct.unpack_from(
+            "<BHHHH", parameters, 1)
+        self.handle &= 0x0FFF
+
+
+EVENT_CLASSES = {
+    EVT_CONN_COMPLETE: ConnectionComplete,
+    EVT_DISCONN_COMPLETE: DisconnectionComplete,
+    EVT_CMD_COMPLETE: CommandComplete,
+    EVT_CMD_STATUS: CommandStatus,
+    EVT_NUM_COMP_PKTS: NumberOfCompletedPackets,
+}
+
+LE_SUBEVENT_CLASSES = {
+    EVT_LE_CONN_COMPLETE: LeConnectionComplete,
+    EVT_LE_ADVERTISING_REPORT: LeAdvertisingReport,
+    EVT_LE_CONN_UPDATE_COMPLETE: LeConnectionUpdateComplete,
+    EVT_LE_ENHANCED_CONN_COMPLETE: LeEnhancedConnectionComplete,
+}
+
+
+def decode_return_parameters(opcode, data):
+    """
+    Decode the return parameters (after the status) of a Command Complete.
+
+    Args:
+        opcode (int): Opcode of the completed command.
+        data (bytes): Return parameters following the status octet.
+    Returns:
+        dict: Field name -> value; empty for unknown opcodes, failed commands or short data.
+    """
+    layout = _return_layouts.get(opcode)
+    if layout is None or len(data) < layout[0].size:
+        return {}
+    values = layout[0].unpack_from(data)
+    return {name: converter(value) if converter else value
+            for (name, converter), value in zip(layout[1], values)}
+
+
+def decode_event(packet):
+    """
+    Decode one HCI event packet.
+
+    Args:
+        packet (bytes): Event packet, with or without the HCI_EVENT_PKT indicator.
+    Returns:
+        HciEvent: The decoded event, a subclass for the events decoded in full.
+    Raises:
+        ValueError: If the packet is truncated.
+    """
+    offset = 1 if packet[:1] == bytes((HCI_EVENT_PKT,)) else 0
+    if len(packet) < offset + 2:
+        raise ValueError(f"Truncated HCI event: {bytes(packet).hex(' ')}")
+    code, length = packet[offset], packet[offset + 1]
+    parameters = bytes(packet[offset + 2:offset + 2 + length])
+    if len(parameters) < length:
+        raise ValueError(f"Truncated HCI event 0x{code:02x}: {length} octets announced, {len(parameters)} received")
+    event_class = EVENT_CLASSES.get(code, HciEvent)
+    if code == EVT_LE_META_EVENT and parameters:
+        event_class = LE_SUBEVENT_CLASSES.get(parameters[0], LeMetaEvent)
+    try:
+        return event_class(code, parameters, bytes(packet))
+    except (struct.error, IndexError):
+        raise ValueError(f"Malformed HCI event 0x{code:02x}: {parameters.hex(' ')}")
+
+
+def format_field(name, value):
+    """
+    Format a decoded field for display.
+
+    Returns:
+        str: Status codes with their name, handles and opcodes in hex, bytes as hex.
+    """
+    if name in ("status", "reason"):
+        return f"0x{value:02x} ({STATUS_NAMES.get(value, 'Unknown')})"
+    if name in HEX_FIELDS and isinstance(value, int):
+        return f"0x{value:04x}"
+    if isinstance(value, bytes):
+        return value.hex(" ")
+    return str(value)
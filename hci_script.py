@@ -0,0 +1,430 @@
+"""
+Runs a file of HCI commands back-to-back, e.g. a vendor bring-up sequence.
+
+One command per line, '#' starts a comment:
+
+    Controller and Baseband, Reset
+    Link Control, Disconnect, 0x0040, 0x13
+    0x3f 0x0001 01 02 03        raw: ogf, ocf and parameter bytes in hex, as for 'hcitool cmd'
+
+On transports that support it (raw HCI socket, loopback) commands are pipelined: as many
+are kept in flight as the controller's last Num_HCI_Command_Packets allows, and each
+Command Complete/Status is matched to the oldest outstanding command with its opcode.
+Other transports run the commands one at a time.
+
+Replies that were already queued when the script starts are discarded, and replies whose
+opcode has nothing in flight (e.g. answers to another host's commands) change neither the
+results nor the credits. HCI replies carry no tag, though, so a reply to another host's
+command with the same opcode as one of ours that is in flight cannot be told apart from
+ours; keep other HCI users (hcitool, btmgmt) quiet on the controller while a script runs.
+
+    python3 -m Backend_lib.Linux.hci_script bringup.txt -i hci0 --on-error continue --json report.json
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from collections import deque
+
+from Backend_lib.Linux.hci_encoder import encode_command
+from Backend_lib.Linux.hci_events import format_field
+from Backend_lib.Linux.hci_transport import HCI_COMMAND_TIMEOUT
+from Backend_lib.Linux.hci_transport import make_opcode
+from Backend_lib.Linux.hci_transport import open_hci_transport
+
+# Opcode of the Command Complete a controller sends only to hand out command credits
+NOP_OPCODE = 0x0000
+
+ON_ERROR_STOP = "stop"
+ON_ERROR_CONTINUE = "continue"
+
+RESULT_OK = "ok"
+RESULT_FAILED = "failed"        # reply with a non-zero status, or the command could not be sent
+RESULT_TIMEOUT = "timeout"
+RESULT_INVALID = "invalid"      # line could not be parsed or encoded
+RESULT_SKIPPED = "skipped"      # not sent because an earlier command failed
+
+
+class ScriptCommand:
+    """
+    One line of a script, encoded and ready to send.
+    """
+
+    __slots__ = ("line", "label", "ogf", "ocf", "opcode", "parameters", "error")
+
+    def __init__(self, line, label, ogf=0, ocf=0, parameters=b"", error=None):
+        """
+        Args:
+            line (int): Line number in the script.
+            label (str): Command as shown in the report.
+            ogf (int): Opcode Group Field.
+            ocf (int): Opcode Command Field.
+            parameters (bytes): Encoded parameters.
+            error (str): Why the line could not be encoded, None if it could.
+        """
+        self.line = line
+        self.label = label
+        self.ogf = ogf
+        self.ocf = ocf
+        self.opcode = make_opcode(ogf, ocf)
+        self.parameters = parameters
+        self.error = error
+
+
+def parse_script_line(line_number, text):
+    """
+    Args:
+        line_number (int): Line number, for the report.
+        text (str): Line without its comment.
+    Returns:
+        ScriptCommand: The command; its error is set if the line does not encode.
+    """
+    if "," not in text and text.lower().startswith("0x"):
+        tokens = text.split()
+        label = " ".join(tokens[:2])
+        try:
+            ogf, ocf = int(tokens[0], 16), int(tokens[1], 16)
+            parameters = bytes.fromhex("".join(token.lower().replace("0x", "") for token in tokens[2:]))
+        except (IndexError, ValueError):
+            return ScriptCommand(line_number, label, error="expected 'ogf ocf [hex bytes]'")
+        return ScriptCommand(line_number, label, ogf, ocf, parameters)
+
+    fields = [field.strip() for field in text.split(",")]
+    label = "/".join(fields[:2])
+    if len(fields) < 2:
+        return ScriptCommand(line_number, label, error="expected 'group, command[, parameters...]'")
+    try:
+        ogf, ocf, parameters = encode_command(fields[0], fields[1], fields[2:])
+    except KeyError as e:
+        return ScriptCommand(line_number, label, error=f"unknown command group or name {e}")
+    except ValueError as e:
+        return ScriptCommand(line_number, label, error=str(e))
+    return ScriptCommand(line_number, label, ogf, ocf, parameters)
+
+
+def parse_script(lines):
+    """
+    Args:
+        lines (iterable): Script lines.
+    Returns:
+        list: ScriptCommand per non-empty line, in order.
+    """
+    commands = []
+    for line_number, line in enumerate(lines, 1):
+        text = line.split("#", 1)[0].strip()
+        if text:
+            commands.append(parse_script_line(line_number, text))
+    return commands
+
+
+def load_script(path):
+    """
+    Args:
+        path (str): Script file.
+    Returns:
+        list: ScriptCommands, see parse_script().
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    with open(path) as script_file:
+        return parse_script(script_file)
+
+
+class ScriptResult:
+    """
+    Outcome of one script command.
+    """
+
+    __slots__ = ("command", "outcome", "reply", "sent", "latency_ms", "error")
+
+    def __init__(self, command):
+        self.command = command
+        self.outcome = None
+        self.reply = None
+        self.sent = None
+        self.latency_ms = None
+        self.error = None
+
+    def finish(self, outcome, reply=None, error=None):
+        """
+        Record the outcome; the latency is measured from when the command was sent.
+
+        Args:
+            outcome (str): One of the RESULT_* values.
+            reply (CommandComplete or CommandStatus): Reply, if one arrived.
+            error (str): Failure description.
+        returns:
+            None
+        """
+        self.outcome = outcome
+        self.reply = reply
+        self.error = error
+        if self.sent is not None:
+            self.latency_ms = (time.monotonic() - self.sent) * 1000
+
+    @property
+    def status(self):
+        return self.reply.status if self.reply is not None else None
+
+    def as_dict(self):
+        return {
+            "line": self.command.line,
+            "command": self.command.label,
+            "opcode": f"0x{self.command.opcode:04x}",
+            "outcome": self.outcome,
+            "status": self.status,
+            "latency_ms": self.latency_ms,
+            "return_parameters": {name: value.hex() if isinstance(value, bytes) else value
+                                  for name, value in getattr(self.reply, "return_parameters", {}).items()},
+            "error": self.error,
+        }
+
+
+class ScriptReport:
+    """
+    Results of a script run, in script order.
+    """
+
+    def __init__(self, results, elapsed, transport, pipelined, on_error):
+        """
+        Args:
+            results (list): ScriptResult per command.
+            elapsed (float): Seconds the whole run took.
+            transport (str): Name of the transport used.
+            pipelined (bool): Whether commands were pipelined.
+            on_error (str): ON_ERROR_STOP or ON_ERROR_CONTINUE.
+        """
+        self.results = results
+        self.elapsed = elapsed
+        self.transport = transport
+        self.pipelined = pipelined
+        self.on_error = on_error
+
+    @property
+    def ok(self):
+        return all(result.outcome == RESULT_OK for result in self.results)
+
+    def counts(self):
+        """
+        Returns:
+            dict: Outcome -> number of commands.
+        """
+        counts = {}
+        for result in self.results:
+            counts[result.outcome] = counts.get(result.outcome, 0) + 1
+        return counts
+
+    def summary(self):
+        """
+        Returns:
+            str: One line with the number of commands, run time and outcomes.
+        """
+        outcomes = ", ".join(f"{count} {outcome}" for outcome, count in sorted(self.counts().items()))
+        mode = "pipelined" if self.pipelined else "sequential"
+        return (f"{len(self.results)} commands in {self.elapsed * 1000:.1f} ms via {self.transport} "
+                f"({mode}): {outcomes or 'nothing to run'}")
+
+    def format(self):
+        """
+        Returns:
+            str: Table of line, command, outcome, status and latency, then the summary.
+        """
+        lines = [f"{'line':>5}  {'command':<44} {'outcome':<8} {'status':<40} {'latency':>10}"]
+        for result in self.results:
+            if result.reply is not None:
+                detail = format_field("status", result.status)
+            else:
+                detail = result.error or ""
+            latency = f"{result.latency_ms:.2f} ms" if result.latency_ms is not None else ""
+            lines.append(f"{result.command.line:>5}  {result.command.label:<44} {result.outcome:<8} "
+                         f"{detail:<40} {latency:>10}")
+        lines.append(self.summary())
+        return "\n".join(lines)
+
+    def as_dict(self):
+        return {
+            "elapsed_ms": self.elapsed * 1000,
+            "transport": self.transport,
+            "pipelined": self.pipelined,
+            "on_error": self.on_error,
+            "counts": self.counts(),
+            "results": [result.as_dict() for result in self.results],
+        }
+
+
+class HciScriptRunner:
+    """
+    Sends script commands through an HciTransport and collects a ScriptReport.
+    """
+
+    def __init__(self, transport, on_error=ON_ERROR_STOP, timeout=HCI_COMMAND_TIMEOUT, log=None):
+        """
+        Args:
+            transport (HciTransport): Transport to send through.
+            on_error (str): ON_ERROR_STOP skips the rest of the script after the first
+                            command that fails, times out or does not encode;
+                            ON_ERROR_CONTINUE runs every command.
+            timeout (float): Seconds to wait for each command's reply.
+            log: Optional logger for per-command failures.
+        """
+        if on_error not in (ON_ERROR_STOP, ON_ERROR_CONTINUE):
+            raise ValueError(f"on_error must be '{ON_ERROR_STOP}' or '{ON_ERROR_CONTINUE}', got {on_error!r}")
+        self.transport = transport
+        self.on_error = on_error
+        self.timeout = timeout
+        self.log = log
+
+    def run(self, commands):
+        """
+        Args:
+            commands (list): ScriptCommands, see parse_script().
+        Returns:
+            ScriptReport: One result per command, in script order.
+        """
+        results = [ScriptResult(command) for command in commands]
+        started = time.monotonic()
+        pipelined = self.transport.pipelining
+        if pipelined:
+            self._run_pipelined(results)
+        else:
+            self._run_sequential(results)
+        for result in results:
+            if result.outcome is None:
+                result.finish(RESULT_SKIPPED)
+            elif result.outcome != RESULT_OK and self.log:
+                self.log.error(f"Line {result.command.line} {result.command.label}: {result.outcome} "
+                               f"{result.error or format_field('status', result.status)}")
+        return ScriptReport(results, time.monotonic() - started, self.transport.name, pipelined, self.on_error)
+
+    def _failed(self, result, outcome, reply=None, error=None):
+        result.finish(outcome, reply, error)
+        return self.on_error == ON_ERROR_STOP
+
+    def _run_sequential(self, results):
+        for result in results:
+            command = result.command
+            if command.error:
+                if self._failed(result, RESULT_INVALID, error=command.error):
+                    return
+                continue
+            result.sent = time.monotonic()
+            try:
+                reply = self.transport.send_command(command.ogf, command.ocf, command.parameters, self.timeout)
+            except TimeoutError as e:
+                if self._failed(result, RESULT_TIMEOUT, error=str(e)):
+                    return
+                continue
+            except OSError as e:
+                if self._failed(result, RESULT_FAILED, error=str(e)):
+                    return
+                continue
+            if reply.ok:
+                result.finish(RESULT_OK, reply)
+            elif self._failed(result, RESULT_FAILED, reply):
+                return
+
+    def _run_pipelined(self, results):
+        transport = self.transport
+        # The host may send one command before the controller has reported its credits
+        credits = 1
+        # opcode -> ScriptResults in flight, oldest first
+        in_flight = {}
+        pending = deque(results)
+        stop = False
+        with transport.lock:
+            transport.discard_stale_replies()
+            while True:
+                while pending and credits > 0 and not stop:
+                    result = pending.popleft()
+                    command = result.command
+                    if command.error:
+                        stop = self._failed(result, RESULT_INVALID, error=command.error)
+                        continue
+                    result.sent = time.monotonic()
+                    try:
+                        transport.submit_command(command.ogf, command.ocf, command.parameters)
+                    except OSError as e:
+                        stop = self._failed(result, RESULT_FAILED, error=str(e))
+                        continue
+                    credits -= 1
+                    in_flight.setdefault(command.opcode, deque()).append(result)
+                if not in_flight:
+                    if stop or not pending:
+                        return
+                    # No credits and nothing outstanding: wait for the controller's NOP to return them
+                    deadline = time.monotonic() + self.timeout
+                    reply = transport.read_reply(self.timeout)
+                    while reply is not None and reply.opcode != NOP_OPCODE:
+                        reply = transport.read_reply(deadline - time.monotonic())
+                    credits = reply.num_packets if reply is not None else 1
+                    continue
+
+                oldest = min(queue[0].sent for queue in in_flight.values())
+                reply = transport.read_reply(oldest + self.timeout - time.monotonic())
+                if reply is None:
+                    now = time.monotonic()
+                    for opcode, queue in list(in_flight.items()):
+                        while queue and queue[0].sent + self.timeout <= now:
+                            stop = self._failed(queue.popleft(), RESULT_TIMEOUT,
+                                                error=f"no reply within {self.timeout:g} s") or stop
+                        if not queue:
+                            del in_flight[opcode]
+                    # The controller will not return the credits of lost commands
+                    credits = max(credits, 1)
+                    continue
+
+                queue = in_flight.get(reply.opcode)
+                if reply.opcode == NOP_OPCODE or queue:
+                    # Num_HCI_Command_Packets is the number of commands the host may send now
+                    credits = reply.num_packets
+                if not queue:
+                    # NOP credit update, or a reply to another host's command
+                    continue
+                result = queue.popleft()
+                if not queue:
+                    del in_flight[reply.opcode]
+                if reply.ok:
+                    result.finish(RESULT_OK, reply)
+                else:
+                    stop = self._failed(result, RESULT_FAILED, reply) or stop
+
+
+def run_script(transport, path, on_error=ON_ERROR_STOP, timeout=HCI_COMMAND_TIMEOUT, log=None):
+    """
+    Load a script file and run it.
+
+    Returns:
+        ScriptReport: See HciScriptRunner.run().
+    Raises:
+        OSError: If the script cannot be read.
+    """
+    return HciScriptRunner(transport, on_error, timeout, log).run(load_script(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a file of HCI commands, pipelined where the transport allows")
+    parser.add_argument("script")
+    parser.add_argument("-i", "--interface", default="hci0")
+    parser.add_argument("--on-error", choices=(ON_ERROR_STOP, ON_ERROR_CONTINUE), default=ON_ERROR_STOP)
+    parser.add_argument("--timeout", type=float, default=HCI_COMMAND_TIMEOUT, help="Seconds to wait per command")
+    parser.add_argument("--hcitool", action="store_true", help="Send through hcitool instead of the raw socket")
+    parser.add_argument("--json", help="Also write the report as JSON to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    log = logging.getLogger("hci_script")
+    transport = open_hci_transport(args.interface, log, prefer_socket=not args.hcitool)
+    try:
+        report = run_script(transport, args.script, args.on_error, args.timeout)
+    finally:
+        transport.close()
+    print(report.format())
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(report.as_dict(), json_file, indent=2)
+    sys.exit(0 if report.ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+"""
+Transports for sending HCI commands to a controller.
+
+    HciSocketTransport   raw AF_BLUETOOTH/BTPROTO_HCI socket; the command is written as
+                         bytes and the matching Command Complete/Status is read back
+                         in-process (needs CAP_NET_RAW)
+    HcitoolTransport     'hcitool -i hciX cmd ...' in a shell, parsing its event dump;
+                         the fallback when the socket cannot be opened
+    LoopbackTransport    scripted stand-in answering from a table, for tests without a radio
+
+All of them take the command as (ogf, ocf, parameter bytes) and return the decoded
+Command Complete or Command Status (see Backend_lib.Linux.hci_events); parameters are
+encoded with Backend_lib.Linux.hci_encoder. open_hci_transport() picks the
+socket and falls back to hcitool. The socket and loopback transports can also keep
+several commands in flight (submit_command()/read_reply()), see hci_script.
+"""
+import re
+import select
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+from Backend_lib.Linux.hci_events import CommandComplete
+from Backend_lib.Linux.hci_events import CommandStatus
+from Backend_lib.Linux.hci_events import EVT_CMD_COMPLETE
+from Backend_lib.Linux.hci_events import EVT_CMD_STATUS
+from Backend_lib.Linux.hci_events import HCI_EVENT_PKT
+from Backend_lib.Linux.hci_events import decode_event
+from utils import run
+
+HCI_COMMAND_PKT = 0x01
+
+# Seconds to wait for the Command Complete/Status of a command
+HCI_COMMAND_TIMEOUT = 2.0
+
+# From <bluetooth/hci.h>; not every Python build exports them
+SOL_HCI = getattr(socket, "SOL_HCI", 0)
+HCI_FILTER = getattr(socket, "HCI_FILTER", 2)
+BTPROTO_HCI = getattr(socket, "BTPROTO_HCI", 1)
+
+HCITOOL_EVENT_PATTERN = re.compile(r"> HCI Event: 0x([0-9a-fA-F]{2}) plen (\d+)\s*\n((?:\s*[0-9a-fA-F]{2})*)")
+
+
+def make_opcode(ogf, ocf):
+    """
+    Args:
+        ogf (int): Opcode Group Field.
+        ocf (int): Opcode Command Field.
+    Returns:
+        int: 16-bit opcode.
+    """
+    return (ogf << 10) | ocf
+
+
+def build_command_packet(ogf, ocf, parameters=b""):
+    """
+    Returns:
+        bytes: HCI command packet including the packet type indicator.
+    """
+    return struct.pack("<BHB", HCI_COMMAND_PKT, make_opcode(ogf, ocf), len(parameters)) + parameters
+
+
+def build_command_complete(opcode, return_parameters=b"\x00", num_packets=1):
+    """
+    Returns:
+        bytes: HCI event packet of a Command Complete; return_parameters start with the status.
+    """
+    body = struct.pack("<BH", num_packets, opcode) + return_parameters
+    return struct.pack("<BBB", HCI_EVENT_PKT, EVT_CMD_COMPLETE, len(body)) + body
+
+
+def build_command_status(opcode, status=0, num_packets=1):
+    """
+    Returns:
+        bytes: HCI event packet of a Command Status.
+    """
+    return struct.pack("<BBBBBH", HCI_EVENT_PKT, EVT_CMD_STATUS, 4, status, num_packets, opcode)
+
+
+def parse_command_reply(packet):
+    """
+    Decode an event packet if it is a Command Complete or Command Status.
+
+    Args:
+        packet (bytes): Event packet, with or without the HCI_EVENT_PKT indicator.
+    Returns:
+        CommandComplete or CommandStatus: The reply, or None for any other or malformed event.
+    """
+    try:
+        event = decode_event(packet)
+    except ValueError:
+        return None
+    return event if isinstance(event, (CommandComplete, CommandStatus)) else None
+
+
+class HciTransport:
+    """
+    Base class of the HCI command transports.
+    """
+
+    name = "base"
+    # True if submit_command()/read_reply() can keep several commands in flight
+    pipelining = False
+
+    def __init__(self):
+        # Held for a whole exchange so replies are not read by another caller
+        self.lock = threading.Lock()
+
+    def send_command(self, ogf, ocf, parameters=b"", timeout=HCI_COMMAND_TIMEOUT):
+        """
+        Send one command and wait for its Command Complete or Command Status.
+
+        Args:
+            ogf (int): Opcode Group Field.
+            ocf (int): Opcode Command Field.
+            parameters (bytes): Encoded command parameters.
+            timeout (float): Seconds to wait for the reply.
+        Returns:
+            CommandComplete or CommandStatus: The controller's reply.
+        Raises:
+            TimeoutError: If no reply arrived in time.
+            OSError: If the command could not be sent.
+        """
+        opcode = make_opcode(ogf, ocf)
+        with self.lock:
+            self.discard_stale_replies()
+            self.submit_command(ogf, ocf, parameters)
+            deadline = time.monotonic() + timeout
+            while True:
+                reply = self.read_reply(deadline - time.monotonic())
+                if reply is None:
+                    raise TimeoutError(f"No reply to HCI command 0x{opcode:04x} ({self.name})")
+                if reply.opcode == opcode:
+                    return reply
+
+    def submit_command(self, ogf, ocf, parameters=b""):
+        """
+        Send one command without waiting for its reply (pipelining transports only).
+
+        Args:
+            ogf (int): Opcode Group Field.
+            ocf (int): Opcode Command Field.
+            parameters (bytes): Encoded command parameters.
+        Returns:
+            None
+        Raises:
+            OSError: If the command could not be sent.
+        """
+        raise NotImplementedError
+
+    def discard_stale_replies(self):
+        """
+        Drop replies that are already waiting, e.g. late answers to commands that timed
+        out or answers to commands sent by other hosts, so the next read_reply() returns
+        a reply that arrived after the next submit. Call it with the lock held.
+
+        args: None
+        returns: None
+        """
+
+    def read_reply(self, timeout=HCI_COMMAND_TIMEOUT):
+        """
+        Wait for the next Command Complete or Command Status, whichever command it answers.
+
+        Args:
+            timeout (float): Seconds to wait.
+        Returns:
+            CommandComplete or CommandStatus: The reply, or None if none arrived in time.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Release the transport.
+
+        args: None
+        returns: None
+        """
+
+
+class HciSocketTransport(HciTransport):
+    """
+    Sends commands over a raw HCI socket bound to one controller.
+
+    The socket filter only lets Command Complete and Command Status events through, so
+    reading the reply does not compete with the rest of the event stream.
+    """
+
+    name = "socket"
+    pipelining = True
+
+    def __init__(self, interface):
+        """
+        Open and bind the socket.
+
+        Args:
+            interface (str): Controller interface like 'hci0'.
+        Raises:
+            OSError: If AF_BLUETOOTH is unavailable or the process lacks CAP_NET_RAW.
+        """
+        if not hasattr(socket, "AF_BLUETOOTH"):
+            raise OSError("AF_BLUETOOTH sockets are not supported by this Python build")
+        super().__init__()
+        self.interface = interface
+        self.sock = socket.socket(socket.AF_BLUETOOTH, socket.SOCK_RAW, BTPROTO_HCI)
+        try:
+            self.sock.bind((int(interface.replace("hci", "")),))
+            # struct hci_filter { type_mask; event_mask[2]; opcode }, padded to 16 bytes
+            event_mask = (1 << EVT_CMD_COMPLETE) | (1 << EVT_CMD_STATUS)
+            self.sock.setsockopt(SOL_HCI, HCI_FILTER, struct.pack("<IIIH2x", 1 << HCI_EVENT_PKT, event_mask, 0, 0))
+        except OSError:
+            self.sock.close()
+            raise
+
+    def submit_command(self, ogf, ocf, parameters=b""):
+        self.sock.sendall(build_command_packet(ogf, ocf, parameters))
+
+    def discard_stale_replies(self):
+        while True:
+            try:
+                self.sock.recv(260, socket.MSG_DONTWAIT)
+            except (BlockingIOError, InterruptedError):
+                return
+
+    def read_reply(self, timeout=HCI_COMMAND_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self.sock], [], [], remaining)[0]:
+                return None
+            reply = parse_command_reply(self.sock.recv(260))
+            if reply:
+                return reply
+
+    def close(self):
+        self.sock.close()
+
+
+class HcitoolTransport(HciTransport):
+    """
+    Sends commands with 'hcitool cmd', one shell process per command.
+    """
+
+    name = "hcitool"
+
+    def __init__(self, interface, log):
+        """
+        Args:
+            interface (str): Controller interface like 'hci0'.
+            log: Logger passed to utils.run.
+        """
+        super().__init__()
+        self.interface = interface
+        self.log = log
+
+    def send_command(self, ogf, ocf, parameters=b"", timeout=HCI_COMMAND_TIMEOUT):
+        hci_command = f"hcitool -i {self.interface} cmd 0x{ogf:02x} 0x{ocf:04x} {parameters.hex(' ')}".strip()
+        result = run(self.log, hci_command)
+        match = HCITOOL_EVENT_PATTERN.search(result.stdout or "")
+        if not match:
+            raise TimeoutError(f"No reply to '{hci_command}': {(result.stderr or result.stdout or '').strip()}")
+        body = bytes.fromhex(match[3].replace("\n", " "))
+        reply = parse_command_reply(bytes((int(match[1], 16), len(body))) + body)
+        if reply is None or reply.opcode != make_opcode(ogf, ocf):
+            raise TimeoutError(f"Unexpected reply to '{hci_command}': {match[0].strip()}")
+        return reply
+
+
+class LoopbackTransport(HciTransport):
+    """
+    Scripted controller stand-in for exercising command encoding and reply handling.
+
+    Each command is answered from responses, keyed by opcode:
+        bytes       Command Complete with these return parameters (status first)
+        int         Command Status with this status
+        None        no reply, so send_command() times out
+        callable    called with the parameter bytes, returning one of the above
+    Opcodes not in responses get a Command Complete with status 0. Replies become
+    readable latency seconds after their command was submitted, so pipelined commands
+    overlap like they do on a controller with several command credits.
+    """
+
+    name = "loopback"
+    pipelining = True
+
+    def __init__(self, responses=None, latency=0.0, num_packets=1):
+        """
+        Args:
+            responses (dict): Opcode -> response, see above.
+            latency (float): Seconds between a command and its reply.
+            num_packets (int): Num_HCI_Command_Packets advertised in every reply.
+        """
+        super().__init__()
+        self.responses = dict(responses or {})
+        self.latency = latency
+        self.num_packets = num_packets
+        # (ogf, ocf, parameters) of every command sent, for assertions
+        self.sent = []
+        # (time the reply is readable, reply packet or None) in submission order
+        self.pending = deque()
+
+    def submit_command(self, ogf, ocf, parameters=b""):
+        opcode = make_opcode(ogf, ocf)
+        packet = build_command_packet(ogf, ocf, parameters)
+        self.sent.append((ogf, ocf, bytes(packet[4:])))
+        response = self.responses.get(opcode, b"\x00")
+        if callable(response):
+            response = response(bytes(parameters))
+        if isinstance(response, int):
+            response = build_command_status(opcode, response, self.num_packets)
+        elif response is not None:
+            response = build_command_complete(opcode, bytes(response), self.num_packets)
+        self.pending.append((time.monotonic() + self.latency, response))
+
+    def discard_stale_replies(self):
+        now = time.monotonic()
+        while self.pending and self.pending[0][0] <= now:
+            self.pending.popleft()
+
+    def read_reply(self, timeout=HCI_COMMAND_TIMEOUT):
+        # Unanswered commands never produce a reply
+        while self.pending and self.pending[0][1] is None:
+            self.pending.popleft()
+        if not self.pending:
+            time.sleep(max(0.0, timeout))
+            return None
+        wait = self.pending[0][0] - time.monotonic()
+        if wait > timeout:
+            time.sleep(max(0.0, timeout))
+            return None
+        if wait > 0:
+            time.sleep(wait)
+        return parse_command_reply(self.pending.popleft()[1])
+
+
+def open_hci_transport(interface, log, prefer_socket=True):
+    """
+    Open the fastest available transport for a controller.
+
+    Args:
+        interface (str): Controller interface like 'hci0'.
+        log: Logger for the hcitool fallback and for reporting the choice.
+        prefer_socket (bool): False forces the hcitool transport.
+    Returns:
+        HciTransport: HciSocketTransport if the raw socket can be opened, else HcitoolTransport.
+    """
+    if prefer_socket:
+        try:
+            return HciSocketTransport(interface)
+        except OSError as e:
+            log.info(f"Raw HCI socket unavailable on {interface} ({e}); using hcitool")
+    return HcitoolTransport(interface, log)
@@ -0,0 +1,59 @@
+from PyQt6.QtCore import QObject
+from PyQt6.QtCore import Qt
+from PyQt6.QtCore import pyqtSignal
+
+
+class QtDBusBridge(QObject):
+    """
+    Marshals D-Bus events from the GLib loop thread onto the Qt GUI thread.
+
+    Register on_object_mirror_change() as a BluezObjectMirror listener and connect to the
+    Qt signals below; since the bridge lives on the GUI thread, the connected slots run
+    there through queued connections. call_in_gui() does the same for arbitrary callables,
+    e.g. completion callbacks of asynchronous D-Bus calls.
+
+    The bridge must be created on the GUI thread.
+    """
+
+    interfaces_added = pyqtSignal(str, object)
+    interfaces_removed = pyqtSignal(str, object)
+    properties_changed = pyqtSignal(str, str, object, object)
+    _invoke = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        """
+        Initialize the bridge.
+
+        Args:
+            parent (QObject): Optional Qt parent.
+        """
+        super().__init__(parent)
+        self._invoke.connect(self._run_callable, Qt.ConnectionType.QueuedConnection)
+
+    def call_in_gui(self, func):
+        """
+        Run a callable on the GUI thread. Safe to call from any thread.
+
+        Args:
+            func (callable): Function taking no arguments.
+        returns:
+            None
+        """
+        self._invoke.emit(func)
+
+    def on_object_mirror_change(self, signal_name, path, *args):
+        """
+        BluezObjectMirror listener re-emitting the change as a Qt signal.
+        """
+        if signal_name == "InterfacesAdded":
+            self.interfaces_added.emit(path, args[0])
+        elif signal_name == "InterfacesRemoved":
+            self.interfaces_removed.emit(path, list(args[0]))
+        elif signal_name == "PropertiesChanged":
+            self.properties_changed.emit(path, args[0], args[1], list(args[2]))
+
+    def _run_callable(self, func):
+        try:
+            func()
+        except Exception as e:
+            print(f"[ERROR] D-Bus bridge callback failed: {e}")
@@ -8,7 +8,9 @@ import style_sheet as ss
 from Backend_lib.Linux import hci_commands as hci
 
 from PyQt6.QtCore import QFileSystemWatcher
+from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import QTextBrowser
+from PyQt6.QtWidgets import QFileDialog
 
 import logging
 import os
@@ -18,6 +20,24 @@ import time
 #import sip
 
 
+def release_connection_tracking(controller, tracker, listener):
+    """
+    Stops listening to a connection handle tracker, and stops the tracker once no view
+    listens to it any more. Safe to call more than once.
+
+    Args:
+        controller: Backend controller that started the tracker.
+        tracker (ConnectionHandleTracker): Tracker returned by start_connection_tracking().
+        listener (callable): Listener added to the tracker.
+    returns:
+        None
+    """
+    tracker.remove_listener(listener)
+    # A newer view may already have taken the tracker over
+    if not tracker.listeners and controller.connection_tracker is tracker:
+        controller.stop_connection_tracking()
+
+
 class TestControllerUI(QWidget):
     """
     UI component for displaying and executing HCI commands for a Bluetooth controller.
@@ -26,6 +46,9 @@ class TestControllerUI(QWidget):
     and displays real-time HCI dump logs using QFileSystemWatcher.
     """
 
+    # Emitted from the connection tracker thread; the slot runs on the GUI thread
+    connection_handles_changed = pyqtSignal(object)
+
     def __init__(self, controller, log, bluez_logger, back_callback):
         """
         Initializes the TestControllerUI widget.
@@ -55,10 +78,21 @@ class TestControllerUI(QWidget):
         self.empty_list = None
         self.logs_layout = None
         self.dump_log_output = None
+        self.command_result_output = None
         self.file_watcher = None
+        self.handle_combo_box = None
 
         self.controller_ui()
 
+        # Keep the handle combo box in step with links coming and going
+        self.connection_handles_changed.connect(self.update_connection_handles)
+        controller = self.controller
+        tracker = self.connection_tracker = controller.start_connection_tracking()
+        listener = self.connection_listener = self.connection_handles_changed.emit
+        tracker.add_listener(listener)
+        # Also stops the tracker when the view is replaced without going back
+        self.destroyed.connect(lambda _=None: release_connection_tracking(controller, tracker, listener))
+
     def controller_ui(self):
         """
         Constructs the main UI layout, including the command tree,
@@ -102,8 +136,19 @@ class TestControllerUI(QWidget):
         self.command_input_layout.addWidget(self.empty_list)
         main_layout.addLayout(self.command_input_layout, 0, 1)
 
-        # Right column: Dump logs
+        # Right column: Decoded result of the last command, then dump logs
         self.logs_layout = QVBoxLayout()
+        result_label = QLabel("COMMAND RESULT")
+        result_label.setStyleSheet("border: 2px solid black; color: black; font-size:18px; font-weight: bold;")
+        result_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.logs_layout.addWidget(result_label)
+
+        self.command_result_output = QTextEdit()
+        self.command_result_output.setReadOnly(True)
+        self.command_result_output.setMaximumHeight(200)
+        self.command_result_output.setStyleSheet("background: transparent;color: black;border: 2px solid black;")
+        self.logs_layout.addWidget(self.command_result_output)
+
         logs_label = QLabel("DUMP LOGS")
         logs_label.setStyleSheet("border: 2px solid black; color: black; font-size:18px; font-weight: bold;")
         logs_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
@@ -148,11 +193,18 @@ class TestControllerUI(QWidget):
                         background-color: #333333;
                     }
                 """)
-        back_button.clicked.connect(self.back_callback)
+        back_button.clicked.connect(self.go_back)
+
+        # Runs a file of HCI commands and shows the report in the command result box
+        run_script_button = QPushButton("Run Script")
+        run_script_button.setFixedSize(100, 40)
+        run_script_button.setStyleSheet(back_button.styleSheet())
+        run_script_button.clicked.connect(self.run_hci_script)
 
         # Create a horizontal layout for the back button and align it to the right
         button_layout = QHBoxLayout()
         button_layout.addStretch(1)  # This will push the button to the right
+        button_layout.addWidget(run_script_button)
         button_layout.addWidget(back_button)
 
         main_layout.addLayout(button_layout, 1, 2, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignBottom)
@@ -163,6 +215,16 @@ class TestControllerUI(QWidget):
 
         self.setLayout(main_layout)
 
+    def go_back(self):
+        """
+        Stops connection tracking for this view and returns to the previous screen.
+
+        args: None
+        returns: None
+        """
+        release_connection_tracking(self.controller, self.connection_tracker, self.connection_listener)
+        self.back_callback()
+
     def update_log(self):
         """
         Updates the log output widget when the log file changes.
@@ -198,6 +260,7 @@ class TestControllerUI(QWidget):
             self.scroll.setWidgetResizable(True)
 
         if self.content_layout:
+            self.handle_combo_box = None
             while self.content_layout.count():
                 item = self.content_layout.itemAt(0).widget()
                 self.content_layout.removeWidget(item)
@@ -225,6 +288,7 @@ class TestControllerUI(QWidget):
                 combo_box.setPlaceholderText("Connection Handles")
                 combo_box.addItems(list(self.controller.get_connection_handles().keys()))
                 combo_box.currentTextChanged.connect(self.current_text_changed)
+                self.handle_combo_box = combo_box
                 combo_box.setMaximumHeight(30)
             else:
                 setattr(self, key, QTextEdit(default_val))
@@ -277,6 +341,30 @@ class TestControllerUI(QWidget):
         """
         self.handle = text
 
+    def update_connection_handles(self, handles):
+        """
+        Refreshes the handle combo box when a connection is made or dropped.
+
+        Args:
+            handles (dict): Connection handles, as returned by controller.get_connection_handles().
+        returns:
+            None
+        """
+        self.controller.handles = handles
+        combo_box = self.handle_combo_box
+        if combo_box is None:
+            return
+        selected = combo_box.currentText()
+        combo_box.blockSignals(True)
+        combo_box.clear()
+        combo_box.addItems(list(handles.keys()))
+        if selected in handles:
+            combo_box.setCurrentText(selected)
+        else:
+            combo_box.setCurrentIndex(-1)
+            self.handle = None
+        combo_box.blockSignals(False)
+
     def execute_hci_cmd(self):
         """
         Gathers parameters from the UI and sends the HCI command via the backend controller.
@@ -302,7 +390,29 @@ class TestControllerUI(QWidget):
 
         setattr(self, f"{self.ogf}_values", parameters)
         self.log.debug(f"{self.ocf=} {self.ogf=} {parameters=}")
-        self.controller.run_hci_cmd(self.ocf, self.ogf, parameters)
+        reply = self.controller.run_hci_cmd(self.ocf, self.ogf, parameters)
+        if reply is None:
+            self.command_result_output.setPlainText(f"{self.ogf}: no reply (see logs)")
+        else:
+            self.command_result_output.setPlainText(f"{self.ogf}\n{reply.describe()}")
+
+    def run_hci_script(self):
+        """
+        Asks for a file of HCI commands, runs it and shows the per-command report.
+
+        args: None
+        returns: None
+        """
+        file_dialog = QFileDialog()
+        file_path, _ = file_dialog.getOpenFileName(None, "Select HCI Script", "",
+                                                   "HCI Scripts (*.txt *.hci);;All Files (*)")
+        if not file_path:
+            return
+        report = self.controller.run_hci_script(file_path)
+        if report is None:
+            self.command_result_output.setPlainText(f"Cannot run {file_path} (see logs)")
+        else:
+            self.command_result_output.setPlainText(report.format())
 
     def reset_default_params(self):
         """
@@ -1,5 +1,7 @@
 import os
+import sqlite3
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 import dbus
 import re
@@ -27,11 +29,14 @@ from PyQt6.QtWidgets import QTabWidget
 from PyQt6.QtWidgets import QMessageBox
 from PyQt6.QtWidgets import QFileDialog
 from PyQt6.QtWidgets import QComboBox
+from PyQt6.QtWidgets import QCheckBox
 
 from Backend_lib.Linux.bluez_utils import BluezLogger
 from UI_lib.controller_lib import Controller
 from logger import Logger
 from Backend_lib.Linux.bluez import BluetoothDeviceManager
+from Backend_lib.Linux.device_inventory import DeviceInventory
+from UI_lib.qt_dbus_bridge import QtDBusBridge
 
 
 
@@ -69,15 +74,20 @@ class DaemonManager:
         if not self.is_running("pulseaudio"):
             self.pulseaudio_proc = subprocess.Popen(["/usr/local/pulseaudio-13.0_for_bluez-5.65/bin/pulseaudio", "--start","--system=true","--disallow-exit","--daemonize=true"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
 
-    def stop_daemons(self):
+    def stop_daemons(self, timeout=5):
+        stopping = []
         for proc_name in ["bluetoothd", "pulseaudio"]:
             for proc in psutil.process_iter(['pid', 'name']):
                 if proc.info['name'] == proc_name:
                     proc.terminate()
+                    stopping.append(proc)
+        # Return as soon as they are gone instead of sleeping a fixed time
+        _, alive = psutil.wait_procs(stopping, timeout=timeout)
+        for proc in alive:
+            proc.kill()
 
     def restart_daemons(self):
         self.stop_daemons()
-        time.sleep(1)
         self.start_daemons()
 
 
@@ -104,7 +114,7 @@ class TestApplication(QWidget):
     and media control operations using BlueZ and PulseAudio.
     """
 
-    def __init__(self, interface=None, log_path=None, back_callback=None):
+    def __init__(self, interface=None, log_path=None, back_callback=None, adapter_manager=None):
         """
         Initialize the TestApplication widget.
 
@@ -112,6 +122,8 @@ class TestApplication(QWidget):
             interface (str): Bluetooth adapter interface (e.g., hci0).
             log_path (str): Path to the log file for capturing events.
             back_callback (callable): Optional callback to trigger on back action.
+            adapter_manager (MultiAdapterManager): Optional owner of the adapter's manager; without
+                                                   one the widget creates its own BluetoothDeviceManager.
 
         returns:
             None
@@ -123,10 +135,28 @@ class TestApplication(QWidget):
         self.interface = interface
         self.discovery_active = False
         self.back_callback = back_callback
+        self.adapter_manager = adapter_manager
+        self.owns_bluetooth_device_manager = False
+        self.bluetooth_device_manager = None
+        # Runs slow calls of a manager this widget owns; a shared one has the adapter's worker
+        self.background_worker = None
+        self.bluetooth_device_object_mirror = None
         self.controller = Controller()
         self.daemon_manager = DaemonManager()
+        self.dbus_bridge = QtDBusBridge(self)
+        self.dbus_bridge.properties_changed.connect(self.on_device_properties_changed)
+        self.dbus_bridge.interfaces_added.connect(self.on_discovery_interfaces_added)
+        self.dbus_bridge.properties_changed.connect(self.on_discovery_properties_changed)
+        self.table_widget = None
+        self.discovery_rows = {}
+        # Devices shown from the inventory and not yet confirmed by BlueZ
+        self.inventory_devices = set()
+        try:
+            self.device_inventory = DeviceInventory()
+        except sqlite3.Error as e:
+            print(f"[ERROR] Device inventory unavailable: {e}")
+            self.device_inventory = None
         self.test_application_clicked()
-        self.bluetooth_device_manager = BluetoothDeviceManager(interface=self.interface)
 
         self.device_address_source = None
         self.device_address_sink = None
@@ -147,7 +177,7 @@ class TestApplication(QWidget):
         print("Discoverable is set to ON")
         self.set_discoverable_on_button.setEnabled(False)
         self.set_discoverable_off_button.setEnabled(True)
-        self.bluetooth_device_manager.set_discoverable_on()
+        self.run_in_background("set_discoverable_on")
         timeout = int(self.discoverable_timeout_input.text())
         if timeout > 0:
             self.discoverable_timeout_timer = QTimer()
@@ -165,7 +195,7 @@ class TestApplication(QWidget):
         print("Discoverable is set to OFF")
         self.set_discoverable_on_button.setEnabled(True)
         self.set_discoverable_off_button.setEnabled(False)
-        self.bluetooth_device_manager.set_discoverable_off()
+        self.run_in_background("set_discoverable_off")
         if hasattr(self, 'discoverable_timeout_timer'):
             self.discoverable_timeout_timer.stop()
 
@@ -180,12 +210,21 @@ class TestApplication(QWidget):
         args: None
         returns: None
         """
+        try:
+            discovery_filter = self.get_discovery_filter()
+            self.bluetooth_device_manager.build_discovery_filter(**discovery_filter)
+        except ValueError as e:
+            print(f"[ERROR] Invalid discovery filter: {e}")
+            return
         print("Discovery has started")
         self.inquiry_timeout = int(self.inquiry_timeout_input.text()) * 1000
+        # Rows are added as devices are reported instead of when the inquiry window ends
+        self.create_discovery_table()
+        self.discovery_active = True
         if self.inquiry_timeout == 0:
             self.set_discovery_on_button.setEnabled(False)
             self.set_discovery_off_button.setEnabled(True)
-            self.bluetooth_device_manager.start_discovery()
+            self.run_in_background("start_discovery", **discovery_filter)
         else:
             self.timer = QTimer()
             self.timer.timeout.connect(self.show_discovery_table_timeout)
@@ -193,7 +232,29 @@ class TestApplication(QWidget):
             self.timer.start(self.inquiry_timeout)
             self.set_discovery_on_button.setEnabled(False)
             self.set_discovery_off_button.setEnabled(True)
-            self.bluetooth_device_manager.start_discovery()
+            self.run_in_background("start_discovery", **discovery_filter)
+
+    def get_discovery_filter(self):
+        """
+        Read the discovery filter inputs of the GAP panel.
+
+        args: None
+        Returns:
+            dict: Keyword arguments for BluetoothDeviceManager.start_discovery().
+        Raises:
+            ValueError: If RSSI or Pathloss is not a number.
+        """
+        rssi = self.discovery_rssi_input.text().strip()
+        pathloss = self.discovery_pathloss_input.text().strip()
+        uuids = [uuid.strip() for uuid in self.discovery_uuids_input.text().split(",") if uuid.strip()]
+        return {
+            "transport": self.discovery_transport_combo.currentText(),
+            "rssi": int(rssi) if rssi else None,
+            "pathloss": int(pathloss) if pathloss else None,
+            "uuids": uuids or None,
+            "duplicate_data": self.discovery_duplicate_data_checkbox.isChecked(),
+            "pattern": self.discovery_pattern_input.text().strip() or None,
+        }
 
     def show_discovery_table_timeout(self):
         """Function to show the discovery table when timeout is over
@@ -202,7 +263,7 @@ class TestApplication(QWidget):
         returns: None
         """
         self.timer.stop()
-        self.bluetooth_device_manager.stop_discovery()
+        self.run_in_background("stop_discovery")
         self.show_discovery_table()
 
     def set_discovery_off(self):
@@ -216,28 +277,78 @@ class TestApplication(QWidget):
         self.set_discovery_off_button.setEnabled(False)
         self.timer = QTimer()
         if self.inquiry_timeout == 0:
-            self.bluetooth_device_manager.stop_discovery()
+            self.run_in_background("stop_discovery")
             self.show_discovery_table()
         else:
             self.timer.stop()
-            self.bluetooth_device_manager.stop_discovery()
+            self.run_in_background("stop_discovery")
             self.show_discovery_table()
             self.set_discovery_off_button.setEnabled(False)
 
+    def load_inventory_devices(self):
+        """
+        Shows the paired/connected devices remembered for this controller right away.
+
+        They are greyed out until load_connected_devices() confirms them with BlueZ.
+
+        args: None
+        returns: None
+        """
+        if not self.device_inventory:
+            return
+        for device in self.device_inventory.load(self.interface):
+            if not (device["paired"] or device["connected"]):
+                continue
+            if self.find_device_item(device["address"]):
+                continue
+            device_item = QListWidgetItem(device["address"])
+            device_item.setFont(QFont("Arial", 10))
+            device_item.setForeground(Qt.GlobalColor.gray)
+            last_seen = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(device["last_seen"] or 0))
+            device_item.setToolTip(f"{device['name'] or 'Unknown'} - last seen {last_seen}")
+            self.profiles_list_widget.addItem(device_item)
+            self.inventory_devices.add(device["address"])
+
+    def find_device_item(self, device_address):
+        """
+        Args:
+            device_address (str): Bluetooth MAC address.
+        Returns:
+            QListWidgetItem: The profile list item of the device, or None.
+        """
+        for i in range(self.profiles_list_widget.count()):
+            if self.profiles_list_widget.item(i).text().strip() == device_address:
+                return self.profiles_list_widget.item(i)
+        return None
+
     def load_connected_devices(self):
         self.paired_devices={}
         self.connected_devices={}
-        gap_index = self.profiles_list_widget.count() - 1
         #try:
 
-        self.paired_devices = self.bluetooth_device_manager.get_paired_devices(interface=self.interface)
-        self.connected_devices = self.bluetooth_device_manager.get_connected_devices(interface=self.interface)
+        device_views = self.bluetooth_device_manager.get_adapter_device_snapshot(self.interface)
+        self.paired_devices = device_views["paired"]
+        self.connected_devices = device_views["connected"]
         #except Exception as e:
          #   print(f"Failed to get paired devices:  {e}")
 
         # Use a set to avoid duplicates
         unique_devices = set(self.paired_devices.keys()).union(self.connected_devices.keys())
 
+        # Reconcile the devices shown from the inventory with the live state
+        for device_address in self.inventory_devices:
+            device_item = self.find_device_item(device_address)
+            if not device_item:
+                continue
+            if device_address in unique_devices:
+                device_item.setForeground(Qt.GlobalColor.black)
+                device_item.setToolTip("")
+            else:
+                self.profiles_list_widget.takeItem(self.profiles_list_widget.row(device_item))
+        unique_devices -= self.inventory_devices
+        self.inventory_devices = set()
+        gap_index = self.profiles_list_widget.count() - 1
+
         for device_address in unique_devices:
             device_item = QListWidgetItem(device_address)
             device_item.setFont(QFont("Arial", 10))
@@ -245,18 +356,43 @@ class TestApplication(QWidget):
             gap_index += 1
             self.profiles_list_widget.insertItem(gap_index, device_item)
 
-    def show_discovery_table(self):
+        if self.device_inventory:
+            self.device_inventory.sync(self.bluetooth_device_manager.get_managed_objects())
+
+    def on_device_properties_changed(self, path, interface, changed, invalidated):
         """
-        Display discovered devices in a table with options to pair or connect (BR/EDR, LE).
+        Adds a device below GAP as soon as BlueZ reports it paired or connected.
+
+        Args:
+            path (str): D-Bus object path of the changed object.
+            interface (str): Interface whose properties changed.
+            changed (dict): Changed properties.
+            invalidated (list): Invalidated property names.
+        returns:
+            None
         """
-        self.timer.stop()
+        if interface != "org.bluez.Device1" or f"/{self.interface}/" not in path:
+            return
+        if changed.get("Paired") or changed.get("Connected"):
+            address = self.bluetooth_device_manager.get_managed_objects().get(path, {}).get(
+                "org.bluez.Device1", {}).get("Address")
+            if address:
+                self.add_device(str(address))
+
+    def create_discovery_table(self):
+        """
+        Replace any previous discovery table with an empty one in the GAP panel.
+
+        args: None
+        returns: None
+        """
+        if self.table_widget:
+            self.gap_methods_layout.removeWidget(self.table_widget)
+            self.table_widget.deleteLater()
         bold_font = QFont()
         bold_font.setBold(True)
-        bus = dbus.SystemBus()
-        om = dbus.Interface(bus.get_object("org.bluez", "/"), "org.freedesktop.DBus.ObjectManager")
-        objects = om.GetManagedObjects()
-        devices = [path for path, interfaces in objects.items() if "org.bluez.Device1" in interfaces]
-        self.table_widget = QTableWidget(len(devices), 3)
+        self.discovery_rows = {}
+        self.table_widget = QTableWidget(0, 3)
         self.table_widget.setHorizontalHeaderLabels(["DEVICE NAME", "BD_ADDR", "PROCEDURES"])
         self.table_widget.setFont(bold_font)
         self.table_widget.setFixedSize(475, 180)
@@ -267,58 +403,137 @@ class TestApplication(QWidget):
         self.table_widget.setColumnWidth(0, 110)
         self.table_widget.setColumnWidth(1, 140)
         self.table_widget.setColumnWidth(2, 200)
+        self.gap_methods_layout.addWidget(self.table_widget)
+        self.table_widget.show()
 
-        for i, device_path in enumerate(devices):
-            device = dbus.Interface(bus.get_object("org.bluez", device_path), dbus_interface="org.bluez.Device1")
-            device_props = dbus.Interface(bus.get_object("org.bluez", device_path),
-                                          dbus_interface="org.freedesktop.DBus.Properties")
-            device_address = device_props.Get("org.bluez.Device1", "Address")
-            device_name = device_props.Get("org.bluez.Device1", "Alias")
-            self.table_widget.setItem(i, 0, QTableWidgetItem(device_name))
-            self.table_widget.setItem(i, 1, QTableWidgetItem(device_address))
-            # self.table_widget.horizontalHeader().setStretchLastSection(True)
-            button_widget = QWidget()
-            button_layout = QHBoxLayout()
+    def add_discovery_row(self, device_address, device_name, rssi=None):
+        """
+        Add a discovered device to the table, or update its name and RSSI if already shown.
+
+        Args:
+            device_address (str): Bluetooth MAC address.
+            device_name (str): Device alias.
+            rssi (int): Last RSSI in dBm, if known.
+        returns:
+            None
+        """
+        if not self.table_widget:
+            return
+        row = self.discovery_rows.get(device_address)
+        if row is not None:
+            self.table_widget.item(row, 0).setText(device_name)
+            if rssi is not None:
+                self.table_widget.item(row, 1).setToolTip(f"RSSI: {rssi} dBm")
+            return
+
+        row = self.discovery_rows[device_address] = self.table_widget.rowCount()
+        self.table_widget.insertRow(row)
+        self.table_widget.setItem(row, 0, QTableWidgetItem(device_name))
+        address_item = QTableWidgetItem(device_address)
+        if rssi is not None:
+            address_item.setToolTip(f"RSSI: {rssi} dBm")
+        self.table_widget.setItem(row, 1, address_item)
+        # self.table_widget.horizontalHeader().setStretchLastSection(True)
+        button_widget = QWidget()
+        button_layout = QHBoxLayout()
+
+        # Get the table or screen width
+        table_width = self.table_widget.viewport().width() if self.table_widget else 800  # fallback
+
+        # Calculate dynamic font size (adjust scaling factor as needed)
+        font_size = max(6, min(10, table_width // 100))  # range between 6 and 10pt
+        small_font = QFont()
+        small_font.setBold(True)
+        small_font.setPointSize(font_size)
+
+        pair_button = QPushButton("PAIR")
+        pair_button.setFont(small_font)
+        pair_button.setStyleSheet("color:green")
+        pair_button.setMinimumSize(30, 20)
+        # pair_button.setFixedHeight(30)
+        button_layout.addWidget(pair_button)
+
+        br_edr_connect_button = QPushButton("BR_CONNECT")
+        br_edr_connect_button.setFont(small_font)
+        br_edr_connect_button.setStyleSheet("color:green")
+        br_edr_connect_button.setMinimumSize(30, 20)
+        # br_edr_connect_button.setFixedHeight(30)
+        button_layout.addWidget(br_edr_connect_button)
+
+        le_connect_button = QPushButton("LE_CONNECT")
+        le_connect_button.setFont(small_font)
+        le_connect_button.setStyleSheet("color:green")
+        le_connect_button.setMinimumSize(30, 20)
+        # le_connect_button.setFixedHeight(30)
+        button_layout.addWidget(le_connect_button)
+
+        button_widget.setLayout(button_layout)
+        self.table_widget.setCellWidget(row, 2, button_widget)
+        pair_button.clicked.connect(
+            lambda checked, address=device_address: self.handle_device_action('pair', address))
+        br_edr_connect_button.clicked.connect(
+            lambda checked, address=device_address: self.handle_device_action('br_edr_connect', address))
+        le_connect_button.clicked.connect(
+            lambda checked, address=device_address: self.handle_device_action('le_connect', address))
+
+    def on_discovery_interfaces_added(self, path, interfaces):
+        """
+        Shows a newly discovered device while discovery is running.
+
+        Args:
+            path (str): D-Bus object path of the new object.
+            interfaces (dict): Interfaces and properties of the new object.
+        returns:
+            None
+        """
+        if not self.discovery_active or "org.bluez.Device1" not in interfaces \
+                or not path.startswith(f"/org/bluez/{self.interface}/dev_"):
+            return
+        props = interfaces["org.bluez.Device1"]
+        address = str(props.get("Address", ""))
+        if address:
+            self.add_discovery_row(address, str(props.get("Alias", address)), props.get("RSSI"))
+
+    def on_discovery_properties_changed(self, path, interface, changed, invalidated):
+        """
+        Updates a discovered device when its RSSI or alias changes during discovery.
+
+        Args:
+            path (str): D-Bus object path of the changed object.
+            interface (str): Interface whose properties changed.
+            changed (dict): Changed properties.
+            invalidated (list): Invalidated property names.
+        returns:
+            None
+        """
+        if not self.discovery_active or interface != "org.bluez.Device1" \
+                or not path.startswith(f"/org/bluez/{self.interface}/dev_") \
+                or ("RSSI" not in changed and "Alias" not in changed):
+            return
+        props = self.bluetooth_device_object_mirror.get_properties(path, "org.bluez.Device1")
+        address = str(props.get("Address", ""))
+        if address:
+            self.add_discovery_row(address, str(props.get("Alias", address)), props.get("RSSI"))
+
+    def show_discovery_table(self):
+        """
+        Display discovered devices in a table with options to pair or connect (BR/EDR, LE).
 
-            # Get the table or screen width
-            table_width = self.table_widget.viewport().width() if self.table_widget else 800  # fallback
-
-            # Calculate dynamic font size (adjust scaling factor as needed)
-            font_size = max(6, min(10, table_width // 100))  # range between 6 and 10pt
-            small_font = QFont()
-            small_font.setBold(True)
-            small_font.setPointSize(font_size)
-
-            pair_button = QPushButton("PAIR")
-            pair_button.setFont(small_font)
-            pair_button.setStyleSheet("color:green")
-            pair_button.setMinimumSize(30, 20)
-            # pair_button.setFixedHeight(30)
-            button_layout.addWidget(pair_button)
-
-            br_edr_connect_button = QPushButton("BR_CONNECT")
-            br_edr_connect_button.setFont(small_font)
-            br_edr_connect_button.setStyleSheet("color:green")
-            br_edr_connect_button.setMinimumSize(30, 20)
-            # br_edr_connect_button.setFixedHeight(30)
-            button_layout.addWidget(br_edr_connect_button)
-
-            le_connect_button = QPushButton("LE_CONNECT")
-            le_connect_button.setFont(small_font)
-            le_connect_button.setStyleSheet("color:green")
-            le_connect_button.setMinimumSize(30, 20)
-            # le_connect_button.setFixedHeight(30)
-            button_layout.addWidget(le_connect_button)
-
-            button_widget.setLayout(button_layout)
-            self.table_widget.setCellWidget(i, 2, button_widget)
-            self.gap_methods_layout.addWidget(self.table_widget)
-            pair_button.clicked.connect(
-                lambda checked, address=device_address: self.handle_device_action('pair', address))
-            br_edr_connect_button.clicked.connect(
-                lambda checked, address=device_address: self.handle_device_action('br_edr_connect', address))
-            le_connect_button.clicked.connect(
-                lambda checked, address=device_address: self.handle_device_action('le_connect', address))
+        Devices were added live while discovery ran; this fills in any other device
+        BlueZ knows on this controller and ends the live updates.
+        """
+        self.timer.stop()
+        self.discovery_active = False
+        if not self.table_widget:
+            self.create_discovery_table()
+        device_prefix = f"/org/bluez/{self.interface}/dev_"
+        for device_path, interfaces in self.bluetooth_device_manager.get_managed_objects().items():
+            if device_path.startswith(device_prefix) and "org.bluez.Device1" in interfaces:
+                props = interfaces["org.bluez.Device1"]
+                device_address = str(props.get("Address", ""))
+                if device_address:
+                    self.add_discovery_row(device_address, str(props.get("Alias", device_address)),
+                                           props.get("RSSI"))
         self.table_widget.show()
         self.set_discovery_off_button.setEnabled(False)
 
@@ -390,15 +605,68 @@ class TestApplication(QWidget):
             self.add_device(device_address)
             return
 
-        # This will block until confirmation is handled
-        success = self.bluetooth_device_manager.pair(device_address,self.interface)
+        # Pair() can take up to the D-Bus timeout; finish in on_pair_finished without blocking the UI
+        future = self.bluetooth_device_manager.pair_async(device_address, self.interface)
+        self.when_done(future, lambda done: self.on_pair_finished(device_address, done))
 
-        if success:
+    def on_pair_finished(self, device_address, future):
+        """
+        Reports the result of an asynchronous pairing attempt.
+
+        Args:
+            device_address (str): Bluetooth MAC address.
+            future (concurrent.futures.Future): Completed pairing future.
+        returns:
+            None
+        """
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
             QMessageBox.information(self, "Pairing Result", f"Pairing with {device_address} was successful.")
             self.add_device(device_address)
         else:
+            print(f"[Bluetooth] Pairing failed with {device_address} on {self.interface}: {error}")
             QMessageBox.critical(self, "Pairing Failed", f"Pairing with {device_address} failed.")
 
+    def when_done(self, future, callback):
+        """
+        Runs callback(future) on the GUI thread once an asynchronous D-Bus call completes.
+
+        Args:
+            future (concurrent.futures.Future): Future returned by a *_async method.
+            callback (callable): Function taking the completed future.
+        returns:
+            None
+        """
+        future.add_done_callback(lambda done: self.dbus_bridge.call_in_gui(lambda: callback(done)))
+
+    def run_in_background(self, method, *args, callback=None, **kwargs):
+        """
+        Runs a slow BluetoothDeviceManager method off the GUI thread.
+
+        With a MultiAdapterManager the call is queued on the adapter's worker, otherwise
+        on this widget's own worker. callback(future) then runs on the GUI thread; without
+        a callback a failure is printed.
+
+        Args:
+            method (str): Name of the BluetoothDeviceManager method.
+            *args, **kwargs: Arguments for the call.
+            callback (callable): Optional function taking the completed future.
+        Returns:
+            concurrent.futures.Future: Resolves to the method's return value.
+        """
+        if self.owns_bluetooth_device_manager:
+            future = self.background_worker.submit(getattr(self.bluetooth_device_manager, method), *args, **kwargs)
+        else:
+            future = self.bluetooth_device_manager.submit(method, *args, **kwargs)
+
+        def report_failure(done):
+            if not done.cancelled() and done.exception() is not None:
+                print(f"[ERROR] {method} failed on {self.interface}: {done.exception()}")
+        self.when_done(future, callback or report_failure)
+        return future
+
     def br_edr_connect(self, device_address):
         """
         Connect to a device using BR/EDR.
@@ -410,11 +678,27 @@ class TestApplication(QWidget):
         """
 
         print(f"Attempting BR/EDR connect with {device_address}")
-        success = self.bluetooth_device_manager.br_edr_connect(device_address,self.interface)
-        if success:
+        future = self.bluetooth_device_manager.br_edr_connect_async(device_address, self.interface)
+        self.when_done(future, lambda done: self.on_br_edr_connect_finished(device_address, done))
+
+    def on_br_edr_connect_finished(self, device_address, future):
+        """
+        Reports the result of an asynchronous BR/EDR connection attempt.
+
+        Args:
+            device_address (str): Bluetooth MAC address.
+            future (concurrent.futures.Future): Completed connection future.
+        returns:
+            None
+        """
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
             QMessageBox.information(self, "Connection Result", f"Connection with {device_address} was successful.")
             self.add_device(device_address)
         else:
+            print(f"Connection failed: {error}")
             QMessageBox.critical(self, "Connection Failed", f"Connection with {device_address} failed.")
 
     def le_connect(self, device_address):
@@ -428,16 +712,63 @@ class TestApplication(QWidget):
         """
 
         print("LE_Connect is ongoing ")
-        self.bluetooth_device_manager.le_connect(device_address,self.interface)
+        future = self.bluetooth_device_manager.le_connect_async(device_address, self.interface)
+        self.when_done(future, self.on_le_connect_finished)
+
+    def on_le_connect_finished(self, future):
+        """
+        Logs a failed asynchronous LE connection attempt.
+
+        Args:
+            future (concurrent.futures.Future): Completed connection future.
+        returns:
+            None
+        """
+        if not future.cancelled() and future.exception() is not None:
+            print("LE Connection failed:", future.exception())
 
     def closeEvent(self, event):
         """
         Handles the close event for TestApplication, ensuring Bluetooth resources are released.
         """
         print("[TestApplication] closeEvent triggered. Shutting down BluetoothDeviceManager.")
-        if hasattr(self, 'bluetooth_device_manager') and self.bluetooth_device_manager:
-            self.bluetooth_device_manager.shutdown()
+        self.release_resources()
         super().closeEvent(event)
+
+    def go_back(self):
+        """
+        Releases the Bluetooth resources of this view and returns to the previous screen.
+
+        args: None
+        returns: None
+        """
+        self.release_resources()
+        if self.back_callback:
+            self.back_callback()
+
+    def release_resources(self):
+        """
+        Detaches from the object mirror, writes out and closes the device inventory, and
+        shuts the BluetoothDeviceManager down if this widget created it; a manager from
+        the MultiAdapterManager is left to its owner. Safe to call more than once.
+
+        args: None
+        returns: None
+        """
+        if self.device_inventory:
+            self.device_inventory.close()
+            self.device_inventory = None
+        manager = self.bluetooth_device_manager
+        if not manager:
+            return
+        self.bluetooth_device_manager = None
+        object_mirror = self.bluetooth_device_object_mirror
+        object_mirror.remove_listener(self.dbus_bridge.on_object_mirror_change)
+        if self.owns_bluetooth_device_manager:
+            # Shut down after the calls still queued, without holding up the GUI thread
+            self.background_worker.submit(manager.shutdown)
+            self.background_worker.shutdown(wait=False)
+            self.background_worker = None
 #---------------A2DP METHODS-------------------------------
 
     def build_a2dp_ui(self, device_address):
@@ -532,7 +863,7 @@ class TestApplication(QWidget):
         return widget
 
     def media_control(self,command):
-        self.bluetooth_device_manager.media_control(command)
+        self.run_in_background("media_control", command)
 
     def start_streaming(self):
         """
@@ -596,7 +927,7 @@ class TestApplication(QWidget):
         returns: None
         """
         self.device_selector_sink.clear()
-        connected_sources = self.bluetooth_device_manager.get_connected_a2dp_source_devices()
+        connected_sources = self.bluetooth_device_manager.get_connected_a2dp_source_devices(self.interface)
         for address, name in connected_sources.items():
             self.device_selector_sink.addItem(f"{name} ({address})", address)
 
@@ -614,8 +945,9 @@ class TestApplication(QWidget):
 
 
     def get_a2dp_role_for_device(self, device_address):
-        sinks = self.bluetooth_device_manager.get_connected_a2dp_sink_devices(self.interface)
-        sources = self.bluetooth_device_manager.get_connected_a2dp_source_devices(self.interface)
+        device_views = self.bluetooth_device_manager.get_adapter_device_snapshot(self.interface)
+        sinks = device_views["a2dp_sink"]
+        sources = device_views["a2dp_source"]
 
         if device_address in sinks and device_address in sources:
             return "both"
@@ -665,8 +997,21 @@ class TestApplication(QWidget):
         self.send_file_button.setEnabled(False)
         self.send_file_button.setText("Sending...")
 
+        # The OBEX push waits for the remote side; finish in on_send_file_finished
+        self.run_in_background("send_file_via_obex", self.device_address, file_path,
+                               callback=self.on_send_file_finished)
+
+    def on_send_file_finished(self, future):
+        """
+        Reports the result of a file sent with send_file().
+
+        Args:
+            future (concurrent.futures.Future): Future of the send_file_via_obex call.
+        returns:
+            None
+        """
         try:
-            success = self.bluetooth_device_manager.send_file_via_obex(self.device_address, file_path)
+            success = future.result()
         except Exception as e:
             success = False
             print(f"UI error: {e}")
@@ -688,7 +1033,18 @@ class TestApplication(QWidget):
         returns: None
         """
 
-        success = self.bluetooth_device_manager.start_opp_receiver()
+        self.run_in_background("start_opp_receiver", callback=self.on_opp_receiver_started)
+
+    def on_opp_receiver_started(self, future):
+        """
+        Reports whether the OPP receiver started by receive_file() is running.
+
+        Args:
+            future (concurrent.futures.Future): Future of the start_opp_receiver call.
+        returns:
+            None
+        """
+        success = future.exception() is None and future.result()
         QMessageBox.information(None, "OPP", "Ready to receive files..." if success else "Failed to start receiver.")
 
     def build_opp_tab(self,device_address):
@@ -829,8 +1185,9 @@ class TestApplication(QWidget):
 
         button_layout = QHBoxLayout()
 
-        self.is_connected = self.bluetooth_device_manager.is_device_connected(device_address)
-        self.is_paired = device_address in self.bluetooth_device_manager.get_paired_devices(device_address)
+        device_views = self.bluetooth_device_manager.get_adapter_device_snapshot(self.interface)
+        self.is_connected = device_address in device_views["connected"]
+        self.is_paired = device_address in device_views["paired"]
 
         # Connect Button
         self.connect_button = QPushButton("Connect")
@@ -867,23 +1224,36 @@ class TestApplication(QWidget):
         layout.addLayout(button_layout)
 
     def connect_and_reload(self, device_address):
-        success = self.bluetooth_device_manager.br_edr_connect(device_address,self.interface)
-        if success:
+        self.connect_button.setEnabled(False)
+        future = self.bluetooth_device_manager.br_edr_connect_async(device_address, self.interface)
+        self.when_done(future, lambda done: self.on_connect_and_reload_finished(device_address, done))
+
+    def on_connect_and_reload_finished(self, device_address, future):
+        if not future.cancelled() and future.exception() is None:
             print(f"[INFO] {device_address} connected successfully.")
             self.load_profile_tabs_for_device(device_address)
         else:
+            self.connect_button.setEnabled(True)
             QMessageBox.warning(self, "Connection Failed", f"Failed to connect to {device_address}.")
 
     def disconnect_and_reload(self, device_address):
-        success = self.bluetooth_device_manager.disconnect_le_device(device_address,self.interface)
-        if success:
+        self.disconnect_button.setEnabled(False)
+        future = self.bluetooth_device_manager.disconnect_le_device_async(device_address, self.interface)
+        self.when_done(future, lambda done: self.on_disconnect_and_reload_finished(device_address, done))
+
+    def on_disconnect_and_reload_finished(self, device_address, future):
+        if not future.cancelled() and future.exception() is None:
             print(f"[INFO] Disconnected from {device_address}")
         else:
             QMessageBox.warning(self, "Disconnection Failed", f"Could not disconnect from {device_address}")
         self.load_profile_tabs_for_device(device_address)
 
     def unpair_and_reload(self, device_address):
-        success = self.bluetooth_device_manager.remove_device(device_address,self.interface)
+        self.run_in_background("remove_device", device_address, self.interface,
+                               callback=lambda done: self.on_unpair_finished(device_address, done))
+
+    def on_unpair_finished(self, device_address, future):
+        success = future.exception() is None and future.result()
         if success:
             print(f"[INFO] Unpaired {device_address}")
         else:
@@ -1073,6 +1443,48 @@ class TestApplication(QWidget):
             inquiry_timeout_layout.addWidget(self.inquiry_timeout_input)
             self.gap_methods_layout.addLayout(inquiry_timeout_layout)
 
+            # Discovery filter inputs, empty fields are left to bluetoothd defaults
+            discovery_filter_layout = QGridLayout()
+            transport_label = QLabel("Transport:")
+            transport_label.setFont(bold_font)
+            transport_label.setStyleSheet("color:blue;")
+            discovery_filter_layout.addWidget(transport_label, 0, 0)
+            self.discovery_transport_combo = QComboBox()
+            self.discovery_transport_combo.addItems(["auto", "bredr", "le"])
+            discovery_filter_layout.addWidget(self.discovery_transport_combo, 0, 1)
+            rssi_label = QLabel("RSSI (dBm):")
+            rssi_label.setFont(bold_font)
+            rssi_label.setStyleSheet("color:blue;")
+            discovery_filter_layout.addWidget(rssi_label, 0, 2)
+            self.discovery_rssi_input = QLineEdit()
+            self.discovery_rssi_input.setPlaceholderText("e.g. -70")
+            discovery_filter_layout.addWidget(self.discovery_rssi_input, 0, 3)
+            pathloss_label = QLabel("Pathloss (dB):")
+            pathloss_label.setFont(bold_font)
+            pathloss_label.setStyleSheet("color:blue;")
+            discovery_filter_layout.addWidget(pathloss_label, 1, 0)
+            self.discovery_pathloss_input = QLineEdit()
+            discovery_filter_layout.addWidget(self.discovery_pathloss_input, 1, 1)
+            pattern_label = QLabel("Pattern:")
+            pattern_label.setFont(bold_font)
+            pattern_label.setStyleSheet("color:blue;")
+            discovery_filter_layout.addWidget(pattern_label, 1, 2)
+            self.discovery_pattern_input = QLineEdit()
+            self.discovery_pattern_input.setPlaceholderText("address/name prefix")
+            discovery_filter_layout.addWidget(self.discovery_pattern_input, 1, 3)
+            uuids_label = QLabel("UUIDs:")
+            uuids_label.setFont(bold_font)
+            uuids_label.setStyleSheet("color:blue;")
+            discovery_filter_layout.addWidget(uuids_label, 2, 0)
+            self.discovery_uuids_input = QLineEdit()
+            self.discovery_uuids_input.setPlaceholderText("comma separated")
+            discovery_filter_layout.addWidget(self.discovery_uuids_input, 2, 1, 1, 2)
+            self.discovery_duplicate_data_checkbox = QCheckBox("DuplicateData")
+            self.discovery_duplicate_data_checkbox.setFont(bold_font)
+            self.discovery_duplicate_data_checkbox.setChecked(True)
+            discovery_filter_layout.addWidget(self.discovery_duplicate_data_checkbox, 2, 3)
+            self.gap_methods_layout.addLayout(discovery_filter_layout)
+
             discovery_buttons_layout = QHBoxLayout()
             self.set_discovery_on_button = QPushButton("START")
             self.set_discovery_on_button.setFont(bold_font)
@@ -1124,9 +1536,27 @@ class TestApplication(QWidget):
            returns: None
            """
 
-        self.bluetooth_device_manager=BluetoothDeviceManager(self.interface)
         self.bluez_logger=BluezLogger(self.log_path)
         self.daemon_manager.restart_daemons()
+        try:
+            wait_for_dbus_service("org.bluez")
+        except TimeoutError as e:
+            print(f"[ERROR] {e}")
+        if self.adapter_manager:
+            # Calls go through the adapter's worker; the shared mirror re-seeds itself and
+            # re-adds the adapter once the restarted bluetoothd is on the bus
+            if not self.adapter_manager.wait_for_adapter(self.interface):
+                print(f"[ERROR] Adapter {self.interface} did not come back after restarting bluetoothd")
+            self.bluetooth_device_manager = self.adapter_manager.get_worker_proxy(self.interface)
+            self.bluetooth_device_object_mirror = self.adapter_manager.object_mirror
+        else:
+            self.bluetooth_device_manager = BluetoothDeviceManager(self.interface)
+            self.owns_bluetooth_device_manager = True
+            self.background_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"ui-{self.interface}")
+            self.bluetooth_device_object_mirror = self.bluetooth_device_manager.object_mirror
+        self.bluetooth_device_object_mirror.add_listener(self.dbus_bridge.on_object_mirror_change)
+        if self.device_inventory:
+            self.device_inventory.attach(self.bluetooth_device_object_mirror)
 
         # Create the main grid
         self.main_grid_layout = QGridLayout()
@@ -1399,7 +1829,7 @@ class TestApplication(QWidget):
         """)
 
         #back_button.clicked.connect(self.back_callback)
-        back_button.clicked.connect(lambda: self.back_callback())
+        back_button.clicked.connect(self.go_back)
 
         # Create horizontal layout to hold back button
         back_button_layout = QHBoxLayout()
@@ -1408,4 +1838,6 @@ class TestApplication(QWidget):
         self.main_grid_layout.addLayout(back_button_layout, 999, 5)
 
         self.setLayout(self.main_grid_layout)
-        QTimer.singleShot(1000, self.load_connected_devices)
\ No newline at end of file
+        self.load_inventory_devices()
+        # The mirror is already seeded; reconcile as soon as the inventory rows are shown
+        QTimer.singleShot(0, self.load_connected_devices)
\ No newline at end of file